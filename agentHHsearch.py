@@ -1,11 +1,14 @@
 #agentHHsearch
 
-from langchain.tools import BaseTool
-import pandas as pd
+import os
+import asyncio
+from langchain_core.tools import BaseTool
 from typing import Optional, Type
 from pydantic import BaseModel, Field
-# Импортируем функции из файла парсера
-from agentparser import get_vacancies_data, save_vacancies_to_csv, read_vacancies_from_csv
+from agents.cache import TTLCache
+from config import Config
+# Парсер и аналитика (pandas) импортируются внутри методов: описание инструмента
+# нужно агенту при сборке, а тяжёлые зависимости - только при первом вызове
 
 # Определяем входную схему для инструмента с использованием Pydantic
 class HeadHunterJobSearchInput(BaseModel):
@@ -13,8 +16,33 @@ class HeadHunterJobSearchInput(BaseModel):
     query: str = Field(description="Поисковый запрос для вакансий (например, 'бухгалтер', 'Python разработчик').")
     area_id: Optional[int] = Field(None, description="ID региона для поиска (например, 1 для Москвы, 113 для всей России). По умолчанию ищет по всей России, если не указано.")
     pages: Optional[int] = Field(1, description="Количество страниц для парсинга результатов. По умолчанию 1.")
-    save_to_file: Optional[str] = Field(None, description="Путь к файлу для сохранения результатов в CSV. Если указано, данные будут сохранены.")
-    read_from_file: Optional[str] = Field(None, description="Путь к файлу CSV для чтения вакансий вместо поиска.")
+    save_to_file: Optional[str] = Field(None, description="Путь к файлу для сохранения результатов (.csv, .parquet или .feather). Если указано, данные будут сохранены.")
+    read_from_file: Optional[str] = Field(None, description="Путь к файлу (.csv, .parquet или .feather) для чтения вакансий вместо поиска.")
+    group_by: Optional[str] = Field(None, description="Группировка статистики зарплат при чтении из файла: city, experience, employer или schedule.")
+
+# Результаты инструмента по нормализованным аргументам, общие для всех его экземпляров:
+# агент часто повторяет тот же вызов в одной переписке, и обход HH.ru не нужен.
+# Одинаковые одновременные вызовы объединяются в один обход; DataFrame из кэша
+# отдаётся копией, статистика хранится готовым текстом.
+tool_cache = TTLCache(Config.TOOL_CACHE_MAXSIZE, Config.TOOL_CACHE_TTL)
+
+
+def search_key(query: str, area: int, pages: int) -> tuple:
+    """Ключ поиска: регистр и лишние пробелы в запросе не важны"""
+    return ("search", " ".join(query.split()).casefold(), int(area), max(1, int(pages)))
+
+
+def stats_key(read_from_file: str, group_by: Optional[str]) -> tuple:
+    """Ключ статистики по файлу: изменённый или перезаписанный файл даёт новый ключ"""
+    path = os.path.abspath(read_from_file)
+    stat = os.stat(path)
+    return ("stats", path, stat.st_mtime_ns, stat.st_size, (group_by or "").strip().lower() or None)
+
+
+def found(df_vacancies) -> bool:
+    # Пустая выдача могла быть следствием сбоя HH.ru - её не запоминаем
+    return df_vacancies is not None and not df_vacancies.empty
+
 
 class HeadHunterJobSearchTool(BaseTool):
     """Tool for searching, saving, and reading HeadHunter job data."""
@@ -23,69 +51,85 @@ class HeadHunterJobSearchTool(BaseTool):
     # Указываем Pydantic модель в качестве схемы аргументов
     args_schema: Type[BaseModel] = HeadHunterJobSearchInput
 
-    def _run(self, query: str, area_id: Optional[int] = None, pages: Optional[int] = 1, save_to_file: Optional[str] = None, read_from_file: Optional[str] = None) -> str:
+    def _run(self, query: str, area_id: Optional[int] = None, pages: Optional[int] = 1, save_to_file: Optional[str] = None, read_from_file: Optional[str] = None, group_by: Optional[str] = None) -> str:
         """
         Синхронное выполнение поиска, сохранения или чтения данных о вакансиях.
         Используется для выполнения основных операций инструмента.
         """
         if read_from_file:
-            # Читаем из файла, если указано
-            df_result = read_vacancies_from_csv(read_from_file)
-            if isinstance(df_result, str):
-                return df_result # Возвращаем сообщение об ошибке, если чтение не удалось
-
-            # Обработка прочитанного DataFrame (например, расчет средней зарплаты)
-            # В данном случае, добавим расчет средней максимальной зарплаты
-            if 'salary_to' in df_result.columns:
-                valid_salaries = df_result['salary_to'].dropna()
-                if not valid_salaries.empty:
-                    numeric_salaries = pd.to_numeric(valid_salaries, errors='coerce').dropna()
-                    if not numeric_salaries.empty:
-                        average_salary = numeric_salaries.mean()
-                        return f"Прочитано {len(df_result)} вакансий из файла '{read_from_file}'. Средняя максимальная зарплата: {average_salary:.2f}"
-                    else:
-                         return f"В файле '{read_from_file}' нет числовых значений зарплаты для расчета среднего."
-                else:
-                    return f"В файле '{read_from_file}' нет информации о максимальной зарплате для расчета среднего."
-            else:
-                 return f"В файле '{read_from_file}' отсутствует столбец 'salary_to' для расчета средней зарплаты."
+            return self._read_stats(read_from_file, group_by)
 
         else:
+            from agentparser import get_vacancies_data, save_vacancies
             # Выполняем поиск вакансий, если не указано чтение из файла
             area = area_id if area_id is not None else 113 # По умолчанию вся Россия (ID 113)
             job_titles = [query] # Передаем поисковый запрос как список
             pages_to_parse = pages if pages is not None else 1 # По умолчанию 1 страница
 
-            df_vacancies = get_vacancies_data(job_titles, pages_to_parse, area)
+            df_vacancies = tool_cache.get_or_compute(
+                search_key(query, area, pages_to_parse),
+                lambda: get_vacancies_data(job_titles, pages_to_parse, area), keep=found
+            ).copy()
+            save_message = save_vacancies(df_vacancies, save_to_file) if save_to_file and not df_vacancies.empty else None
+            return self._describe(df_vacancies, query, area, save_message)
+
+    @staticmethod
+    def _read_stats(read_from_file: str, group_by: Optional[str]) -> str:
+        """Статистика зарплат по файлу: считается кусками, готовые агрегаты кэшируются рядом с ним"""
+        from salary_analytics import salary_stats, format_salary_stats
+        try:
+            return tool_cache.get_or_compute(
+                stats_key(read_from_file, group_by),
+                lambda: format_salary_stats(salary_stats(read_from_file, group_by=group_by), read_from_file)
+            )
+        except FileNotFoundError:
+            return f"Файл {read_from_file} не найден."
+        except Exception as e:
+            return f"Ошибка при чтении файла {read_from_file}: {e}"
 
-            if df_vacancies is None or df_vacancies.empty:
-                return f"Не найдено вакансий по запросу '{query}' в регионе с ID {area}."
+    @staticmethod
+    def _describe(df_vacancies, query: str, area: int, save_message: Optional[str]) -> str:
+        """Сообщение о результатах поиска с краткой информацией о первых вакансиях"""
+        from agentparser import SUMMARY_COLUMNS
+        if df_vacancies is None or df_vacancies.empty:
+            return f"Не найдено вакансий по запросу '{query}' в регионе с ID {area}."
 
-            result_message = f"Найдено {len(df_vacancies)} вакансий по запросу '{query}' в регионе с ID {area}."
+        result_message = f"Найдено {len(df_vacancies)} вакансий по запросу '{query}' в регионе с ID {area}."
 
-            if save_to_file:
-                # Сохраняем в файл, если указано
-                save_message = save_vacancies_to_csv(df_vacancies, save_to_file)
-                result_message += f" {save_message}"
+        if save_message:
+            result_message += f" {save_message}"
 
-            # Возвращаем краткую информацию о найденных вакансиях
-            top_n = 5
-            if len(df_vacancies) > top_n:
-                vacancies_summary = df_vacancies.head(top_n)[['name', 'employer', 'city', 'salary_to', 'link']].to_string(index=False)
-                result_message += f"\n\nПервые {top_n} вакансий:\n{vacancies_summary}"
-            else:
-                 vacancies_summary = df_vacancies[['name', 'employer', 'city', 'salary_to', 'link']].to_string(index=False)
-                 result_message += f"\n\nНайденные вакансии:\n{vacancies_summary}"
+        # Возвращаем краткую информацию о найденных вакансиях
+        top_n = 5
+        if len(df_vacancies) > top_n:
+            vacancies_summary = df_vacancies.head(top_n)[SUMMARY_COLUMNS].to_string(index=False)
+            result_message += f"\n\nПервые {top_n} вакансий:\n{vacancies_summary}"
+        else:
+             vacancies_summary = df_vacancies[SUMMARY_COLUMNS].to_string(index=False)
+             result_message += f"\n\nНайденные вакансии:\n{vacancies_summary}"
 
-            return result_message
+        return result_message
 
 
-    async def _arun(self, query: str, area_id: Optional[int] = None, pages: Optional[int] = 1, save_to_file: Optional[str] = None, read_from_file: Optional[str] = None) -> str:
+    async def _arun(self, query: str, area_id: Optional[int] = None, pages: Optional[int] = 1, save_to_file: Optional[str] = None, read_from_file: Optional[str] = None, group_by: Optional[str] = None) -> str:
         """
         Асинхронное выполнение поиска, сохранения или чтения данных о вакансиях.
-        В данной реализации просто вызывает синхронную версию для простоты.
-        Для истинной асинхронности, используйте асинхронные версии методов requests
-        или библиотеки для асинхронного парсинга.
+        Страницы выдачи и описания вакансий загружаются параллельно через aiohttp, а
+        работа с DataFrame и файлами выполняется в потоках, поэтому цикл событий не
+        блокируется и несколько вызовов инструмента выполняются одновременно.
         """
-        # Для простоты, вызываем синхронную версию
-        return self._run(query, area_id, pages, save_to_file, read_from_file)
\ No newline at end of file
+        if read_from_file:
+            return await asyncio.to_thread(self._read_stats, read_from_file, group_by)
+
+        from agentparser import get_vacancies_data_async, save_vacancies
+        area = area_id if area_id is not None else 113 # По умолчанию вся Россия (ID 113)
+        pages_to_parse = pages if pages is not None else 1 # По умолчанию 1 страница
+
+        df_vacancies = (await tool_cache.get_or_fetch(
+            search_key(query, area, pages_to_parse),
+            lambda: get_vacancies_data_async([query], pages_to_parse, area), keep=found
+        )).copy()
+        save_message = None
+        if save_to_file and not df_vacancies.empty:
+            save_message = await asyncio.to_thread(save_vacancies, df_vacancies, save_to_file)
+        return await asyncio.to_thread(self._describe, df_vacancies, query, area, save_message)
@@ -1,118 +1,412 @@
+import os
+import sqlite3
+import asyncio
+import aiohttp
 import requests
-import datetime
+import time
 import pandas as pd
+from typing import Callable, NamedTuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from config import Config
+from codec import loads
+from metrics import timed, upstream_requests, upstream_result
+from agents.resilience import CircuitOpenError, hh_breaker, hh_limiter, parse_retry_after, retry_delay
+from agents.vacancy_store import get_vacancy_store
+from agents.http_pool import get_session
 
-# Убедитесь, что у вас есть реализация функции find_id
-# Примерная заглушка find_id (вам нужно заменить ее на вашу реальную логику)
-def find_id(job_titles, pages_number, area, url_base):
-    ids = []
-    for title in job_titles:
-        params = {
-            "text": title,
-            "area": area,
-            "per_page": 100, # Максимальное количество вакансий на странице
-            "page": 0
-        }
-        # Выполняем запросы к API для каждой страницы
-        for page in range(pages_number):
-            params["page"] = page
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_maxsize=Config.HH_MAX_IN_FLIGHT))
+_session.mount("http://", HTTPAdapter(pool_maxsize=Config.HH_MAX_IN_FLIGHT))
+
+
+def get_json(url, params=None):
+    """GET через общий ограничитель частоты и предохранитель HH.ru.
+
+    При 429/5xx и сетевых ошибках запрос повторяется с паузой (Retry-After или
+    экспоненциальный backoff с джиттером), 429 дополнительно снижает скорость запросов.
+    """
+    for attempt in range(Config.HH_MAX_RETRIES + 1):
+        # Проверка перед каждой попыткой: после размыкания повторы прекращаются
+        probe = hh_breaker.check()
+        try:
+            with timed("rate_limit_wait"):
+                hh_limiter.acquire_sync()
             try:
-                response = requests.get(url_base, params=params)
-                response.raise_for_status()
-                data = response.json()
-                for item in data.get("items", []):
-                    ids.append(item["id"])
-            except requests.exceptions.RequestException as e:
-                print(f"Ошибка при поиске ID вакансий: {e}")
-                break # Прекращаем поиск, если возникла ошибка
-
-    return ids
-
-
-def fill_row(vacancy, columns):
-    """Извлекает данные из JSON вакансии и формирует строку для DataFrame."""
-    row = {}
-    for col in columns:
-        if col == 'area':
-            row[col] = vacancy.get('area', {}).get('name')
-        elif col == 'from':
-            row[col] = vacancy.get('salary', {}).get('from')
-        elif col == 'to':
-            row[col] = vacancy.get('salary', {}).get('to')
-        elif col == 'currency':
-            row[col] = vacancy.get('salary', {}).get('currency')
-        elif col == 'experience':
-            row[col] = vacancy.get('experience', {}).get('name')
-        elif col == 'schedule':
-            row[col] = vacancy.get('schedule', {}).get('name')
-        elif col == 'employment':
-            row[col] = vacancy.get('employment', {}).get('name')
-        elif col == 'employer':
-            row[col] = vacancy.get('employer', {}).get('name')
-        elif col == 'published_at':
-             # Преобразуем дату в нужный формат, если необходимо
-            published_at_str = vacancy.get('published_at')
-            if published_at_str:
+                with timed("hh_api"):
+                    response = _session.get(url, params=params, timeout=Config.REQUEST_TIMEOUT)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                upstream_requests.inc("hh", upstream_result(None))
+                hh_breaker.record_failure()
+                if attempt == Config.HH_MAX_RETRIES:
+                    raise
+                time.sleep(retry_delay(attempt))
+                continue
+        finally:
+            # Проба, исход которой не записан (другое исключение requests), не должна держать цепь half-open
+            if probe:
+                hh_breaker.release_probe()
+        upstream_requests.inc("hh", upstream_result(response.status_code))
+        # Отказом HH.ru считаются 5xx и сетевые ошибки; любой другой ответ (в том числе 4xx и 429)
+        # значит, что API доступен
+        if response.status_code >= 500:
+            hh_breaker.record_failure()
+        else:
+            hh_breaker.record_success()
+        if response.status_code not in RETRY_STATUSES:
+            hh_limiter.on_success()
+            break
+        retry_after = None
+        if response.status_code == 429:
+            # 429 обрабатывает ограничитель
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            hh_limiter.on_throttled(retry_after)
+        if attempt == Config.HH_MAX_RETRIES:
+            break
+        # Пауза по Retry-After выдерживает сам ограничитель
+        if retry_after is None:
+            time.sleep(retry_delay(attempt))
+
+    response.raise_for_status()
+    return loads(response.content)
+
+
+def remember(vacancies):
+    """Сохраняет загруженные вакансии в локальное хранилище для поиска без обращения к HH.ru"""
+    store = get_vacancy_store()
+    if store is None or not vacancies:
+        return
+    try:
+        store.upsert(vacancies)
+    except sqlite3.Error as e:
+        print(f"Ошибка записи в хранилище вакансий: {e}")
+
+
+def find_items(job_titles, pages_number, area, url_base):
+    """Краткие карточки вакансий из выдачи поиска (id, published_at и т.д.)"""
+    items = []
+    with ThreadPoolExecutor(max_workers=Config.HH_MAX_IN_FLIGHT) as executor:
+        for title in job_titles:
+            params = [
+                {
+                    "text": title,
+                    "area": area,
+                    "per_page": 100, # Максимальное количество вакансий на странице
+                    "page": page
+                }
+                for page in range(pages_number)
+            ]
+            # Страницы запрашиваются параллельно, результаты разбираются по порядку
+            futures = [executor.submit(get_json, url_base, page_params) for page_params in params]
+            for future in futures:
                 try:
-                    # Пример преобразования из ISO 8601 в YYYY-MM-DD HH:MM:SS
-                    published_at_dt = datetime.datetime.fromisoformat(published_at_str.replace('Z', '+00:00'))
-                    row[col] = published_at_dt.strftime('%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    row[col] = published_at_str # Оставляем как есть, если не удалось распарсить
-            else:
-                row[col] = None
+                    data = future.result()
+                    items.extend(data.get("items", []))
+                except (requests.exceptions.RequestException, CircuitOpenError) as e:
+                    print(f"Ошибка при поиске ID вакансий: {e}")
+                    break # Прекращаем поиск, если возникла ошибка
+            for future in futures:
+                future.cancel()
+
+    remember(items)
+    return items
 
-        elif col in vacancy:
-            row[col] = vacancy[col]
-        else:
-            row[col] = None # Заполняем None, если поле отсутствует
 
-    return row
+def find_id(job_titles, pages_number, area, url_base):
+    return [item["id"] for item in find_items(job_titles, pages_number, area, url_base)]
+
+
+def to_numeric(series):
+    return pd.to_numeric(series, errors='coerce')
+
+
+def to_category(series):
+    return series.astype('category')
+
+
+def to_published_at(series):
+    """ISO 8601 из HH.ru -> datetime одним проходом (локальное время, смещение отбрасывается)"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return pd.to_datetime(series.astype('string').str.slice(0, 19), format='ISO8601', errors='coerce')
+
+
+class ColumnSpec(NamedTuple):
+    """Столбец DataFrame: путь в JSON вакансии, преобразование столбца, вывод в кратком списке"""
+    name: str
+    path: tuple
+    convert: Optional[Callable] = None
+    summary: bool = False
+
+
+# Описание столбцов в порядке вывода. Новый столбец добавляется одной строкой
+VACANCY_COLUMNS = [
+    ColumnSpec('id', ('id',)),
+    ColumnSpec('premium', ('premium',)),
+    ColumnSpec('name', ('name',), summary=True),
+    ColumnSpec('city', ('area', 'name'), to_category, summary=True),
+    ColumnSpec('salary_from', ('salary', 'from'), to_numeric),
+    ColumnSpec('salary_to', ('salary', 'to'), to_numeric, summary=True),
+    ColumnSpec('currency', ('salary', 'currency'), to_category),
+    ColumnSpec('experience', ('experience', 'name'), to_category),
+    ColumnSpec('schedule', ('schedule', 'name')),
+    ColumnSpec('employment', ('employment', 'name')),
+    ColumnSpec('description', ('description',)),
+    ColumnSpec('employer', ('employer', 'name'), summary=True),
+    ColumnSpec('published_at', ('published_at',), to_published_at),
+    ColumnSpec('link', ('alternate_url',), summary=True),
+    ColumnSpec('has_test', ('has_test',)),
+]
+SUMMARY_COLUMNS = [spec.name for spec in VACANCY_COLUMNS if spec.summary]
+
+
+def compile_extractor(path):
+    """Функция извлечения значения по пути; вложенный null (например, salary: null) даёт None"""
+    if len(path) == 1:
+        key = path[0]
+        return lambda vacancy: vacancy.get(key)
+    if len(path) == 2:
+        outer, inner = path
+        return lambda vacancy: (vacancy.get(outer) or {}).get(inner)
+
+    def extract(vacancy):
+        value = vacancy
+        for key in path:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        return value
+    return extract
+
+
+_EXTRACTORS = [(spec.name, compile_extractor(spec.path)) for spec in VACANCY_COLUMNS]
+
+
+def apply_column_types(df, columns=VACANCY_COLUMNS):
+    """Приводит столбцы DataFrame к типам из описания"""
+    for spec in columns:
+        if spec.convert is not None and spec.name in df.columns:
+            df[spec.name] = spec.convert(df[spec.name])
+    return df
+
+
+def vacancies_to_dataframe(vacancies):
+    """Собирает DataFrame из JSON вакансий: значения копятся по столбцам, кадр строится один раз."""
+    vacancies = [vacancy for vacancy in vacancies if isinstance(vacancy, dict)]
+    data = {name: [extract(vacancy) for vacancy in vacancies] for name, extract in _EXTRACTORS}
+    df = pd.DataFrame(data, columns=[name for name, _ in _EXTRACTORS])
+    return apply_column_types(df)
 
 
 def get_vacancies_data(job_titles, pages_number, area):
     """Собирает данные о вакансиях и возвращает DataFrame."""
-    url_base = 'https://api.hh.ru/vacancies/'
+    url_base = Config.HH_API_URL.rstrip('/') + '/'
     ids = find_id(job_titles, pages_number, area, url_base)
+    return vacancies_to_dataframe(fetch_details(ids, url_base))
+
 
-    columns = ['id', 'premium', 'name', 'area', 'from', 'to', 'currency', 'experience',
-               'schedule', 'employment', 'description', 'employer', 'published_at',
-               'alternate_url', 'has_test']
+def fetch_details(ids, url_base):
+    """Параллельно загружает полные описания вакансий, порядок ids сохраняется.
 
-    df = pd.DataFrame(columns = columns)
-    leng = 0
+    Вакансии, которые не удалось загрузить, пропускаются.
+    """
+    with ThreadPoolExecutor(max_workers=Config.HH_MAX_IN_FLIGHT) as executor:
+        futures = [executor.submit(get_json, url_base + vacancy_id) for vacancy_id in ids]
 
-    for vacancy_id in ids:
+    fetched = []
+    for vacancy_id, future in zip(ids, futures):
         try:
-            vacancy = requests.get(url_base + vacancy_id).json()
-            r = fill_row(vacancy, columns)
-            df.loc[leng] = r
-            leng += 1
-        except requests.exceptions.RequestException as e:
+            vacancy = future.result()
+        except (requests.exceptions.RequestException, CircuitOpenError) as e:
             print(f"Ошибка при получении деталей вакансии {vacancy_id}: {e}")
-        except Exception as e:
-             print(f"Неизвестная ошибка при обработке вакансии {vacancy_id}: {e}")
+            continue
+        fetched.append(vacancy)
+        yield vacancy
+    remember(fetched)
 
+async def get_json_async(session, url, params=None):
+    """Неблокирующий аналог get_json через aiohttp с теми же ограничителем, предохранителем и повторами."""
+    for attempt in range(Config.HH_MAX_RETRIES + 1):
+        probe = hh_breaker.check()
+        try:
+            with timed("rate_limit_wait"):
+                await hh_limiter.acquire()
+            try:
+                with timed("hh_api"):
+                    async with session.get(url, params=params) as response:
+                        status = response.status
+                        upstream_requests.inc("hh", upstream_result(status))
+                        # Отказом HH.ru считаются 5xx и сетевые ошибки; любой другой ответ
+                        # (в том числе 4xx и 429) значит, что API доступен
+                        if status >= 500:
+                            hh_breaker.record_failure()
+                        else:
+                            hh_breaker.record_success()
+                        if status not in RETRY_STATUSES:
+                            hh_limiter.on_success()
+                            response.raise_for_status()
+                            return loads(await response.read())
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                upstream_requests.inc("hh", upstream_result(None))
+                hh_breaker.record_failure()
+                if attempt == Config.HH_MAX_RETRIES:
+                    raise
+                await asyncio.sleep(retry_delay(attempt))
+                continue
+        finally:
+            # Проба, исход которой не записан (отмена внутри session.get), не должна держать цепь half-open
+            if probe:
+                hh_breaker.release_probe()
+        if status == 429:
+            hh_limiter.on_throttled(retry_after)
+        else:
+            retry_after = None
+        if attempt == Config.HH_MAX_RETRIES:
+            raise aiohttp.ClientResponseError(response.request_info, (), status=status, message=response.reason)
+        # Пауза по Retry-After выдерживает сам ограничитель
+        if retry_after is None:
+            await asyncio.sleep(retry_delay(attempt))
 
-    # Переименование колонок для удобства
-    df.rename(columns={'area':'city', 'from':'salary_from', 'to':'salary_to', 'alternate_url':'link'}, inplace=True)
 
-    return df
+async def _gather_limited(coroutines):
+    """Выполняет корутины не более чем по HH_MAX_IN_FLIGHT одновременно, ошибки возвращаются как результаты"""
+    semaphore = asyncio.Semaphore(Config.HH_MAX_IN_FLIGHT)
+
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(run(coroutine) for coroutine in coroutines), return_exceptions=True)
+
+
+async def find_items_async(job_titles, pages_number, area, url_base):
+    """Асинхронный find_items: страницы всех запросов загружаются параллельно"""
+    session = await get_session()
+    items = []
+    for title in job_titles:
+        pages = await _gather_limited(
+            get_json_async(session, url_base, {"text": title, "area": area, "per_page": 100, "page": page})
+            for page in range(pages_number)
+        )
+        for data in pages:
+            if isinstance(data, (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError)):
+                print(f"Ошибка при поиске ID вакансий: {data}")
+                break # Как и в find_items, выдача после ошибочной страницы отбрасывается
+            if isinstance(data, BaseException):
+                raise data
+            items.extend(data.get("items", []))
+
+    await asyncio.to_thread(remember, items)
+    return items
+
+
+async def fetch_details_async(ids, url_base):
+    """Асинхронный fetch_details: список полных описаний, порядок ids сохраняется"""
+    session = await get_session()
+    results = await _gather_limited(get_json_async(session, url_base + vacancy_id) for vacancy_id in ids)
+    fetched = []
+    for vacancy_id, vacancy in zip(ids, results):
+        if isinstance(vacancy, (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError)):
+            print(f"Ошибка при получении деталей вакансии {vacancy_id}: {vacancy}")
+            continue
+        if isinstance(vacancy, BaseException):
+            raise vacancy
+        fetched.append(vacancy)
+    await asyncio.to_thread(remember, fetched)
+    return fetched
 
-def save_vacancies_to_csv(df, file_path):
-    """Сохраняет DataFrame с вакансиями в CSV."""
+
+async def get_vacancies_data_async(job_titles, pages_number, area):
+    """Асинхронный get_vacancies_data: сеть не блокирует цикл событий, DataFrame строится в потоке."""
+    url_base = Config.HH_API_URL.rstrip('/') + '/'
+    items = await find_items_async(job_titles, pages_number, area, url_base)
+    vacancies = await fetch_details_async([item["id"] for item in items], url_base)
+    return await asyncio.to_thread(vacancies_to_dataframe, vacancies)
+
+
+def dataset_format(file_path):
+    """Формат файла по расширению: csv, parquet или feather"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in ('.parquet', '.pq'):
+        return 'parquet'
+    if ext in ('.feather', '.arrow'):
+        return 'feather'
+    return 'csv'
+
+
+def save_vacancies(df, file_path):
+    """Сохраняет DataFrame с вакансиями; формат выбирается по расширению файла."""
     try:
-        df.to_csv(file_path, index=False, encoding='utf-8')
+        columns = [spec.name for spec in VACANCY_COLUMNS if spec.name in df.columns]
+        extra = [col for col in df.columns if col not in columns]
+        df = df[columns + extra]
+        fmt = dataset_format(file_path)
+        if fmt == 'parquet':
+            df.to_parquet(file_path, index=False, compression=Config.DATASET_COMPRESSION)
+        elif fmt == 'feather':
+            df.reset_index(drop=True).to_feather(file_path, compression=Config.DATASET_COMPRESSION)
+        else:
+            df.to_csv(file_path, index=False, encoding='utf-8')
         return f"Данные о вакансиях сохранены в {file_path}"
     except Exception as e:
         return f"Ошибка при сохранении данных в {file_path}: {e}"
 
-def read_vacancies_from_csv(file_path):
-    """Читает данные о вакансиях из CSV и возвращает DataFrame."""
+def append_vacancies(df, file_path):
+    """Дописывает строки в сохранённый набор (CSV дописывается, Parquet/Feather перезаписываются).
+
+    Если в новых строках есть столбцы, которых нет в заголовке CSV, файл
+    перезаписывается с объединением столбцов, чтобы ничего не потерять.
+    """
+    if not os.path.exists(file_path):
+        return save_vacancies(df, file_path)
+    try:
+        if dataset_format(file_path) == 'csv':
+            header = pd.read_csv(file_path, nrows=0).columns
+            if set(df.columns) <= set(header):
+                df.reindex(columns=header).to_csv(file_path, mode='a', header=False, index=False, encoding='utf-8')
+                return f"Данные о вакансиях дописаны в {file_path}"
+    except Exception as e:
+        return f"Ошибка при сохранении данных в {file_path}: {e}"
+
+    existing = read_vacancies(file_path)
+    if isinstance(existing, str):
+        return existing
+    combined = pd.concat([existing, df], ignore_index=True)
+    return save_vacancies(apply_column_types(combined), file_path)
+
+def read_vacancies(file_path, columns=None):
+    """Читает данные о вакансиях и возвращает DataFrame.
+
+    columns ограничивает набор читаемых столбцов (в Parquet/Feather читаются только они),
+    отсутствующие в файле столбцы пропускаются.
+    """
     try:
-        df = pd.read_csv(file_path)
-        return df
+        fmt = dataset_format(file_path)
+        if fmt == 'csv':
+            usecols = None if columns is None else (lambda col: col in columns)
+            df = pd.read_csv(file_path, usecols=usecols)
+        else:
+            import pyarrow.ipc
+            import pyarrow.parquet
+            if columns is not None:
+                if fmt == 'parquet':
+                    available = pyarrow.parquet.read_schema(file_path).names
+                else:
+                    available = pyarrow.ipc.open_file(file_path).schema.names
+                columns = [col for col in columns if col in available]
+            if fmt == 'parquet':
+                df = pd.read_parquet(file_path, columns=columns)
+            else:
+                df = pd.read_feather(file_path, columns=columns)
+        return apply_column_types(df)
     except FileNotFoundError:
         return f"Файл {file_path} не найден."
     except Exception as e:
-        return f"Ошибка при чтении файла {file_path}: {e}"
\ No newline at end of file
+        return f"Ошибка при чтении файла {file_path}: {e}"
+
+# Прежние имена: формат по-прежнему определяется расширением
+save_vacancies_to_csv = save_vacancies
+read_vacancies_from_csv = read_vacancies
@@ -0,0 +1,159 @@
+#cache.py
+
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """LRU-кэш ограниченного размера с временем жизни записей
+
+    Одновременные запросы одного и того же ключа объединяются в один вызов
+    загрузчика (single-flight). Устаревшие записи ещё max_stale секунд после TTL
+    доступны через get_stale, чтобы отдавать их, пока источник недоступен.
+    Записи защищены блокировкой, поэтому кэш можно использовать и из потоков
+    (get_or_compute для синхронных загрузчиков).
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_stale: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._computing: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Значение из кэша или None, если записи нет или она устарела"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            now = time.monotonic()
+            if expires_at < now:
+                if expires_at + self.max_stale < now:
+                    del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """Значение, даже устаревшее, если оно не старше max_stale после TTL"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at + self.max_stale < time.monotonic():
+                del self._data[key]
+                return None
+            self.stale_hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Сохранение значения с вытеснением самых старых записей"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]],
+                           keep: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Значение из кэша, иначе результат fetch (один вызов на ключ)
+
+        Исключения fetch не кэшируются и пробрасываются всем ожидающим. Если задан
+        keep, результат сохраняется в кэш, только когда keep(результат) истинно
+        (ожидающие его всё равно получают).
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже передано ожидающим, без них future не должен ругаться
+            future.exception()
+            raise
+        else:
+            if keep is None or keep(value):
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       keep: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Синхронный get_or_fetch для вызовов из потоков
+
+        Пока один поток вычисляет значение ключа, остальные с тем же ключом ждут
+        и берут его из кэша; keep - как в get_or_fetch.
+        """
+        value = self.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            computing = self._computing.setdefault(key, threading.Lock())
+        try:
+            with computing:
+                value = self.get(key)
+                with self._lock:
+                    if value is not None:
+                        self.coalesced += 1
+                        return value
+                    self.misses += 1
+                value = compute()
+                if keep is None or keep(value):
+                    self.set(key, value)
+                return value
+        finally:
+            with self._lock:
+                if self._computing.get(key) is computing and not computing.locked():
+                    del self._computing[key]
+
+    def stats(self) -> dict:
+        """Счётчики попаданий и промахов"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "stale_hits": self.stale_hits,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0
+        }
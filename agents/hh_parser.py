@@ -1,47 +1,217 @@
 #hh_parser.py
 
+import asyncio
+import sqlite3
 import aiohttp
 from config import Config
-from models.schemas import VacancyBase
-from typing import List
+from codec import loads
+from metrics import timed, upstream_requests, upstream_result
+from models.records import VacancyRecord
+from agents.http_pool import get_session
+from agents.cache import TTLCache
+from agents.resilience import hh_breaker, hh_limiter, parse_retry_after, retry_delay
+from agents.vacancy_store import VacancyStore, get_vacancy_store
+from typing import AsyncIterator, List, Optional
+
+# Режимы поиска: только HH.ru, сначала локальное хранилище, только локальное хранилище
+SEARCH_LIVE = "live"
+SEARCH_LOCAL_FIRST = "local_first"
+SEARCH_LOCAL = "local"
+SEARCH_MODES = (SEARCH_LIVE, SEARCH_LOCAL_FIRST, SEARCH_LOCAL)
+
+
+def clamp_pages(pages: int) -> int:
+    """Число страниц в пределах 1..MAX_PAGES и глубины выдачи HH.ru"""
+    depth = max(1, Config.HH_MAX_DEPTH // max(Config.MAX_VACANCIES, 1))
+    return max(1, min(pages, Config.MAX_PAGES, depth))
 
 class HHParser:
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None, store: Optional[VacancyStore] = None):
         self.headers = {
             "User-Agent": Config.HH_USER_AGENT,
             "Accept": "application/json"
         }
+        # Своя сессия передаётся явно, иначе используется общий пул процесса
+        self._session = session
+        self.cache = TTLCache(
+            maxsize=Config.HH_CACHE_MAXSIZE,
+            ttl=Config.HH_CACHE_TTL,
+            max_stale=Config.HH_CACHE_MAX_STALE
+        )
+        # Всё загруженное с HH.ru сохраняется в локальное хранилище для поиска без сети
+        self.store = store if store is not None else get_vacancy_store()
 
-    async def fetch_vacancies(self, query: str) -> List[VacancyBase]:
-        """Получение и обработка вакансий"""
-        params = {
-            "text": query,
-            "per_page": Config.MAX_VACANCIES,
-            "area": 1  # Москва
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            raw_vacancies = await self._fetch_hh_api(session, params)
-            return self._process_vacancies(raw_vacancies)
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Сессия для запросов к HH.ru"""
+        if self._session is not None:
+            return self._session
+        return await get_session()
+
+    async def close(self):
+        """Закрытие собственной сессии (общий пул закрывается через close_session)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def fetch_vacancies(self, query: str, area: int = 1, pages: int = 1,
+                              mode: str = Config.SEARCH_MODE) -> List[VacancyRecord]:
+        """Получение и обработка вакансий
+
+        Args:
+            query: Поисковый запрос
+            area: ID региона (по умолчанию 1 - Москва)
+            pages: Количество страниц выдачи, запрашиваются параллельно (не больше MAX_PAGES)
+            mode: live, local_first (HH.ru только при промахе или устаревших данных) или local
+        """
+        local = await self._search_local(query, area, pages, mode)
+        if local is not None:
+            return self._process_vacancies(local)
+        session = await self.get_session()
+        pages_items = await asyncio.gather(*self._page_requests(session, query, area, pages))
+        raw_vacancies = [item for items in pages_items for item in items]
+        return self._process_vacancies(raw_vacancies)
+
+    async def iter_vacancies(self, query: str, area: int = 1, pages: int = 1,
+                             mode: str = Config.SEARCH_MODE) -> AsyncIterator[List[VacancyRecord]]:
+        """Вакансии по мере загрузки: страницы отдаются в порядке готовности"""
+        local = await self._search_local(query, area, pages, mode)
+        if local is not None:
+            yield self._process_vacancies(local)
+            return
+        session = await self.get_session()
+        for page in asyncio.as_completed(self._page_requests(session, query, area, pages)):
+            yield self._process_vacancies(await page)
+
+    async def _search_local(self, query: str, area: int, pages: int, mode: str) -> Optional[list]:
+        """Вакансии из локального хранилища или None, если нужно идти на HH.ru
+
+        Raises:
+            ValueError: неизвестный режим поиска
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if mode == SEARCH_LIVE or self.store is None:
+            return None
+        limit = Config.MAX_VACANCIES * clamp_pages(pages)
+        # Запрос к SQLite выполняется в потоке, чтобы не блокировать цикл событий
+        with timed("local_search"):
+            if mode == SEARCH_LOCAL:
+                return await asyncio.to_thread(self.store.search, query, area, limit)
+            return await asyncio.to_thread(self.store.lookup, query, area, limit, Config.VACANCY_STORE_MAX_AGE)
+
+    def _page_requests(self, session: aiohttp.ClientSession, query: str, area: int, pages: int) -> list:
+        return [
+            self._fetch_hh_api(session, {
+                "text": query,
+                "per_page": Config.MAX_VACANCIES,
+                "area": area,
+                "page": page
+            })
+            for page in range(clamp_pages(pages))
+        ]
+
+    @staticmethod
+    def cache_key(params: dict) -> tuple:
+        """Нормализованный ключ кэша: (text, area, per_page, page)"""
+        text = " ".join(str(params.get("text", "")).lower().split())
+        return (
+            text,
+            str(params.get("area", "")),
+            int(params.get("per_page", 20)),
+            int(params.get("page", 0))
+        )
 
     async def _fetch_hh_api(self, session: aiohttp.ClientSession, params: dict) -> list:
-        """Вызов API HH.ru"""
+        """Вызов API HH.ru через кэш
+
+        Если HH.ru недоступен или отключён предохранителем, отдаётся устаревшая
+        запись кэша, а при её отсутствии - пустой список.
+        """
+        key = self.cache_key(params)
         try:
-            async with session.get(
-                Config.HH_API_URL,
-                params=params,
-                headers=self.headers,
-                timeout=Config.REQUEST_TIMEOUT
-            ) as response:
-                response.raise_for_status()
-                data = await response.json()
-                return data.get("items", [])
+            return await self.cache.get_or_fetch(key, lambda: self._request_hh_api(session, params))
         except Exception as e:
+            stale = self.cache.get_stale(key)
+            if stale is not None:
+                print(f"Ошибка HH API, используется устаревший кэш: {e}")
+                return stale
             print(f"Ошибка HH API: {e}")
             return []
 
-    def _process_vacancies(self, raw_vacancies: list) -> List[VacancyBase]:
-        """Обработка списка вакансий"""
+    async def _request_hh_api(self, session: aiohttp.ClientSession, params: dict) -> list:
+        """Запрос к API HH.ru без кэша, с общим ограничителем частоты и повторами
+
+        Raises:
+            CircuitOpenError: предохранитель разомкнут
+            aiohttp.ClientError: запрос не удался после всех повторов
+        """
+        for attempt in range(Config.HH_MAX_RETRIES + 1):
+            # Проверка перед каждой попыткой: после размыкания повторы прекращаются
+            probe = hh_breaker.check()
+            try:
+                with timed("rate_limit_wait"):
+                    await hh_limiter.acquire()
+                retry_after = None
+                try:
+                    with timed("hh_api"):
+                        async with session.get(
+                            Config.HH_API_URL,
+                            params=params,
+                            headers=self.headers
+                        ) as response:
+                            if response.status == 429:
+                                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                                hh_limiter.on_throttled(retry_after)
+                            response.raise_for_status()
+                            data = loads(await response.read())
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    status = getattr(e, "status", None)
+                    upstream_requests.inc("hh", upstream_result(status))
+                    # Отказом HH.ru считаются 5xx и сетевые ошибки; любой другой ответ значит,
+                    # что API доступен (429 обрабатывает ограничитель)
+                    if status is None or status >= 500:
+                        hh_breaker.record_failure()
+                    else:
+                        hh_breaker.record_success()
+                        if status != 429:
+                            raise
+                    if attempt == Config.HH_MAX_RETRIES:
+                        raise
+                    # Пауза по Retry-After выдерживает сам ограничитель
+                    if retry_after is None:
+                        await asyncio.sleep(retry_delay(attempt))
+                    continue
+            finally:
+                # Проба, исход которой не записан (отмена, ошибка разбора), не должна держать цепь half-open
+                if probe:
+                    hh_breaker.release_probe()
+            upstream_requests.inc("hh", "ok")
+            hh_breaker.record_success()
+            hh_limiter.on_success()
+            items = data.get("items", [])
+            await self._remember(items)
+            return items
+
+    async def _remember(self, items: list):
+        """Сохранение загруженных вакансий в локальное хранилище; его сбой не мешает поиску"""
+        if self.store is None or not items:
+            return
+        try:
+            await asyncio.to_thread(self.store.upsert, items)
+        except sqlite3.Error as e:
+            print(f"Ошибка записи в хранилище вакансий: {e}")
+
+    def _process_vacancies(self, raw_vacancies: list) -> List[VacancyRecord]:
+        """Обработка списка вакансий в лёгкие записи VacancyRecord (без валидации pydantic)"""
+        with timed("parse"):
+            return self._build_records(raw_vacancies)
+
+    def _build_records(self, raw_vacancies: list) -> List[VacancyRecord]:
         processed = []
         for item in raw_vacancies:
             try:
@@ -51,18 +221,21 @@ class HHParser:
                     if salary else "Не указана"
                 )
                 
-                vacancy = VacancyBase(
+                vacancy = VacancyRecord(
                     title=item.get("name", "Нет названия"),
                     company=item.get("employer", {}).get("name", "Неизвестно"),
                     salary=salary_str,
                     url=item.get("alternate_url", "#"),
                     description=(item.get("snippet", {}).get("requirement", "Описание отсутствует")[:100] + "...")
                 )
+                # Pydantic здесь не участвует, поэтому типы обязательных полей проверяются явно
+                if not (type(vacancy.title) is str and type(vacancy.company) is str and type(vacancy.url) is str):
+                    raise TypeError("title, company и url должны быть строками")
                 processed.append(vacancy)
             except Exception as e:
                 print(f"Ошибка обработки вакансии: {e}")
                 # Создаем базовую вакансию при ошибке
-                processed.append(VacancyBase(
+                processed.append(VacancyRecord(
                     title="Ошибка обработки",
                     company="",
                     salary="",
@@ -0,0 +1,68 @@
+#http_pool.py
+
+import asyncio
+import aiohttp
+from typing import Optional
+from config import Config
+from codec import dumps_str
+
+# Общая на процесс сессия: MCP-сервер, менеджер и агенты ходят через один пул соединений
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def create_session() -> aiohttp.ClientSession:
+    """Создание сессии с пулом keep-alive соединений и кэшем DNS"""
+    connector = aiohttp.TCPConnector(
+        limit=Config.HTTP_POOL_LIMIT,
+        limit_per_host=Config.HTTP_POOL_LIMIT_PER_HOST,
+        keepalive_timeout=Config.HTTP_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=Config.HTTP_DNS_CACHE_TTL,
+        use_dns_cache=True
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=Config.REQUEST_TIMEOUT),
+        json_serialize=dumps_str
+    )
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Получение общей сессии (создаётся при первом обращении)
+
+    Сессия привязана к циклу событий, поэтому при смене цикла создаётся заново.
+    """
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        if _session is not None and not _session.closed:
+            await _release_session(_session, _session_loop)
+        _session = create_session()
+        _session_loop = loop
+    return _session
+
+
+async def _release_session(session: aiohttp.ClientSession, loop: Optional[asyncio.AbstractEventLoop]):
+    """Закрытие сессии, оставшейся от прежнего цикла событий
+
+    Если тот цикл ещё работает (в другом потоке), сессия закрывается в нём. Если он
+    уже закрыт, close() из нового цикла только освобождает коннектор: соединения
+    прежнего цикла закрылись вместе с ним.
+    """
+    if loop is not None and loop.is_running() and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(session.close(), loop)
+        return
+    try:
+        await session.close()
+    except RuntimeError:
+        # Цикл остановлен, но не закрыт: соединения закроются, когда он снова запустится
+        pass
+
+
+async def close_session():
+    """Закрытие общей сессии и всех соединений пула"""
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
@@ -2,45 +2,317 @@
 
 import asyncio
 import aiohttp
+import time
 import uuid
-from models.schemas import VacancyBase
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+from models.schemas import VacancyRequest, VacancyResponse
+from models.records import VacancyRecord
 from agents.hh_parser import HHParser
+from agents.http_pool import get_session, close_session
 from config import Config
+from codec import dumps, loads
+from metrics import record_span, trace
+
+
+@dataclass
+class Task:
+    """Задача поиска в очереди менеджера"""
+    request_id: str
+    query: str
+    user_id: int
+    deadline: float
+    enqueued_at: float = field(default_factory=time.monotonic)
+    agent_id: Optional[str] = None
+    attempts: int = 0
+    # Ожидание в очереди до выдачи агенту и этапы, присланные агентом, секунды
+    wait: float = 0.0
+    spans: list = field(default_factory=list)
+    result: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+    def payload(self) -> dict:
+        return {"request_id": self.request_id, "query": self.query, "user_id": self.user_id}
+
+
+@dataclass
+class AgentState:
+    """Зарегистрированный агент: время последнего heartbeat и взятые задачи"""
+    agent_id: str
+    last_seen: float = field(default_factory=time.monotonic)
+    tasks: set = field(default_factory=set)
+
+
+class AgentManager:
+    """Очередь задач и раздача их агентам через long-poll
+
+    Агент держит запрос get_task открытым, пока не появится задача, поэтому задача
+    доходит до агента сразу после постановки. Если задачу ждут несколько агентов,
+    она отдаётся наименее загруженному из них. Задачи агентов, переставших
+    присылать heartbeat, возвращаются в очередь.
+    """
 
-class AgentWorker:
     def __init__(self):
+        self.pending: deque = deque()
+        self.waiters: list[tuple[str, asyncio.Future]] = []
+        self.agents: dict[str, AgentState] = {}
+        self.tasks: dict[str, Task] = {}
+        self.wait_times = deque(maxlen=1000)
+        self.counters = {"enqueued": 0, "dispatched": 0, "completed": 0, "requeued": 0, "expired": 0}
+        self._reaper: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Запуск фоновой проверки heartbeat и дедлайнов"""
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap_loop())
+
+    async def stop(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+
+    async def register_agent(self, agent_id: str) -> dict:
+        """Регистрация агента"""
+        self.agents.setdefault(agent_id, AgentState(agent_id)).last_seen = time.monotonic()
+        return {"status": "success", "agent_id": agent_id}
+
+    async def heartbeat(self, agent_id: str) -> dict:
+        """Отметка о том, что агент жив"""
+        agent = self.agents.get(agent_id)
+        if agent is None:
+            return {"status": "error", "message": "Agent not registered"}
+        agent.last_seen = time.monotonic()
+        return {"status": "success"}
+
+    def _enqueue(self, task: Task):
+        """Передача задачи наименее загруженному ожидающему агенту или в очередь"""
+        best = None
+        for index, (agent_id, waiter) in enumerate(self.waiters):
+            if waiter.done():
+                continue
+            agent = self.agents.get(agent_id)
+            load = len(agent.tasks) if agent is not None else 0
+            if best is None or load < best[0]:
+                best = (load, index)
+        if best is None:
+            self.pending.append(task)
+            return
+        _, waiter = self.waiters.pop(best[1])
+        waiter.set_result(task)
+
+    def _next_pending(self) -> Optional[Task]:
+        """Первая актуальная задача из очереди"""
+        while self.pending:
+            task = self.pending.popleft()
+            # Пропускаем задачи, которые уже выполнены или просрочены
+            if task.result.done():
+                continue
+            if task.deadline < time.monotonic():
+                self._expire(task)
+                continue
+            return task
+        return None
+
+    async def get_task(self, agent_id: str, timeout: float = Config.TASK_POLL_TIMEOUT) -> Optional[dict]:
+        """Long-poll: ожидание задачи до timeout секунд, None если задач не было"""
+        agent = self.agents.get(agent_id)
+        if agent is None:
+            await self.register_agent(agent_id)
+            agent = self.agents[agent_id]
+        agent.last_seen = time.monotonic()
+
+        task = self._next_pending()
+        if task is None:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append((agent_id, waiter))
+            try:
+                task = await asyncio.wait_for(waiter, timeout)
+            except asyncio.TimeoutError:
+                # Задачу могли выдать в том же витке цикла, в котором истёк таймаут
+                # (wait_for в Python 3.12+ отдаёт TimeoutError и в этом случае) - не теряем её
+                if not waiter.done() or waiter.cancelled():
+                    return None
+                task = waiter.result()
+            except asyncio.CancelledError:
+                # Соединение агента оборвалось после выдачи задачи - возвращаем её в очередь
+                if waiter.done() and not waiter.cancelled():
+                    self._enqueue(waiter.result())
+                raise
+            finally:
+                self.waiters = [(other, w) for other, w in self.waiters if w is not waiter]
+            if task.deadline < time.monotonic():
+                self._expire(task)
+                return None
+
+        task.agent_id = agent_id
+        task.attempts += 1
+        agent.tasks.add(task.request_id)
+        agent.last_seen = time.monotonic()
+        task.wait = time.monotonic() - task.enqueued_at
+        self.wait_times.append(task.wait)
+        record_span("queue_wait", task.wait)
+        self.counters["dispatched"] += 1
+        return task.payload()
+
+    async def submit_result(self, request_id: str, vacancies: list, spans=()) -> dict:
+        """Приём результата от агента вместе с этапами его обработки"""
+        task = self.tasks.pop(request_id, None)
+        if task is None:
+            return {"status": "error", "message": "Request ID not found"}
+        self._release(task)
+        task.spans = list(spans)
+        if not task.result.done():
+            task.result.set_result(vacancies)
+            self.counters["completed"] += 1
+        return {"status": "success"}
+
+    async def handle_request(self, request: VacancyRequest, request_id: Optional[str] = None) -> VacancyResponse:
+        """Постановка задачи в очередь и ожидание результата до дедлайна
+
+        Args:
+            request: Поисковый запрос
+            request_id: ID запроса от клиента (заголовок X-Request-ID), по нему доступна трасса
+
+        Raises:
+            asyncio.TimeoutError: агенты не успели выполнить задачу
+        """
+        if not request_id or request_id in self.tasks:
+            request_id = str(uuid.uuid4())
+        task = Task(
+            request_id=request_id,
+            query=request.query,
+            user_id=request.user_id,
+            deadline=time.monotonic() + Config.TASK_DEADLINE
+        )
+        with trace(task.request_id, "search") as spans:
+            self.tasks[task.request_id] = task
+            self.counters["enqueued"] += 1
+            self._enqueue(task)
+            try:
+                vacancies = await asyncio.wait_for(asyncio.shield(task.result), Config.TASK_DEADLINE)
+            except asyncio.TimeoutError:
+                self._expire(task)
+                raise
+            finally:
+                # Ожидание в очереди и этапы агента (уже учтены в гистограммах своих процессов)
+                spans.append(("queue_wait", task.wait))
+                spans.extend((stage, seconds) for stage, seconds in task.spans)
+        return VacancyResponse(vacancies=vacancies, user_id=request.user_id, request_id=task.request_id)
+
+    async def get_status(self) -> dict:
+        """Состояние очереди и агентов"""
+        waits = sorted(self.wait_times)
+        return {
+            "status": "running",
+            "agents": len(self.agents),
+            "waiting_agents": sum(1 for _, waiter in self.waiters if not waiter.done()),
+            "queue_depth": len(self.pending),
+            "in_flight": sum(len(agent.tasks) for agent in self.agents.values()),
+            "wait_time_ms": {
+                "avg": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                "p50": round(waits[len(waits) // 2] * 1000, 2) if waits else 0.0,
+                "p99": round(waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000, 2) if waits else 0.0
+            },
+            **self.counters
+        }
+
+    def _release(self, task: Task):
+        agent = self.agents.get(task.agent_id) if task.agent_id else None
+        if agent is not None:
+            agent.tasks.discard(task.request_id)
+        task.agent_id = None
+
+    def _expire(self, task: Task):
+        self.tasks.pop(task.request_id, None)
+        self._release(task)
+        if not task.result.done():
+            task.result.set_exception(asyncio.TimeoutError("Task deadline exceeded"))
+            task.result.exception()
+            self.counters["expired"] += 1
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(Config.AGENT_HEARTBEAT_INTERVAL)
+            self.reap()
+
+    def reap(self):
+        """Удаление умерших агентов с возвратом их задач в очередь и снятие просроченных задач"""
+        now = time.monotonic()
+        for agent_id, agent in list(self.agents.items()):
+            if now - agent.last_seen <= Config.AGENT_HEARTBEAT_TIMEOUT:
+                continue
+            del self.agents[agent_id]
+            for request_id in agent.tasks:
+                task = self.tasks.get(request_id)
+                if task is None or task.result.done():
+                    continue
+                task.agent_id = None
+                task.enqueued_at = now
+                self._enqueue(task)
+                self.counters["requeued"] += 1
+        for task in list(self.tasks.values()):
+            if task.deadline < now:
+                self._expire(task)
+
+
+class AgentWorker:
+    def __init__(self, concurrency: int = 1):
         self.agent_id = str(uuid.uuid4())
+        # Сколько задач агент обрабатывает одновременно
+        self.concurrency = concurrency
         self.mcp_url = f"http://{Config.API_HOST}:{Config.API_PORT}"
+        # Парсер и обращения к MCP-серверу идут через общий пул соединений
         self.parser = HHParser()
-        self.session = aiohttp.ClientSession()
+        self.session: aiohttp.ClientSession | None = None
 
     async def register(self):
         """Регистрация агента на MCP-сервере"""
+        self.session = await get_session()
         async with self.session.post(
             f"{self.mcp_url}/register_agent",
             json={"agent_id": self.agent_id}
         ) as response:
             return response.status == 200
 
+    async def heartbeat(self):
+        """Периодическое подтверждение, что агент жив"""
+        while True:
+            await asyncio.sleep(Config.AGENT_HEARTBEAT_INTERVAL)
+            try:
+                async with self.session.post(
+                    f"{self.mcp_url}/heartbeat",
+                    json={"agent_id": self.agent_id}
+                ) as response:
+                    await response.read()
+            except aiohttp.ClientError as e:
+                print(f"Agent {self.agent_id} heartbeat failed: {e}")
+
     async def fetch_task(self):
-        """Получение задачи от MCP-сервера"""
-        async with self.session.get(
+        """Получение задачи от MCP-сервера (long-poll)"""
+        async with self.session.post(
             f"{self.mcp_url}/get_task",
-            json={"agent_id": self.agent_id}
+            json={"agent_id": self.agent_id},
+            params={"timeout": Config.TASK_POLL_TIMEOUT}
         ) as response:
             if response.status == 200:
-                return await response.json()
+                return loads(await response.read())
             return None
 
-    async def submit_result(self, request_id: str, vacancies: list[VacancyBase]):
-        """Отправка результатов на MCP-сервер"""
-        vacancies_data = [vacancy.dict() for vacancy in vacancies]
+    async def submit_result(self, request_id: str, vacancies: list[VacancyRecord], spans=()):
+        """Отправка результатов и этапов обработки на MCP-сервер"""
+        vacancies_data = [vacancy.to_dict() for vacancy in vacancies]
         async with self.session.post(
             f"{self.mcp_url}/submit_result",
-            json={
+            data=dumps({
                 "request_id": request_id,
-                "vacancies": vacancies_data
-            }
+                "vacancies": vacancies_data,
+                "spans": list(spans)
+            }),
+            headers={"Content-Type": "application/json"}
         ) as response:
             return response.status == 200
 
@@ -51,23 +323,54 @@ class AgentWorker:
             return
 
         print(f"Agent {self.agent_id} started")
+        heartbeat = asyncio.create_task(self.heartbeat())
+
+        try:
+            await asyncio.gather(*(self.work_loop() for _ in range(self.concurrency)))
+        finally:
+            heartbeat.cancel()
 
+    async def work_loop(self):
+        """Получение и выполнение задач одна за другой"""
         while True:
-            task = await self.fetch_task()
-            
+            try:
+                task = await self.fetch_task()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Agent {self.agent_id} failed to fetch task: {e}")
+                await asyncio.sleep(1)
+                continue
+
             if task and "request_id" in task:
-                vacancies = await self.parser.fetch_vacancies(task["query"])
-                await self.submit_result(task["request_id"], vacancies)
-                print(f"Agent {self.agent_id} processed task {task['request_id']}")
-            else:
-                await asyncio.sleep(5)
+                # Этапы агента (ожидание лимита, HH.ru, разбор) уходят менеджеру вместе с результатом
+                with trace(task["request_id"], "agent_task") as spans:
+                    vacancies = await self.parser.fetch_vacancies(task["query"])
+                if await self.deliver_result(task["request_id"], vacancies, spans):
+                    print(f"Agent {self.agent_id} processed task {task['request_id']}")
+
+    async def deliver_result(self, request_id: str, vacancies: list[VacancyRecord], spans=(),
+                             attempts: int = 3) -> bool:
+        """Отправка результата с повторами: пока API перезапускается, готовый результат не теряется
+
+        Если отправить так и не удалось, задачу по дедлайну заново выдаст менеджер.
+        """
+        for attempt in range(attempts):
+            try:
+                if await self.submit_result(request_id, vacancies, spans):
+                    return True
+                print(f"Agent {self.agent_id}: result for {request_id} was rejected")
+                return False
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Agent {self.agent_id} failed to submit result {request_id}: {e}")
+                if attempt < attempts - 1:
+                    await asyncio.sleep(1)
+        return False
 
     async def close(self):
-        await self.session.close()
+        await close_session()
 
-async def run_agent():
-    worker = AgentWorker()
+async def run_agent(concurrency: int = 1):
+    worker = AgentWorker(concurrency)
     try:
         await worker.run()
     finally:
-        await worker.close()
\ No newline at end of file
+        await worker.close()
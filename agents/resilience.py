@@ -0,0 +1,174 @@
+#resilience.py
+
+import time
+import random
+import asyncio
+import threading
+from typing import Optional
+from config import Config
+
+
+class CircuitOpenError(Exception):
+    """Обращения к API временно отключены предохранителем"""
+
+
+class AdaptiveTokenBucket:
+    """Ограничитель частоты запросов (token bucket), подстраивающийся под 429
+
+    Потокобезопасен: один экземпляр используется и асинхронным HHParser, и
+    потоками agentparser. На 429 скорость уменьшается вдвое (не чаще раза в
+    cooldown секунд, чтобы пачка одновременных 429 не обрушила её до минимума),
+    а выдача токенов приостанавливается на Retry-After. Каждый успешный ответ
+    понемногу возвращает скорость к максимальной.
+    """
+
+    def __init__(self, rate: float, burst: float, min_rate: float, cooldown: float = 1.0):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.cooldown = cooldown
+        self.decreased_at = 0.0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Резервирование токена, возвращает сколько секунд нужно подождать"""
+        if self.max_rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(delay, self.blocked_until - now)
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def acquire_sync(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_throttled(self, retry_after: Optional[float] = None):
+        """Ответ 429: снижение скорости и пауза на Retry-After"""
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            if now - self.decreased_at >= self.cooldown:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.decreased_at = now
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def on_success(self):
+        """Успешный ответ: аддитивное восстановление скорости"""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 2),
+            "max_rate": self.max_rate,
+            "throttled": self.throttled
+        }
+
+
+class CircuitBreaker:
+    """Предохранитель: после серии ошибок отключает обращения к API на reset_timeout
+
+    По истечении паузы пропускает один пробный запрос (half-open): успех
+    замыкает цепь, ошибка снова размыкает её. Если исход пробы не записан
+    (запрос отменён или завершился исключением), вызывающий обязан снять
+    отметку через release_probe, иначе цепь навсегда останется half-open.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def check(self) -> bool:
+        """Проверка перед запросом, возвращает True, если запрос - проба half-open
+
+        Raises:
+            CircuitOpenError: цепь разомкнута
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+        raise CircuitOpenError("HH.ru API временно недоступен")
+
+    def release_probe(self):
+        """Освобождение пробы half-open, исход которой не записан: следующий check пропустит новую"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "failures": self.failures, "trips": self.trips}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Значение заголовка Retry-After в секундах"""
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except ValueError:
+        return None
+
+
+def retry_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Пауза перед повтором: Retry-After или экспоненциальный backoff с полным джиттером"""
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, Config.HH_RETRY_BACKOFF * 2 ** attempt)
+
+
+# Общие на процесс экземпляры для всех обращений к api.hh.ru
+hh_limiter = AdaptiveTokenBucket(
+    rate=Config.HH_RATE_LIMIT,
+    burst=Config.HH_RATE_BURST,
+    min_rate=Config.HH_MIN_RATE
+)
+hh_breaker = CircuitBreaker(
+    failure_threshold=Config.HH_BREAKER_FAILURES,
+    reset_timeout=Config.HH_BREAKER_RESET
+)
@@ -0,0 +1,114 @@
+#supervisor.py
+
+import time
+import asyncio
+import logging
+import multiprocessing
+from typing import Optional
+from config import Config
+
+logger = logging.getLogger("supervisor")
+
+# Пауза перед перезапуском упавшего агента растёт до этого предела
+MAX_RESTART_DELAY = 30.0
+# Процесс, проработавший дольше, считается стабильным: пауза сбрасывается
+STABLE_UPTIME = 60.0
+
+
+def _agent_process(concurrency: int):
+    """Точка входа процесса агента: свой цикл событий и свой GIL"""
+    from agents.manager import run_agent
+    try:
+        asyncio.run(run_agent(concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+class AgentSupervisor:
+    """Пул процессов AgentWorker с перезапуском упавших
+
+    Каждый процесс регистрируется в AgentManager как отдельный агент, поэтому
+    задачи распределяются менеджером на наименее загруженный процесс.
+    """
+
+    def __init__(self, size: Optional[int] = None, concurrency: Optional[int] = None):
+        self.size = size or Config.AGENT_POOL_SIZE
+        self.concurrency = concurrency or Config.AGENT_CONCURRENCY
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: list[Optional[multiprocessing.Process]] = [None] * self.size
+        self.restarts = [0] * self.size
+        self.restart_at = [0.0] * self.size
+        self.started_at = [0.0] * self.size
+        self.running = False
+
+    def _start(self, slot: int):
+        process = self.context.Process(
+            target=_agent_process,
+            args=(self.concurrency,),
+            name=f"agent-{slot}",
+            daemon=True
+        )
+        process.start()
+        self.processes[slot] = process
+        self.started_at[slot] = time.monotonic()
+        logger.info(f"Запущен процесс агента {process.name} (pid {process.pid})")
+
+    def start(self):
+        """Запуск всех процессов пула"""
+        self.running = True
+        for slot in range(self.size):
+            self._start(slot)
+
+    def check(self):
+        """Перезапуск завершившихся процессов с нарастающей паузой"""
+        now = time.monotonic()
+        for slot, process in enumerate(self.processes):
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                logger.warning(f"Процесс {process.name} завершился с кодом {process.exitcode}")
+                process.close()
+                self.processes[slot] = None
+                if now - self.started_at[slot] > STABLE_UPTIME:
+                    self.restarts[slot] = 0
+                delay = min(MAX_RESTART_DELAY, 2 ** self.restarts[slot] * 0.5)
+                self.restarts[slot] += 1
+                self.restart_at[slot] = now + delay
+            if now >= self.restart_at[slot]:
+                self._start(slot)
+
+    def stop(self):
+        """Остановка всех процессов пула"""
+        self.running = False
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            if process is not None:
+                process.join(timeout=5)
+
+    def status(self) -> dict:
+        return {
+            "size": self.size,
+            "concurrency": self.concurrency,
+            "alive": sum(1 for process in self.processes if process is not None and process.is_alive()),
+            "restarts": sum(self.restarts)
+        }
+
+    async def run(self):
+        """Запуск пула и наблюдение за процессами до отмены"""
+        self.start()
+        try:
+            while self.running:
+                self.check()
+                await asyncio.sleep(1)
+        finally:
+            self.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(AgentSupervisor().run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,228 @@
+#vacancy_store.py
+
+import re
+import time
+import sqlite3
+import threading
+from typing import Iterable, List, Optional
+from config import Config
+
+# Регион "Россия": при поиске по нему вакансии не фильтруются по региону
+AREA_ALL = 113
+
+_TAGS = re.compile(r"<[^>]+>")
+_TOKENS = re.compile(r"\w+")
+# Длина префикса, по которому ищутся длинные слова (грубая замена стемминга для словоформ)
+PREFIX_LENGTH = 5
+
+
+def _text(value) -> Optional[str]:
+    """Текст без HTML-разметки"""
+    if not value:
+        return None
+    return " ".join(_TAGS.sub(" ", value).split())
+
+
+def match_query(query: str) -> Optional[str]:
+    """Поисковый запрос в синтаксисе FTS5: все слова запроса, длинные - по префиксу
+
+    Префикс фиксированной длины покрывает словоформы ("разработчик", "разработчика")
+    и берётся из префиксного индекса FTS5, а не перебором всех слов словаря.
+    """
+    tokens = _TOKENS.findall(query.lower())
+    if not tokens:
+        return None
+    return " ".join(
+        f'"{token[:PREFIX_LENGTH]}"*' if len(token) > PREFIX_LENGTH else f'"{token}"'
+        for token in tokens
+    )
+
+
+class VacancyStore:
+    """Локальное хранилище вакансий с полнотекстовым индексом (SQLite FTS5)
+
+    Пополняется всем, что загружают парсеры: карточками из выдачи поиска и полными
+    описаниями вакансий. Индексируются название, работодатель, описание и регион.
+    Карточка из выдачи не затирает уже загруженное полное описание.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS vacancies ("
+            "id TEXT PRIMARY KEY, title TEXT, employer TEXT, description TEXT, area TEXT, area_id TEXT, "
+            "requirement TEXT, salary_from INTEGER, salary_to INTEGER, currency TEXT, url TEXT, "
+            "published_at TEXT, detailed INTEGER NOT NULL DEFAULT 0, fetched_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS vacancies_area ON vacancies(area_id);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS vacancies_fts USING fts5("
+            "title, employer, description, area, content='vacancies', content_rowid='rowid', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='{PREFIX_LENGTH}');"
+            # Индекс FTS5 следует за таблицей вакансий через триггеры
+            "CREATE TRIGGER IF NOT EXISTS vacancies_ai AFTER INSERT ON vacancies BEGIN "
+            "INSERT INTO vacancies_fts(rowid, title, employer, description, area) "
+            "VALUES (new.rowid, new.title, new.employer, new.description, new.area); END;"
+            "CREATE TRIGGER IF NOT EXISTS vacancies_ad AFTER DELETE ON vacancies BEGIN "
+            "INSERT INTO vacancies_fts(vacancies_fts, rowid, title, employer, description, area) "
+            "VALUES ('delete', old.rowid, old.title, old.employer, old.description, old.area); END;"
+            "CREATE TRIGGER IF NOT EXISTS vacancies_au AFTER UPDATE ON vacancies BEGIN "
+            "INSERT INTO vacancies_fts(vacancies_fts, rowid, title, employer, description, area) "
+            "VALUES ('delete', old.rowid, old.title, old.employer, old.description, old.area); "
+            "INSERT INTO vacancies_fts(rowid, title, employer, description, area) "
+            "VALUES (new.rowid, new.title, new.employer, new.description, new.area); END;"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _row(vacancy: dict, fetched_at: float) -> tuple:
+        """Строка таблицы из вакансии HH.ru (карточки выдачи или полного описания)"""
+        salary = vacancy.get("salary") or {}
+        area = vacancy.get("area") or {}
+        snippet = vacancy.get("snippet") or {}
+        detailed = "description" in vacancy
+        if detailed:
+            description = _text(vacancy.get("description"))
+        else:
+            description = _text(" ".join(filter(None, (snippet.get("requirement"), snippet.get("responsibility")))))
+        return (
+            str(vacancy["id"]),
+            vacancy.get("name"),
+            (vacancy.get("employer") or {}).get("name"),
+            description,
+            area.get("name"),
+            str(area["id"]) if area.get("id") is not None else None,
+            snippet.get("requirement"),
+            salary.get("from"),
+            salary.get("to"),
+            salary.get("currency"),
+            vacancy.get("alternate_url"),
+            vacancy.get("published_at"),
+            int(detailed),
+            fetched_at
+        )
+
+    def upsert(self, vacancies: Iterable[dict]) -> int:
+        """Добавление или обновление вакансий, возвращает число записанных"""
+        now = time.time()
+        rows = [self._row(vacancy, now) for vacancy in vacancies if vacancy.get("id") is not None]
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO vacancies VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET "
+                "title = excluded.title, employer = excluded.employer, area = excluded.area, "
+                "area_id = excluded.area_id, salary_from = excluded.salary_from, "
+                "salary_to = excluded.salary_to, currency = excluded.currency, url = excluded.url, "
+                "published_at = excluded.published_at, fetched_at = excluded.fetched_at, "
+                "requirement = COALESCE(excluded.requirement, requirement), "
+                "description = CASE WHEN excluded.detailed OR NOT detailed "
+                "THEN excluded.description ELSE description END, "
+                "detailed = MAX(detailed, excluded.detailed)",
+                rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def search(self, query: str, area: Optional[int] = None, limit: int = 20,
+               max_age: Optional[float] = None) -> List[dict]:
+        """Полнотекстовый поиск, последние добавленные записи первыми
+
+        Args:
+            query: Поисковый запрос
+            area: ID региона HH.ru (113 или None - без фильтра)
+            limit: Максимальное число вакансий
+            max_age: Учитывать только записи, загруженные не раньше max_age секунд назад
+
+        Returns:
+            Вакансии в формате карточек выдачи HH.ru
+        """
+        match = match_query(query)
+        if match is None:
+            return []
+        sql = (
+            "SELECT v.id, v.title, v.employer, v.area, v.area_id, v.requirement, v.salary_from, "
+            "v.salary_to, v.currency, v.url, v.published_at "
+            "FROM vacancies_fts JOIN vacancies v ON v.rowid = vacancies_fts.rowid "
+            "WHERE vacancies_fts MATCH ?"
+        )
+        args: list = [match]
+        if area is not None and int(area) != AREA_ALL:
+            sql += " AND v.area_id = ?"
+            args.append(str(area))
+        if max_age is not None:
+            sql += " AND v.fetched_at >= ?"
+            args.append(time.time() - max_age)
+        # Порядок по rowid FTS5 отдаёт без сортировки всех совпадений
+        sql += " ORDER BY vacancies_fts.rowid DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [
+            {
+                "id": vacancy_id,
+                "name": title,
+                "employer": {"name": employer},
+                "area": {"id": area_id, "name": area_name},
+                "snippet": {"requirement": requirement},
+                "salary": (
+                    {"from": salary_from, "to": salary_to, "currency": currency}
+                    if currency or salary_from is not None or salary_to is not None else None
+                ),
+                "alternate_url": url,
+                "published_at": published_at
+            }
+            for (vacancy_id, title, employer, area_name, area_id, requirement,
+                 salary_from, salary_to, currency, url, published_at) in rows
+        ]
+
+    def lookup(self, query: str, area: Optional[int], limit: int, max_age: float) -> Optional[List[dict]]:
+        """Свежие вакансии из хранилища, None если их меньше limit (промах)"""
+        items = self.search(query, area, limit, max_age)
+        if len(items) < limit:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM vacancies").fetchone()[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "path": self.path,
+            "vacancies": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store: Optional[VacancyStore] = None
+_store_lock = threading.Lock()
+_disabled_warned = False
+
+
+def get_vacancy_store() -> Optional[VacancyStore]:
+    """Общее на процесс хранилище по Config.VACANCY_STORE_PATH (None, если отключено)"""
+    global _store, _disabled_warned
+    if not Config.VACANCY_STORE_PATH:
+        if Config.SEARCH_MODE != "live" and not _disabled_warned:
+            _disabled_warned = True
+            print(f"SEARCH_MODE={Config.SEARCH_MODE}, но VACANCY_STORE_PATH не задан: поиск идёт только в HH.ru")
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = VacancyStore(Config.VACANCY_STORE_PATH)
+        return _store
@@ -1,22 +1,103 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import ValidationError
 from agents.manager import AgentManager
-from models.schemas import VacancyRequest, VacancyResponse, AgentRegister
+from models.schemas import VacancyRequest, VacancyResponse, AgentRegister, TaskResult
+from config import Config
+from codec import dumps, loads
+from metrics import REGISTRY, get_trace, slowest_traces, timed
 import uvicorn
 
-app = FastAPI()
+
+class CodecJSONResponse(JSONResponse):
+    """Ответ, сериализуемый общим JSON-кодеком (orjson при наличии)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
 manager = AgentManager()
 
+# Состояние очереди и счётчики менеджера снимаются при экспорте метрик
+REGISTRY.gauge("queue_depth", "Задач в очереди", lambda: len(manager.pending))
+REGISTRY.gauge("waiting_agents", "Агентов в ожидании задачи",
+               lambda: sum(1 for _, waiter in manager.waiters if not waiter.done()))
+REGISTRY.gauge("tasks_in_flight", "Задач, выданных агентам", lambda: sum(len(agent.tasks) for agent in manager.agents.values()))
+REGISTRY.gauge("agents", "Зарегистрированных агентов", lambda: len(manager.agents))
+for _name in manager.counters:
+    REGISTRY.gauge(f"tasks_{_name}_total", f"Задач: {_name}", lambda name=_name: manager.counters[name], kind="counter")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await manager.start()
+    try:
+        yield
+    finally:
+        await manager.stop()
+
+app = FastAPI(lifespan=lifespan, default_response_class=CodecJSONResponse)
+
 @app.post("/register_agent", response_model=dict)
 async def register_agent(agent: AgentRegister):
     return await manager.register_agent(agent.agent_id)
 
+@app.post("/heartbeat", response_model=dict)
+async def heartbeat(agent: AgentRegister):
+    return await manager.heartbeat(agent.agent_id)
+
+@app.post("/get_task")
+async def get_task(agent: AgentRegister, timeout: float = Config.TASK_POLL_TIMEOUT):
+    task = await manager.get_task(agent.agent_id, min(timeout, Config.TASK_POLL_TIMEOUT))
+    if task is None:
+        return Response(status_code=204)
+    return task
+
+@app.post("/submit_result", response_model=dict, openapi_extra={
+    "requestBody": {"required": True, "content": {"application/json": {"schema": TaskResult.model_json_schema()}}}
+})
+async def submit_result(request: Request):
+    # Тело с вакансиями разбирается кодеком прямо из байтов, схема проверяется pydantic
+    body = await request.body()
+    try:
+        with timed("validation"):
+            result = TaskResult.model_validate(loads(body))
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    return await manager.submit_result(result.request_id, result.vacancies, result.spans)
+
 @app.post("/search", response_model=VacancyResponse)
-async def search_vacancies(request: VacancyRequest):
-    return await manager.handle_request(request)
+async def search_vacancies(request: VacancyRequest, x_request_id: Optional[str] = Header(None)):
+    try:
+        return await manager.handle_request(request, x_request_id)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Search deadline exceeded")
 
 @app.get("/status")
 async def get_status():
     return await manager.get_status()
 
+@app.get("/metrics")
+async def metrics():
+    """Метрики процесса в текстовом формате Prometheus"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/traces")
+async def traces(limit: int = 10):
+    """Самые долгие из последних запросов с разбивкой по этапам"""
+    return slowest_traces(limit)
+
+@app.get("/traces/{request_id}")
+async def request_trace(request_id: str):
+    found = get_trace(request_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return found
+
 def run_server():
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=Config.API_PORT)
@@ -0,0 +1,97 @@
+#bench_agent_cache.py
+# Кэширование в ReAct-агенте agentMCP: ответы LLM на диске и результаты headhunter_job_search
+# в памяти. Вместо GigaChat - локальная заглушка модели с сетевой задержкой, вместо HH.ru -
+# benchmarks/stub_hh.py; считаются вызовы модели и запросы к HH.ru на каждый вопрос.
+# Запуск: python benchmarks/bench_agent_cache.py [задержка LLM, с]
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+# Загруженные вакансии не должны попадать в локальное хранилище рабочего каталога
+os.environ["VACANCY_STORE_PATH"] = ""
+
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from config import Config
+from agentHHsearch import tool_cache
+from agentMCP import ask, create_agent
+from benchmarks.stub_hh import start_stub
+
+QUESTIONS = [
+    ("первый вопрос", "Найди вакансии Python разработчик в Москве"),
+    ("повтор", "Найди вакансии Python разработчик в Москве"),
+    ("пробелы", "  Найди вакансии   Python разработчик\nв Москве "),
+    ("регистр", "Найди вакансии PYTHON РАЗРАБОТЧИК в Москве"),
+]
+
+
+class FakeGigaChat(BaseChatModel):
+    """Локальная заглушка модели с вызовом инструмента
+
+    На вопрос пользователя отвечает вызовом headhunter_job_search (запрос - текст
+    после «вакансии», без «в Москве»), на ответ инструмента - его пересказом.
+    Каждый вызов ждёт latency секунд, как запрос к GigaChat.
+    """
+    latency: float = 0.5
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gigachat"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        self.calls += 1
+        last = messages[-1]
+        if isinstance(last, ToolMessage):
+            message = AIMessage(content=f"По данным HH.ru: {last.content.splitlines()[0]}")
+        else:
+            query = last.content.split("вакансии", 1)[-1].replace("в Москве", "")
+            message = AIMessage(content="", tool_calls=[{
+                "name": "headhunter_job_search",
+                "args": {"query": query.strip(), "area_id": 1},
+                "id": f"call_{abs(hash(query)) % 10 ** 8}"
+            }])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+async def main():
+    logging.getLogger("aiohttp.access").setLevel(logging.ERROR)
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    runner, base_url = await start_stub(latency=0.05)
+    state = runner.app["state"]
+    Config.HH_API_URL = f"{base_url}/vacancies"
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            Config.LLM_CACHE_PATH = os.path.join(workdir, "llm_cache.sqlite3")
+            llm = FakeGigaChat(latency=latency)
+            agent = create_agent(llm=llm)
+            print(f"Задержка LLM {latency} с, HH.ru - локальная заглушка")
+            print(f"{'вопрос':<16}{'время, с':>10}{'вызовов LLM':>13}{'запросов HH':>13}")
+            for name, question in QUESTIONS:
+                calls, requests = llm.calls, state["requests"]
+                started = time.perf_counter()
+                answer = await asyncio.to_thread(ask, agent, question)
+                elapsed = time.perf_counter() - started
+                print(f"{name:<16}{elapsed:>10.2f}{llm.calls - calls:>13}{state['requests'] - requests:>13}"
+                      f"  {answer[:60]}")
+            print(f"  кэш инструмента: {tool_cache.stats()}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
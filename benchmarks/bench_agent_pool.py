@@ -0,0 +1,104 @@
+#bench_agent_pool.py
+# Нагрузочный тест пула процессов агентов: пропускная способность /search от числа процессов
+# Запуск: python benchmarks/bench_agent_pool.py [запросов] [процессы...]
+
+import os
+import sys
+import time
+import asyncio
+import subprocess
+import aiohttp
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+STUB_PORT = 18901
+API_PORT = 18902
+CONCURRENCY = 64
+
+# Крупные страницы, чтобы разбор JSON и валидация нагружали процессор агентов
+ENV = dict(
+    os.environ,
+    HH_API_URL=f"http://127.0.0.1:{STUB_PORT}/vacancies",
+    API_HOST="127.0.0.1",
+    API_PORT=str(API_PORT),
+    MAX_VACANCIES="100",
+    HH_CACHE_TTL="0",
+    AGENT_CONCURRENCY="8",
+    PYTHONPATH=project_root
+)
+
+STUB_CODE = f"""
+from aiohttp import web
+from benchmarks.stub_hh import create_app
+web.run_app(create_app(), host="127.0.0.1", port={STUB_PORT}, print=None)
+"""
+
+API_CODE = f"""
+import uvicorn
+from api.main import app
+uvicorn.run(app, host="127.0.0.1", port={API_PORT}, log_level="warning")
+"""
+
+POOL_CODE = """
+import sys, asyncio
+from agents.supervisor import AgentSupervisor
+asyncio.run(AgentSupervisor(size=int(sys.argv[1])).run())
+"""
+
+
+async def wait_agents(session: aiohttp.ClientSession, count: int):
+    while True:
+        try:
+            async with session.get(f"http://127.0.0.1:{API_PORT}/status") as response:
+                if (await response.json())["agents"] >= count:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+
+
+async def load(requests_total: int, processes: int) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    async with aiohttp.ClientSession() as session:
+        await wait_agents(session, processes)
+
+        async def one(index: int):
+            async with semaphore:
+                async with session.post(
+                    f"http://127.0.0.1:{API_PORT}/search",
+                    json={"query": f"python {index}", "user_id": 1}
+                ) as response:
+                    await response.read()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests_total)))
+        return requests_total / (time.perf_counter() - started)
+
+
+def main():
+    requests_total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    sizes = [int(arg) for arg in sys.argv[2:]] or [1, 2, 4]
+    quiet = dict(env=ENV, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    stub = subprocess.Popen([sys.executable, "-c", STUB_CODE], **quiet)
+    baseline = None
+    try:
+        for size in sizes:
+            api = subprocess.Popen([sys.executable, "-c", API_CODE], **quiet)
+            pool = subprocess.Popen([sys.executable, "-c", POOL_CODE, str(size)], **quiet)
+            try:
+                rate = asyncio.run(load(requests_total, size))
+            finally:
+                pool.terminate()
+                api.terminate()
+                pool.wait()
+                api.wait()
+            baseline = baseline or rate / size
+            print(f"процессов {size:2}: {rate:8.1f} запросов/с  (масштабирование {rate / baseline / size:.2f})")
+    finally:
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
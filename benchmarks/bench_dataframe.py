@@ -0,0 +1,80 @@
+#bench_dataframe.py
+# Построение DataFrame вакансий: построчный df.loc против столбцового буфера
+# Запуск: python benchmarks/bench_dataframe.py [--full]
+# Без --full старый путь для 100k пропускается: он квадратичный и идёт десятки минут
+
+import os
+import sys
+import time
+import datetime
+import tracemalloc
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from agentparser import vacancies_to_dataframe
+from benchmarks.stub_hh import make_vacancy
+
+SIZES = [1_000, 10_000, 100_000]
+LEGACY_LIMIT = 10_000
+
+
+LEGACY_COLUMNS = ['id', 'premium', 'name', 'area', 'from', 'to', 'currency', 'experience',
+                  'schedule', 'employment', 'description', 'employer', 'published_at',
+                  'alternate_url', 'has_test']
+LEGACY_NESTED = {'area': ('area', 'name'), 'from': ('salary', 'from'), 'to': ('salary', 'to'),
+                 'currency': ('salary', 'currency'), 'experience': ('experience', 'name'),
+                 'schedule': ('schedule', 'name'), 'employment': ('employment', 'name'),
+                 'employer': ('employer', 'name')}
+
+
+def legacy_fill_row(vacancy):
+    """Прежний fill_row: разбор каждой строки и даты по отдельности"""
+    row = {}
+    for col in LEGACY_COLUMNS:
+        if col in LEGACY_NESTED:
+            outer, inner = LEGACY_NESTED[col]
+            row[col] = vacancy.get(outer, {}).get(inner)
+        elif col == 'published_at':
+            published_at = datetime.datetime.fromisoformat(vacancy['published_at'].replace('Z', '+00:00'))
+            row[col] = published_at.strftime('%Y-%m-%d %H:%M:%S')
+        else:
+            row[col] = vacancy.get(col)
+    return row
+
+
+def legacy_dataframe(vacancies):
+    """Прежний путь: добавление строк через df.loc"""
+    df = pd.DataFrame(columns=LEGACY_COLUMNS)
+    for leng, vacancy in enumerate(vacancies):
+        df.loc[leng] = legacy_fill_row(vacancy)
+    df.rename(columns={'area':'city', 'from':'salary_from', 'to':'salary_to', 'alternate_url':'link'}, inplace=True)
+    return df
+
+
+def measure(build, vacancies):
+    tracemalloc.start()
+    started = time.perf_counter()
+    df = build(vacancies)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = df.memory_usage(deep=True).sum()
+    return f"{elapsed:8.2f} с  пик {peak / 2**20:8.1f} МБ  кадр {size / 2**20:8.1f} МБ"
+
+
+def main():
+    full = "--full" in sys.argv
+    for size in SIZES:
+        vacancies = [make_vacancy(i) for i in range(size)]
+        print(f"{size} вакансий")
+        print("  столбцовый буфер:", measure(vacancies_to_dataframe, vacancies))
+        if full or size <= LEGACY_LIMIT:
+            print("  df.loc:          ", measure(legacy_dataframe, vacancies))
+        else:
+            print("  df.loc:           пропущено (--full для запуска)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#bench_delivery.py
+# Доставка результатов поиска в Telegram на локальной заглушке Bot API:
+# по сообщению на вакансию (как раньше) против очереди доставки с лимитами и склейкой
+# Запуск: python benchmarks/bench_delivery.py [чатов] [вакансий на чат]
+
+import os
+import sys
+import time
+import asyncio
+import logging
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+from bot.delivery import DeliveryQueue
+from bot.telegram_bot import format_vacancy
+from benchmarks.stub_telegram import start_stub
+
+TOKEN = "123456:TEST-token"
+
+
+def make_cards(chat: int, count: int) -> list:
+    return [format_vacancy({
+        "title": f"Python разработчик {chat}-{i}",
+        "company": "ТехноЛогика",
+        "salary": "150 000 - 200 000 руб.",
+        "url": f"https://hh.ru/vacancy/{chat * 1000 + i}",
+        "description": "Разработка backend на Python, асинхронные сервисы, PostgreSQL, Docker. " * 3
+    }) for i in range(count)]
+
+
+async def naive(bot: Bot, chat_id: int, cards: list):
+    """Как search_handler до очереди: по вызову на вакансию, на 429 ждём retry_after"""
+    for card in cards:
+        while True:
+            try:
+                await bot.send_message(chat_id, card, parse_mode="HTML")
+                break
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+
+
+async def queued(delivery: DeliveryQueue, chat_id: int, cards: list):
+    await delivery.send_many(chat_id, cards, parse_mode="HTML")
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run(name: str, chats: int, per_chat: int, make_send):
+    runner, base_url = await start_stub()
+    state = runner.app["state"]
+    bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(base_url)))
+    send = make_send(bot)
+    latencies = []
+
+    async def deliver(chat_id: int):
+        started = time.perf_counter()
+        await send(chat_id, make_cards(chat_id, per_chat))
+        latencies.append(time.perf_counter() - started)
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(deliver(chat_id) for chat_id in range(1, chats + 1)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await bot.session.close()
+        await runner.cleanup()
+    delivered = sum(text.count("<b>") for _, _, text in state["messages"])
+    print(f"{name:<8}{delivered:>10}{len(state['messages']):>10}{state['throttled']:>8}{elapsed:>9.2f}"
+          f"{delivered / elapsed:>11.1f}{percentile(latencies, 0.5):>9.2f}{percentile(latencies, 0.99):>9.2f}")
+
+
+async def main():
+    # Журнал запросов заглушки и предупреждения о 429 не нужны в выводе
+    logging.getLogger("aiohttp.access").setLevel(logging.ERROR)
+    logging.getLogger("bot.delivery").setLevel(logging.ERROR)
+    chats = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    per_chat = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"{chats} чатов по {per_chat} вакансий, лимиты заглушки: 1 сообщение/с на чат, 30/с на бота")
+    print(f"{'режим':<8}{'вакансий':>10}{'вызовов':>10}{'429':>8}{'время, с':>9}{'вакансий/с':>11}"
+          f"{'p50, с':>9}{'p99, с':>9}")
+    await run("naive", chats, per_chat, lambda bot: lambda chat_id, cards: naive(bot, chat_id, cards))
+
+    def make_queue(bot):
+        delivery = DeliveryQueue(bot)
+        return lambda chat_id, cards: queued(delivery, chat_id, cards)
+
+    await run("queue", chats, per_chat, make_queue)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+#bench_http_pool.py
+# Сравнение задержки HHParser: новая сессия на каждый запрос против общего пула
+# Запуск: python benchmarks/bench_http_pool.py
+
+import os
+import sys
+import time
+import asyncio
+import statistics
+import aiohttp
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from config import Config
+from agents.hh_parser import HHParser
+from agents.http_pool import close_session
+from benchmarks.stub_hh import start_stub
+
+REQUESTS = 500
+CONCURRENCY = 20
+
+
+def percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"p50={p50 * 1000:.2f} мс  p99={p99 * 1000:.2f} мс"
+
+
+async def run(fetch) -> list[float]:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await fetch()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(REQUESTS)))
+    return latencies
+
+
+async def main():
+    runner, base_url = await start_stub()
+    Config.HH_API_URL = f"{base_url}/vacancies"
+    try:
+        parser = HHParser()
+
+        async def fresh_session():
+            # Старое поведение: сессия и соединение создаются заново на каждый запрос
+            async with aiohttp.ClientSession() as session:
+                raw = await parser._fetch_hh_api(session, {"text": "python", "per_page": 5})
+                parser._process_vacancies(raw)
+
+        async def pooled():
+            await parser.fetch_vacancies("python")
+
+        print("Новая сессия:", percentiles(await run(fresh_session)))
+        print("Общий пул:   ", percentiles(await run(pooled)))
+    finally:
+        await close_session()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+#bench_json.py
+# Разбор и сериализация JSON ответов HH.ru: стандартный json против orjson
+# Запуск: python benchmarks/bench_json.py [каталог с записанными ответами *.json]
+# Запись ответов HH.ru: python benchmarks/bench_json.py --record каталог "запрос"
+# Без каталога используются ответы, собранные заглушкой benchmarks/stub_hh.py
+
+import os
+import sys
+import json
+import time
+import glob
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from config import Config
+from benchmarks.stub_hh import make_vacancy
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+REPEATS = 200
+
+
+def record(directory: str, query: str):
+    """Сохранение сырых ответов HH.ru: страница поиска и описания её вакансий"""
+    import requests
+    os.makedirs(directory, exist_ok=True)
+    headers = {"User-Agent": Config.HH_USER_AGENT}
+    response = requests.get(Config.HH_API_URL, params={"text": query, "per_page": 100}, headers=headers,
+                            timeout=Config.REQUEST_TIMEOUT)
+    response.raise_for_status()
+    with open(os.path.join(directory, "search.json"), "wb") as f:
+        f.write(response.content)
+    for item in response.json()["items"][:20]:
+        detail = requests.get(f"{Config.HH_API_URL.rstrip('/')}/{item['id']}", headers=headers,
+                              timeout=Config.REQUEST_TIMEOUT)
+        if detail.ok:
+            with open(os.path.join(directory, f"vacancy_{item['id']}.json"), "wb") as f:
+                f.write(detail.content)
+
+
+def load_payloads(directory) -> dict:
+    """Имя -> сырые байты ответа"""
+    if directory:
+        payloads = {}
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            with open(path, "rb") as f:
+                payloads[os.path.basename(path)] = f.read()
+        return payloads
+    items = [make_vacancy(i) for i in range(100)]
+    return {
+        "search (100)": json.dumps({"items": items, "found": 100, "page": 0, "pages": 1},
+                                   ensure_ascii=False).encode("utf-8"),
+        "vacancy": json.dumps(make_vacancy(1), ensure_ascii=False).encode("utf-8"),
+    }
+
+
+def best(func, payload) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        func(payload)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1e6
+
+
+def main():
+    if len(sys.argv) > 3 and sys.argv[1] == "--record":
+        record(sys.argv[2], sys.argv[3])
+        return
+    payloads = load_payloads(sys.argv[1] if len(sys.argv) > 1 else None)
+    decoders = {
+        # Так разбирал ответ aiohttp response.json(): байты -> str -> json.loads
+        "json str": lambda data: json.loads(data.decode("utf-8")),
+        "json bytes": json.loads,
+    }
+    encoders = {"json": lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")}
+    if orjson is not None:
+        decoders["orjson bytes"] = orjson.loads
+        encoders["orjson"] = orjson.dumps
+    else:
+        print("orjson не установлен, сравнивается только стандартный json")
+
+    print(f"{'ответ':<28}{'КБ':>8}" + "".join(f"{name + ', мкс':>18}" for name in list(decoders) + list(encoders)))
+    for name, data in payloads.items():
+        obj = json.loads(data)
+        row = [best(decoder, data) for decoder in decoders.values()]
+        row += [best(encoder, obj) for encoder in encoders.values()]
+        print(f"{name[:27]:<28}{len(data) / 1024:>8.1f}" + "".join(f"{value:>18.1f}" for value in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#bench_mcp_client.py
+# Задержка обращения бота к MCP-серверу: новая сессия fastmcp.Client на каждую
+# команду против постоянных сессий MCPClientPool
+# Запуск: python benchmarks/bench_mcp_client.py [обращений] [одновременно]
+
+import os
+import sys
+import time
+import asyncio
+import subprocess
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from fastmcp import Client
+from bot.mcp_client import MCPClientPool
+
+MCP_PORT = 18961
+MCP_URL = f"http://127.0.0.1:{MCP_PORT}/mcp"
+
+
+async def per_command():
+    async with Client(MCP_URL) as client:
+        await client.read_resource("status://system")
+
+
+async def measure(name: str, call, count: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(count)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"{name:<14}{count / elapsed:>12.1f}{latencies[len(latencies) // 2] * 1000:>10.1f}"
+          f"{latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000:>10.1f}")
+
+
+async def wait_server():
+    while True:
+        try:
+            await per_command()
+            return
+        except Exception:
+            await asyncio.sleep(0.2)
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    env = dict(os.environ, MCP_TRANSPORT="http", MCP_HOST="127.0.0.1", MCP_PORT=str(MCP_PORT),
+               VACANCY_STORE_PATH="", PYTHONPATH=project_root)
+    server = subprocess.Popen([sys.executable, "master/mcp_server.py"], cwd=project_root, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    pool = MCPClientPool(MCP_URL)
+    try:
+        await wait_server()
+        print(f"{count} чтений status://system, {concurrency} одновременно")
+        print(f"{'клиент':<14}{'вызовов/с':>12}{'p50, мс':>10}{'p99, мс':>10}")
+        await measure("per-command", per_command, count, concurrency)
+        await measure("pool", lambda: pool.read_resource("status://system"), count, concurrency)
+        print(f"  пул: {pool.stats()}")
+    finally:
+        await pool.close()
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
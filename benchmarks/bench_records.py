@@ -0,0 +1,89 @@
+#bench_records.py
+# Горячий путь разбор -> хранение -> сериализация: pydantic VacancyBase против VacancyRecord
+# Запуск: python benchmarks/bench_records.py [число вакансий]
+
+import os
+import sys
+import time
+import warnings
+import tracemalloc
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+# Локальное хранилище вакансий бенчмарку не нужно
+os.environ["VACANCY_STORE_PATH"] = ""
+
+from agents.hh_parser import HHParser
+from models.records import SearchResult
+from models.schemas import VacancyBase, VacancyResponse
+from benchmarks.stub_hh import make_vacancy
+
+REPEATS = 5
+# Прежний путь вызывает .json()/.parse_raw(), устаревшие в pydantic 2
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+parser = HHParser()
+
+
+def legacy_process(raw_vacancies: list) -> list:
+    """Прежний _process_vacancies: валидация pydantic для каждой вакансии"""
+    processed = []
+    for item in raw_vacancies:
+        salary = item.get("salary")
+        salary_str = f"{salary['from']}-{salary['to']} {salary['currency']}" if salary else "Не указана"
+        processed.append(VacancyBase(
+            title=item.get("name", "Нет названия"),
+            company=item.get("employer", {}).get("name", "Неизвестно"),
+            salary=salary_str,
+            url=item.get("alternate_url", "#"),
+            description=(item.get("snippet", {}).get("requirement", "Описание отсутствует")[:100] + "...")
+        ))
+    return processed
+
+
+def legacy_path(raw_vacancies: list) -> str:
+    vacancies = legacy_process(raw_vacancies)
+    response = VacancyResponse(vacancies=vacancies, user_id=1, request_id="bench")
+    payload = response.json()
+    VacancyResponse.parse_raw(payload).dict()
+    return payload
+
+
+def record_path(raw_vacancies: list) -> str:
+    vacancies = parser._process_vacancies(raw_vacancies)
+    result = SearchResult("bench", 1, vacancies)
+    payload = result.to_json()
+    SearchResult.from_json(payload).to_dict()
+    return payload
+
+
+def measure(name: str, path, raw_vacancies: list):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        path(raw_vacancies)
+        timings.append(time.perf_counter() - started)
+
+    # Память: объём самих вакансий после разбора и пик на всём пути
+    process = legacy_process if path is legacy_path else parser._process_vacancies
+    tracemalloc.start()
+    vacancies = process(raw_vacancies)
+    retained = tracemalloc.get_traced_memory()[0]
+    del vacancies
+    tracemalloc.reset_peak()
+    path(raw_vacancies)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:<14}{min(timings) * 1000:>10.1f}{retained / 2**20:>14.2f}{peak / 2**20:>12.2f}")
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    raw_vacancies = [make_vacancy(i) for i in range(size)]
+    print(f"{size} вакансий: разбор, сохранение в JSON, чтение и выдача словарями")
+    print(f"{'модель':<14}{'время, мс':>10}{'записи, МБ':>14}{'пик, МБ':>12}")
+    measure("VacancyBase", legacy_path, raw_vacancies)
+    measure("VacancyRecord", record_path, raw_vacancies)
+
+
+if __name__ == "__main__":
+    main()
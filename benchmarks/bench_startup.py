@@ -0,0 +1,95 @@
+#bench_startup.py
+# Холодный старт точек входа: время импорта по python -X importtime против бюджета.
+# Каждый модуль импортируется в отдельном процессе в пустом рабочем каталоге, чтобы
+# заодно убедиться, что импорт не создаёт файлов (SQLite-хранилище, кэши) и не
+# обращается к сети. Код возврата 1, если хоть одна точка входа вышла за бюджет.
+# Запуск: python benchmarks/bench_startup.py [повторов] [модуль...]
+
+import os
+import sys
+import tempfile
+import subprocess
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+
+# Бюджет времени импорта, мс (с запасом на медленную машину CI). Основную часть
+# съедают fastmcp у сервера и aiogram.types у бота - их не отложить, они нужны сразу.
+BUDGETS_MS = {
+    "master.mcp_server": 3000,
+    "api.main": 2000,
+    "agents.manager": 800,
+    "agents.supervisor": 300,
+    "bot.telegram_bot": 6000,
+    "bot.webhook": 7000,
+    "agentHHsearch": 1500,
+    "agentMCP": 300,
+    "helloMCP": 300,
+}
+TOP_IMPORTS = 5
+
+
+def import_profile(module: str, workdir: str) -> tuple:
+    """Импорт модуля в новом процессе: (код возврата, stderr, {модуль: накопленное время, мкс})"""
+    env = dict(os.environ, PYTHONPATH=project_root, PYTHONDONTWRITEBYTECODE="1")
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                             cwd=workdir, env=env, capture_output=True, text=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return process.returncode, process.stderr, times
+
+
+def direct_imports(times: dict, module: str) -> list:
+    """Самые тяжёлые импорты верхнего уровня (без вложенных), кроме самого модуля"""
+    top = {}
+    for name, cumulative in times.items():
+        root = name.split(".")[0]
+        if name != module and root != module.split(".")[0]:
+            top[root] = max(top.get(root, 0), cumulative)
+    return sorted(top.items(), key=lambda item: item[1], reverse=True)[:TOP_IMPORTS]
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    modules = sys.argv[2:] or list(BUDGETS_MS)
+    print(f"{'модуль':<20}{'импорт, мс':>12}{'бюджет, мс':>12}  самые тяжёлые импорты, мс")
+    failed = []
+    for module in modules:
+        budget = BUDGETS_MS.get(module)
+        with tempfile.TemporaryDirectory() as workdir:
+            samples = []
+            for _ in range(repeat):
+                code, stderr, times = import_profile(module, workdir)
+                if code != 0:
+                    break
+                samples.append((times[module], times))
+            created = os.listdir(workdir)
+        if code != 0:
+            missing = "ModuleNotFoundError" in stderr
+            reason = stderr.strip().splitlines()[-1] if stderr.strip() else f"код {code}"
+            print(f"{module:<20}{'-':>12}{budget or '-':>12}  "
+                  f"{'не установлена зависимость: ' if missing else 'ошибка импорта: '}{reason}")
+            if not missing:
+                failed.append(module)
+            continue
+        # Берём лучший из повторов: он меньше всего зависит от дискового кэша и соседей
+        elapsed, times = min(samples, key=lambda sample: sample[0])
+        heavy = ", ".join(f"{name} {cumulative / 1000:.0f}" for name, cumulative in direct_imports(times, module))
+        over = budget is not None and elapsed / 1000 > budget
+        print(f"{module:<20}{elapsed / 1000:>12.0f}{budget or '-':>12}  {heavy}{'  ПРЕВЫШЕН' if over else ''}")
+        if over:
+            failed.append(module)
+        if created:
+            print(f"  импорт создал файлы: {', '.join(sorted(created))}")
+            failed.append(module)
+    if failed:
+        print(f"Не уложились: {', '.join(dict.fromkeys(failed))}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#bench_storage.py
+# Чтение столбца salary_to для статистики: CSV против Parquet и Feather
+# Запуск: python benchmarks/bench_storage.py [число вакансий]
+# Запись и каждое чтение выполняются в отдельных процессах, чтобы честно измерить пиковый RSS
+
+import os
+import sys
+import time
+import resource
+import tempfile
+import subprocess
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from agentparser import vacancies_to_dataframe, save_vacancies, read_vacancies
+from benchmarks.stub_hh import make_vacancy
+
+FORMATS = ["csv", "parquet", "feather"]
+
+
+def read_once(file_path: str):
+    """Дочерний процесс: чтение одного столбца и расчёт среднего"""
+    started = time.perf_counter()
+    df = read_vacancies(file_path, columns=["salary_to"])
+    mean = df["salary_to"].mean()
+    elapsed = time.perf_counter() - started
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.3f} {rss:.1f} {mean:.0f}")
+
+
+def write_all(directory: str, size: int):
+    """Дочерний процесс: синтетический набор во всех форматах"""
+    df = vacancies_to_dataframe(make_vacancy(i) for i in range(size))
+    for fmt in FORMATS:
+        save_vacancies(df, os.path.join(directory, f"vacancies.{fmt}"))
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as tmp:
+        subprocess.run([sys.executable, __file__, "--write", tmp, str(size)], check=True)
+        for fmt in FORMATS:
+            file_path = os.path.join(tmp, f"vacancies.{fmt}")
+            output = subprocess.run(
+                [sys.executable, __file__, "--read", file_path],
+                capture_output=True, text=True, check=True
+            ).stdout.split()
+            elapsed, rss = float(output[0]), float(output[1])
+            file_size = os.path.getsize(file_path) / 2**20
+            print(f"{fmt:8} файл {file_size:8.1f} МБ  чтение {elapsed:6.3f} с  пиковый RSS {rss:8.1f} МБ")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--read":
+        read_once(sys.argv[2])
+    elif len(sys.argv) > 3 and sys.argv[1] == "--write":
+        write_all(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,52 @@
+#bench_throttling.py
+# Поведение HHParser при троттлинге и отказе HH.ru на локальной заглушке
+# Запуск: python benchmarks/bench_throttling.py
+
+import os
+import sys
+import time
+import asyncio
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from config import Config
+from agents.hh_parser import HHParser
+from agents.http_pool import close_session
+from agents.resilience import hh_breaker, hh_limiter
+from benchmarks.stub_hh import start_stub
+
+QUERIES = 200
+
+
+async def main():
+    # Заглушка пропускает 50 запросов в секунду, клиент настроен на вдвое большую скорость
+    runner, base_url = await start_stub(rate_limit=50, retry_after=0.5)
+    state = runner.app["state"]
+    Config.HH_API_URL = f"{base_url}/vacancies"
+    hh_limiter.max_rate = hh_limiter.rate = 100
+    parser = HHParser()
+    parser.cache.ttl = 1
+    try:
+        started = time.perf_counter()
+        found = await asyncio.gather(*(parser.fetch_vacancies(f"python {i}") for i in range(QUERIES)))
+        empty = sum(1 for vacancies in found if not vacancies)
+        print(f"Троттлинг: {QUERIES} запросов за {time.perf_counter() - started:.2f} с, пустых ответов {empty}")
+        print(f"  заглушка: {state['requests']} запросов, 429: {state['throttled']}")
+        print(f"  ограничитель: {hh_limiter.stats()}")
+
+        # HH.ru отказал: предохранитель размыкается, запросы обслуживаются из устаревшего кэша
+        await asyncio.sleep(parser.cache.ttl)
+        state["status"] = 503
+        before = state["requests"]
+        found = await asyncio.gather(*(parser.fetch_vacancies(f"python {i}") for i in range(QUERIES)))
+        empty = sum(1 for vacancies in found if not vacancies)
+        print(f"Отказ: пустых ответов {empty}, запросов к заглушке {state['requests'] - before}")
+        print(f"  предохранитель: {hh_breaker.stats()}, кэш: {parser.cache.stats()}")
+    finally:
+        await close_session()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
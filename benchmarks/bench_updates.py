@@ -0,0 +1,130 @@
+#bench_updates.py
+# Пропускная способность бота по входящим обновлениям: long polling против webhook
+# в одном и нескольких процессах. Обновления подаются через локальную заглушку Bot API
+# (getUpdates) или POST в ASGI-приложение webhook, как это делает Telegram.
+# Запуск: python benchmarks/bench_updates.py [обновлений] [процессов webhook...]
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import subprocess
+import aiohttp
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+from benchmarks.stub_telegram import make_update, push_updates, start_stub
+
+STUB_PORT = 18921
+WEBHOOK_PORT = 18922
+WEBHOOK_PATH = "/telegram/webhook"
+# Столько соединений к webhook держит Telegram (max_connections по умолчанию)
+WEBHOOK_CONNECTIONS = 40
+# Команда без обращения к MCP-серверу: на каждое обновление - один ответ
+COMMAND = "/help"
+MESSAGES_PER_UPDATE = 1
+
+
+def bot_env(mode: str, workers: int = 1) -> dict:
+    return dict(
+        os.environ,
+        TELEGRAM_BOT_TOKEN="123456:TEST-token",
+        TELEGRAM_API_URL=f"http://127.0.0.1:{STUB_PORT}",
+        BOT_MODE=mode,
+        WEBHOOK_URL="",
+        WEBHOOK_PATH=WEBHOOK_PATH,
+        WEBHOOK_HOST="127.0.0.1",
+        WEBHOOK_PORT=str(WEBHOOK_PORT),
+        WEBHOOK_WORKERS=str(workers),
+        # Лимиты отправки не должны ограничивать измерение приёма обновлений
+        TG_GLOBAL_RATE="1000000",
+        PYTHONPATH=project_root
+    )
+
+
+async def wait_messages(state: dict, expected: int, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while len(state["messages"]) < expected:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Доставлено {len(state['messages'])} из {expected} сообщений")
+        await asyncio.sleep(0.01)
+
+
+async def wait_webhook(session: aiohttp.ClientSession):
+    while True:
+        try:
+            async with session.get(f"http://127.0.0.1:{WEBHOOK_PORT}/metrics") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.1)
+
+
+async def run_polling(app, count: int) -> float:
+    state = app["state"]
+    process = subprocess.Popen([sys.executable, "main.py"], cwd=project_root, env=bot_env("polling"),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while not state["polls"]:
+            await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        push_updates(app, [make_update(i + 1, i + 1, COMMAND) for i in range(count)])
+        await wait_messages(state, count * MESSAGES_PER_UPDATE)
+        return time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def run_webhook(app, count: int, workers: int) -> float:
+    state = app["state"]
+    process = subprocess.Popen([sys.executable, "main.py"], cwd=project_root, env=bot_env("webhook", workers),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        connector = aiohttp.TCPConnector(limit=WEBHOOK_CONNECTIONS)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await wait_webhook(session)
+            url = f"http://127.0.0.1:{WEBHOOK_PORT}{WEBHOOK_PATH}"
+            queue = asyncio.Queue()
+            for i in range(count):
+                queue.put_nowait(make_update(i + 1, i + 1, COMMAND))
+
+            async def connection():
+                while not queue.empty():
+                    async with session.post(url, json=queue.get_nowait()) as response:
+                        await response.read()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(connection() for _ in range(WEBHOOK_CONNECTIONS)))
+            await wait_messages(state, count * MESSAGES_PER_UPDATE)
+            return time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def main():
+    logging.getLogger("aiohttp.access").setLevel(logging.ERROR)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = [int(value) for value in sys.argv[2:]] or [1, 2, 4]
+    print(f"{count} обновлений {COMMAND}, у каждого свой чат")
+    print(f"{'режим':<14}{'время, с':>10}{'обновлений/с':>14}")
+    runs = [("polling", None)] + [(f"webhook x{size}", size) for size in workers]
+    for name, size in runs:
+        runner, _ = await start_stub(STUB_PORT, chat_rate=1000, chat_burst=1000, global_rate=1_000_000)
+        try:
+            if size is None:
+                elapsed = await run_polling(runner.app, count)
+            else:
+                elapsed = await run_webhook(runner.app, count, size)
+        finally:
+            await runner.cleanup()
+        print(f"{name:<14}{elapsed:>10.2f}{count / elapsed:>14.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
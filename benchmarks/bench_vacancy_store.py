@@ -0,0 +1,95 @@
+#bench_vacancy_store.py
+# Задержка поиска по локальному хранилищу вакансий (SQLite FTS5)
+# Запуск: python benchmarks/bench_vacancy_store.py [число вакансий]
+
+import os
+import sys
+import time
+import random
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from agents.vacancy_store import VacancyStore
+
+ROLES = ["Python разработчик", "Java разработчик", "Аналитик данных", "Менеджер проектов", "DevOps инженер",
+         "Тестировщик", "Frontend разработчик", "Дизайнер интерфейсов", "Бухгалтер", "Продавец-консультант",
+         "Kotlin разработчик", "Системный администратор", "Инженер-конструктор", "Водитель", "Юрист"]
+LEVELS = ["Junior", "Middle", "Senior", "Ведущий", "Старший", "Главный"]
+EMPLOYERS = [f"Компания {i}" for i in range(2000)] + ["Яндекс", "Сбер", "ТехноЛогика", "Ozon", "VK"]
+AREAS = [("1", "Москва"), ("2", "Санкт-Петербург"), ("3", "Екатеринбург"), ("4", "Новосибирск"),
+         ("88", "Казань"), ("66", "Нижний Новгород")]
+WORDS = ("опыт работы разработка сопровождение проектов команда задачи знание уверенное владение sql git "
+         "docker linux excel клиенты продажи отчётность анализ требований архитектура микросервисы "
+         "тестирование автоматизация удалённая работа гибкий график обучение развитие").split()
+
+QUERIES = [
+    ("python", None),
+    ("python разработчик", "1"),
+    ("аналитик данных", None),
+    ("kotlin senior", "2"),
+    ("менеджер проектов", "88"),
+    ("docker linux", None),
+    ("яндекс", None),
+    ("несуществующаяпрофессия", None),
+]
+
+
+def make_vacancy(vacancy_id: int, rnd: random.Random) -> dict:
+    """Карточка выдачи HH.ru со случайными названием, работодателем и регионом"""
+    area_id, area_name = rnd.choice(AREAS)
+    salary_from = rnd.randrange(30, 400) * 1000
+    return {
+        "id": str(vacancy_id),
+        "name": f"{rnd.choice(LEVELS)} {rnd.choice(ROLES)}",
+        "area": {"id": area_id, "name": area_name},
+        "salary": {"from": salary_from, "to": salary_from + 50000, "currency": "RUR"},
+        "employer": {"name": rnd.choice(EMPLOYERS)},
+        "snippet": {
+            "requirement": " ".join(rnd.choices(WORDS, k=12)),
+            "responsibility": " ".join(rnd.choices(WORDS, k=12))
+        },
+        "published_at": "2025-06-20T10:00:00+0300",
+        "alternate_url": f"https://hh.ru/vacancy/{vacancy_id}"
+    }
+
+
+def fill(store: VacancyStore, size: int, batch: int = 10_000):
+    rnd = random.Random(42)
+    for start in range(0, size, batch):
+        store.upsert(make_vacancy(i, rnd) for i in range(start, min(start + batch, size)))
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    repeats = 50
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vacancies.sqlite3")
+        store = VacancyStore(path)
+
+        started = time.perf_counter()
+        fill(store, size)
+        elapsed = time.perf_counter() - started
+        print(f"Загрузка {size} вакансий: {elapsed:.1f} с ({size / elapsed:.0f} в секунду), "
+              f"файл {os.path.getsize(path) / 2**20:.0f} МБ")
+
+        print(f"{'запрос':<28}{'регион':>8}{'найдено':>9}{'p50, мс':>10}{'p99, мс':>10}")
+        for query, area in QUERIES:
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                found = store.search(query, area, limit=20, max_age=3600)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"{query:<28}{area or '-':>8}{len(found):>9}"
+                  f"{percentile(timings, 0.5):>10.2f}{percentile(timings, 0.99):>10.2f}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
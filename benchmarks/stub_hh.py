@@ -0,0 +1,89 @@
+#stub_hh.py
+# Локальная заглушка API HH.ru для бенчмарков
+
+import time
+import random
+import asyncio
+from aiohttp import web
+
+
+def make_vacancy(vacancy_id: int) -> dict:
+    """Вакансия в формате ответа HH.ru"""
+    return {
+        "id": str(vacancy_id),
+        "name": f"Python разработчик {vacancy_id}",
+        "premium": False,
+        "area": {"id": "1", "name": "Москва"},
+        "salary": {"from": 100000 + vacancy_id, "to": 200000 + vacancy_id, "currency": "RUR"},
+        "experience": {"id": "between1And3", "name": "От 1 года до 3 лет"},
+        "schedule": {"id": "fullDay", "name": "Полный день"},
+        "employment": {"id": "full", "name": "Полная занятость"},
+        "employer": {"id": "1", "name": "ТехноЛогика"},
+        "snippet": {"requirement": "Опыт разработки на Python", "responsibility": "Разработка backend"},
+        "description": "<p>Разработка backend на Python</p>" * 20,
+        "published_at": "2025-06-20T10:00:00+0300",
+        "alternate_url": f"https://hh.ru/vacancy/{vacancy_id}",
+        "has_test": False
+    }
+
+
+def create_app(per_page: int = 20, latency: float = 0.0, rate_limit: float = 0.0,
+               retry_after: float = 1.0) -> web.Application:
+    """Приложение с /vacancies и /vacancies/{id}
+
+    rate_limit - допустимое число запросов в секунду, сверх него заглушка отвечает
+    429 с Retry-After, как HH.ru под нагрузкой. app["state"]["status"] позволяет на ходу
+    переключить заглушку на ответ с ошибкой (например, 503).
+    """
+    state = {"status": 200, "requests": 0, "throttled": 0, "tokens": rate_limit, "updated_at": time.monotonic()}
+
+    @web.middleware
+    async def faults(request: web.Request, handler):
+        state["requests"] += 1
+        if state["status"] != 200:
+            return web.json_response({"errors": []}, status=state["status"])
+        if rate_limit:
+            now = time.monotonic()
+            state["tokens"] = min(rate_limit, state["tokens"] + (now - state["updated_at"]) * rate_limit)
+            state["updated_at"] = now
+            if state["tokens"] < 1:
+                state["throttled"] += 1
+                return web.json_response({"errors": [{"type": "too_many_requests"}]}, status=429,
+                                         headers={"Retry-After": str(retry_after)})
+            state["tokens"] -= 1
+        return await handler(request)
+
+    async def search(request: web.Request) -> web.Response:
+        page = int(request.query.get("page", 0))
+        size = min(int(request.query.get("per_page", per_page)), 100)
+        items = [make_vacancy(page * size + i) for i in range(size)]
+        if latency:
+            await _sleep(latency)
+        return web.json_response({"items": items, "found": len(items), "page": page, "pages": 1})
+
+    async def detail(request: web.Request) -> web.Response:
+        if latency:
+            await _sleep(latency)
+        return web.json_response(make_vacancy(int(request.match_info["vacancy_id"])))
+
+    app = web.Application(middlewares=[faults])
+    app["state"] = state
+    app.router.add_get("/vacancies", search)
+    app.router.add_get("/vacancies/", search)
+    app.router.add_get("/vacancies/{vacancy_id}", detail)
+    return app
+
+
+async def _sleep(latency: float):
+    await asyncio.sleep(random.uniform(0, latency * 2))
+
+
+async def start_stub(port: int = 0, **kwargs) -> tuple[web.AppRunner, str]:
+    """Запуск заглушки, возвращает runner и базовый URL (приложение - runner.app)"""
+    runner = web.AppRunner(create_app(**kwargs))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    sockets = site._server.sockets
+    real_port = sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{real_port}"
@@ -0,0 +1,133 @@
+#stub_telegram.py
+# Локальная заглушка Telegram Bot API для бенчмарков бота
+
+import time
+import asyncio
+from aiohttp import web
+
+
+def create_app(chat_rate: float = 1.0, chat_burst: float = 3.0, global_rate: float = 30.0,
+               retry_after: int = 1, latency: float = 0.0) -> web.Application:
+    """Приложение с методами sendMessage, getUpdates и лимитами как у Telegram
+
+    Сверх chat_rate сообщений в секунду в один чат или global_rate на весь бот
+    заглушка отвечает 429 с parameters.retry_after. Доставленные сообщения
+    складываются в app["state"]["messages"] как (chat_id, время, текст).
+    Обновления для long polling добавляются через push_updates(app, updates).
+    """
+    now = time.monotonic()
+    state = {"requests": 0, "throttled": 0, "messages": [], "chats": {},
+             "tokens": global_rate, "updated_at": now,
+             "updates": [], "new_updates": asyncio.Event(), "polls": 0, "webhook": "", "actions": []}
+
+    def take(bucket: dict, rate: float, burst: float) -> bool:
+        current = time.monotonic()
+        bucket["tokens"] = min(burst, bucket["tokens"] + (current - bucket["updated_at"]) * rate)
+        bucket["updated_at"] = current
+        if bucket["tokens"] < 1:
+            return False
+        bucket["tokens"] -= 1
+        return True
+
+    async def read(request: web.Request) -> dict:
+        state["requests"] += 1
+        if request.content_type == "application/json":
+            return await request.json()
+        return dict(await request.post())
+
+    def ok(result) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
+
+    async def get_me(request: web.Request) -> web.Response:
+        await read(request)
+        return ok({"id": 123456, "is_bot": True, "first_name": "Stub", "username": "stub_bot"})
+
+    async def get_updates(request: web.Request) -> web.Response:
+        data = await read(request)
+        state["polls"] += 1
+        offset = int(data.get("offset") or 0)
+        limit = int(data.get("limit") or 100)
+        # Подтверждённые обновления (update_id < offset) больше не отдаются
+        state["updates"] = [update for update in state["updates"] if update["update_id"] >= offset]
+        if not state["updates"]:
+            state["new_updates"].clear()
+            try:
+                await asyncio.wait_for(state["new_updates"].wait(), float(data.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+        return ok(state["updates"][:limit])
+
+    async def set_webhook(request: web.Request) -> web.Response:
+        state["webhook"] = (await read(request)).get("url", "")
+        return ok(True)
+
+    async def get_webhook_info(request: web.Request) -> web.Response:
+        await read(request)
+        return ok({"url": state["webhook"], "has_custom_certificate": False, "pending_update_count": 0})
+
+    async def send_chat_action(request: web.Request) -> web.Response:
+        data = await read(request)
+        state["actions"].append((int(data["chat_id"]), time.monotonic(), data["action"]))
+        return ok(True)
+
+    async def send_message(request: web.Request) -> web.Response:
+        data = await read(request)
+        chat_id = int(data["chat_id"])
+        chat = state["chats"].setdefault(chat_id, {"tokens": chat_burst, "updated_at": time.monotonic()})
+        if not take(chat, chat_rate, chat_burst) or not take(state, global_rate, global_rate):
+            state["throttled"] += 1
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {retry_after}",
+                "parameters": {"retry_after": retry_after}
+            }, status=429)
+        if latency:
+            await asyncio.sleep(latency)
+        state["messages"].append((chat_id, time.monotonic(), data["text"]))
+        return web.json_response({"ok": True, "result": {
+            "message_id": len(state["messages"]),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+            "text": data["text"]
+        }})
+
+    app = web.Application()
+    app["state"] = state
+    for method, handler in (("sendMessage", send_message), ("getMe", get_me), ("getUpdates", get_updates),
+                            ("setWebhook", set_webhook), ("getWebhookInfo", get_webhook_info),
+                            ("sendChatAction", send_chat_action)):
+        app.router.add_post(f"/bot{{token}}/{method}", handler)
+        app.router.add_post(f"/bot{{token}}/{method.lower()}", handler)
+    return app
+
+
+def make_update(update_id: int, chat_id: int, text: str) -> dict:
+    """Обновление с текстовым сообщением от пользователя"""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": "User"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "User"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        }
+    }
+
+
+def push_updates(app: web.Application, updates: list):
+    """Обновления для getUpdates"""
+    app["state"]["updates"].extend(updates)
+    app["state"]["new_updates"].set()
+
+
+async def start_stub(port: int = 0, **kwargs) -> tuple[web.AppRunner, str]:
+    """Запуск заглушки, возвращает runner и базовый URL для TelegramAPIServer.from_base"""
+    runner = web.AppRunner(create_app(**kwargs))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    real_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{real_port}"
@@ -0,0 +1,284 @@
+#delivery.py
+# Очередь исходящих сообщений Telegram с учётом лимитов Bot API
+
+import re
+import html
+import time
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from agents.resilience import AdaptiveTokenBucket, retry_delay
+from metrics import REGISTRY, timed
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Разделитель сообщений, склеенных в одно
+SEPARATOR = "\n\n"
+
+# Тег HTML-разметки Telegram: <b>, </b>, <a href='...'>; '<' в тексте экранирован как &lt;
+HTML_TAG = re.compile(r"<(/?)[a-zA-Z][^>]*>")
+
+# Корзина чата без сообщений дольше этого срока (секунды) уже полна и может быть удалена
+BUCKET_IDLE = 60.0
+
+delivery_messages = REGISTRY.counter(
+    "telegram_messages_total", "Исходящие сообщения Telegram по результату", ("result",)
+)
+
+
+def text_length(text: str) -> int:
+    """Длина текста так, как её считает Telegram: в кодовых единицах UTF-16"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def split_text(text: str, limit: int) -> List[str]:
+    """Разбиение длинного текста на части не длиннее limit, по возможности по строкам"""
+    if text_length(text) <= limit:
+        return [text]
+    parts, current = [], ""
+    for line in text.splitlines(keepends=True):
+        while text_length(line) > limit:
+            # Строка длиннее лимита целиком: режем по символам
+            if current:
+                parts.append(current)
+                current = ""
+            cut = limit
+            while text_length(line[:cut]) > limit:
+                cut -= 1
+            parts.append(line[:cut])
+            line = line[cut:]
+        if text_length(current + line) > limit:
+            parts.append(current)
+            current = ""
+        current += line
+    if current:
+        parts.append(current)
+    return [part.rstrip("\n") for part in parts if part.strip()]
+
+
+def html_blocks(text: str) -> List[str]:
+    """Строки HTML-текста, сгруппированные так, что ни один тег не переходит в следующий блок"""
+    blocks, current, depth = [], "", 0
+    for line in text.splitlines(keepends=True):
+        current += line
+        for match in HTML_TAG.finditer(line):
+            depth += -1 if match.group(1) else 1
+        if depth <= 0:
+            blocks.append(current)
+            current, depth = "", 0
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def html_to_plain(text: str) -> str:
+    """Текст без разметки: теги удаляются, сущности вроде &lt; раскрываются"""
+    return html.unescape(HTML_TAG.sub("", text))
+
+
+def split_html(text: str, limit: int) -> List[Tuple[str, Optional[str]]]:
+    """Разбиение HTML-текста на части (текст, parse_mode) не длиннее limit
+
+    Режется только между строками вне тегов: разрезанный тег Telegram отвергает
+    («can't parse entities») вместе со всем сообщением. Блок, который сам длиннее
+    limit, уходит без разметки обычным текстом.
+    """
+    if text_length(text) <= limit:
+        return [(text, "HTML")]
+    parts, current = [], ""
+    for block in html_blocks(text):
+        # Перевод строки в конце части отбрасывается и в лимит не входит
+        if text_length((current + block).rstrip("\n")) <= limit:
+            current += block
+            continue
+        if current.strip():
+            parts.append((current.rstrip("\n"), "HTML"))
+        current = ""
+        if text_length(block.rstrip("\n")) <= limit:
+            current = block
+        else:
+            parts.extend((part, None) for part in split_text(html_to_plain(block).rstrip("\n"), limit))
+    if current.strip():
+        parts.append((current.rstrip("\n"), "HTML"))
+    return parts
+
+
+@dataclass(slots=True)
+class OutboundMessage:
+    """Сообщение в очереди чата"""
+    text: str
+    parse_mode: Optional[str]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class DeliveryQueue:
+    """Отправка сообщений Telegram с соблюдением лимитов Bot API
+
+    У каждого чата своя очередь и свой обработчик, поэтому разные чаты получают
+    сообщения параллельно, а в пределах чата порядок сохраняется. Перед каждым
+    вызовом sendMessage берутся токены из корзины чата (около 1 сообщения в секунду,
+    в группах 20 в минуту) и из общей корзины бота (около 30 сообщений в секунду).
+    Сообщения, накопившиеся в очереди чата, склеиваются в одно, пока оно не длиннее
+    лимита Telegram. На 429 отправка в чат приостанавливается на retry_after, а общая
+    скорость снижается.
+    """
+
+    def __init__(self, bot: Bot, global_rate: float = Config.TG_GLOBAL_RATE,
+                 chat_rate: float = Config.TG_CHAT_RATE, chat_burst: float = Config.TG_CHAT_BURST,
+                 group_rate: float = Config.TG_GROUP_RATE, max_length: int = Config.TG_MESSAGE_LIMIT,
+                 max_retries: int = Config.TG_SEND_RETRIES):
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_length = max_length
+        self.max_retries = max_retries
+        # Небольшой запас общей корзины, чтобы всплеск не превысил лимит в первую же секунду
+        self.global_bucket = AdaptiveTokenBucket(rate=global_rate, burst=max(1.0, global_rate / 10), min_rate=1.0)
+        self.queues: Dict[int, deque] = {}
+        self.workers: Dict[int, asyncio.Task] = {}
+        self.buckets: Dict[int, AdaptiveTokenBucket] = {}
+        self.counters = {"enqueued": 0, "api_calls": 0, "sent": 0, "throttled": 0, "failed": 0}
+
+    def send(self, chat_id: int, text: str, parse_mode: Optional[str] = None) -> asyncio.Future:
+        """Постановка сообщения в очередь чата
+
+        Returns:
+            Future, завершающийся после доставки (длинный текст уходит несколькими сообщениями)
+        """
+        loop = asyncio.get_running_loop()
+        queue = self.queues.setdefault(chat_id, deque())
+        if parse_mode == "HTML":
+            parts = split_html(text, self.max_length)
+        else:
+            parts = [(part, parse_mode) for part in split_text(text, self.max_length)]
+        futures = []
+        for part, part_mode in parts:
+            future = loop.create_future()
+            queue.append(OutboundMessage(part, part_mode, future))
+            futures.append(future)
+        self.counters["enqueued"] += len(futures)
+        if chat_id not in self.workers:
+            self.workers[chat_id] = asyncio.create_task(self._drain(chat_id))
+        return asyncio.gather(*futures)
+
+    def send_many(self, chat_id: int, texts: Iterable[str], parse_mode: Optional[str] = None) -> asyncio.Future:
+        """Постановка нескольких сообщений: в очереди они склеятся в минимум вызовов"""
+        return asyncio.gather(*(self.send(chat_id, text, parse_mode) for text in texts))
+
+    def pending(self) -> int:
+        """Сообщений, ожидающих отправки"""
+        return sum(len(queue) for queue in self.queues.values())
+
+    async def close(self):
+        """Дожидается отправки всего, что уже в очередях"""
+        while self.workers:
+            await asyncio.gather(*list(self.workers.values()), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "pending": self.pending(),
+            "chats": len(self.workers),
+            "global": self.global_bucket.stats()
+        }
+
+    def _bucket(self, chat_id: int) -> AdaptiveTokenBucket:
+        bucket = self.buckets.get(chat_id)
+        if bucket is None:
+            self._prune_buckets()
+            # Отрицательные ID - группы и каналы, у них лимит строже
+            rate = self.group_rate if chat_id < 0 else self.chat_rate
+            bucket = self.buckets[chat_id] = AdaptiveTokenBucket(rate=rate, burst=self.chat_burst, min_rate=rate)
+        return bucket
+
+    def _prune_buckets(self):
+        now = time.monotonic()
+        for chat_id, bucket in list(self.buckets.items()):
+            if chat_id not in self.workers and now - bucket.updated_at > BUCKET_IDLE:
+                del self.buckets[chat_id]
+
+    def _take_batch(self, queue: deque) -> List[OutboundMessage]:
+        """Сообщения из начала очереди, помещающиеся в одно сообщение Telegram"""
+        batch = [queue.popleft()]
+        length = text_length(batch[0].text)
+        while queue and queue[0].parse_mode == batch[0].parse_mode:
+            added = text_length(SEPARATOR) + text_length(queue[0].text)
+            if length + added > self.max_length:
+                break
+            length += added
+            batch.append(queue.popleft())
+        return batch
+
+    async def _drain(self, chat_id: int):
+        queue = self.queues[chat_id]
+        try:
+            while queue:
+                # Пока ждём токен чата, в очереди копятся сообщения для склейки
+                bucket = self._bucket(chat_id)
+                await bucket.acquire()
+                batch = self._take_batch(queue)
+                try:
+                    await self._deliver(chat_id, bucket, batch)
+                except Exception as e:
+                    self.counters["failed"] += len(batch)
+                    delivery_messages.inc("failed", value=len(batch))
+                    for message in batch:
+                        if not message.future.done():
+                            message.future.set_exception(e)
+        finally:
+            del self.workers[chat_id]
+            if queue:
+                # Отмена при остановке: недоставленным сообщениям сообщаем об этом
+                for message in queue:
+                    message.future.cancel()
+                queue.clear()
+            del self.queues[chat_id]
+
+    async def _deliver(self, chat_id: int, bucket: AdaptiveTokenBucket, batch: List[OutboundMessage]):
+        """Один вызов sendMessage с повторами на 429 и сетевых ошибках
+
+        429 - указание Telegram подождать retry_after, а не отказ: такие повторы не
+        расходуют max_retries, он ограничивает только сетевые ошибки и ошибки сервера.
+        """
+        text = SEPARATOR.join(message.text for message in batch)
+        attempt = 0
+        while True:
+            await self.global_bucket.acquire()
+            self.counters["api_calls"] += 1
+            try:
+                with timed("telegram_send"):
+                    await self.bot.send_message(chat_id, text, parse_mode=batch[0].parse_mode)
+            except TelegramRetryAfter as e:
+                # Пауза только для этого чата, общую скорость бота снижаем
+                self.counters["throttled"] += 1
+                delivery_messages.inc("throttled")
+                bucket.on_throttled(e.retry_after)
+                self.global_bucket.on_throttled()
+                logger.warning(f"Telegram 429 для чата {chat_id}, повтор через {e.retry_after} с")
+                await bucket.acquire()
+                continue
+            except (TelegramNetworkError, TelegramServerError) as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"Ошибка отправки в чат {chat_id}: {e}")
+                await asyncio.sleep(retry_delay(attempt))
+                attempt += 1
+                await bucket.acquire()
+                continue
+            except TelegramAPIError as e:
+                logger.error(f"Сообщение в чат {chat_id} отклонено: {e}")
+                raise
+            break
+        self.global_bucket.on_success()
+        self.counters["sent"] += len(batch)
+        delivery_messages.inc("sent", value=len(batch))
+        for message in batch:
+            if not message.future.done():
+                message.future.set_result(None)
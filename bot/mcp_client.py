@@ -0,0 +1,128 @@
+#mcp_client.py
+# Постоянные соединения бота с MCP-сервером
+
+import asyncio
+import itertools
+import logging
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, List, Optional
+from agents.resilience import retry_delay
+from config import Config
+from codec import loads
+
+if TYPE_CHECKING:
+    from fastmcp import Client
+
+logger = logging.getLogger(__name__)
+
+# Код JSON-RPC ошибки, которой fastmcp сообщает, что ответ не пришёл за таймаут запроса
+# (mcp.types.REQUEST_TIMEOUT; константа своя, чтобы не загружать mcp при импорте)
+MCP_REQUEST_TIMEOUT = -32001
+
+
+class MCPUnavailableError(Exception):
+    """MCP-сервер недоступен и переподключиться не удалось"""
+
+
+class MCPClientPool:
+    """Пул долгоживущих сессий fastmcp.Client
+
+    Сессии открываются при первом обращении и переиспользуются всеми командами
+    бота, запросы распределяются между ними по кругу. Если соединение оборвалось,
+    сессия пересоздаётся и вызов повторяется (до retries раз с паузой). Каждый
+    вызов ограничен таймаутом; вызов, не уложившийся в него, не повторяется -
+    поиск на сервере мог продолжиться. Таймаут вызова передаётся и самому
+    fastmcp.Client (его таймаут сессии - MCP_CALL_TIMEOUT), а ошибка таймаута
+    MCP приводится к asyncio.TimeoutError.
+    """
+
+    def __init__(self, url: str = Config.MCP_URL, size: int = Config.MCP_POOL_SIZE,
+                 timeout: float = Config.MCP_CALL_TIMEOUT, retries: int = Config.MCP_RECONNECT_RETRIES):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.clients: List[Optional["Client"]] = [None] * max(1, size)
+        self._locks = [asyncio.Lock() for _ in self.clients]
+        self._next = itertools.count()
+        self.counters = {"calls": 0, "connects": 0, "reconnects": 0, "timeouts": 0}
+
+    async def call_tool(self, name: str, arguments: dict, timeout: Optional[float] = None) -> Any:
+        """Вызов инструмента, возвращает его результат (словарь для наших инструментов)"""
+        result = await self._run(lambda client, limit: client.call_tool(name, arguments, timeout=limit), timeout)
+        return result.data if result.data is not None else result.structured_content
+
+    async def read_resource(self, uri: str, timeout: Optional[float] = None) -> Any:
+        """Чтение ресурса с JSON-содержимым
+
+        fastmcp не принимает таймаут для чтения ресурса, поэтому timeout больше
+        таймаута сессии (MCP_CALL_TIMEOUT) его не продлит.
+        """
+        contents = await self._run(lambda client, limit: client.read_resource(uri), timeout)
+        return loads(contents[0].text)
+
+    async def close(self):
+        for index in range(len(self.clients)):
+            await self._discard(index)
+
+    def stats(self) -> dict:
+        return {
+            **self.counters,
+            "url": self.url,
+            "connected": sum(1 for client in self.clients if client is not None and client.is_connected())
+        }
+
+    async def _run(self, operation: Callable[["Client", float], Awaitable], timeout: Optional[float]):
+        index = next(self._next) % len(self.clients)
+        timeout = timeout or self.timeout
+        self.counters["calls"] += 1
+        for attempt in range(self.retries + 1):
+            try:
+                client = await self._client(index)
+            except Exception as e:
+                error = e
+            else:
+                try:
+                    return await asyncio.wait_for(operation(client, timeout), timeout)
+                except asyncio.TimeoutError:
+                    self.counters["timeouts"] += 1
+                    raise
+                except Exception as e:
+                    if getattr(e, "code", None) == MCP_REQUEST_TIMEOUT:
+                        self.counters["timeouts"] += 1
+                        raise asyncio.TimeoutError(str(e)) from e
+                    # Соединение живо - это ошибка самого вызова, повтор не поможет
+                    if client.is_connected():
+                        raise
+                    error = e
+            logger.warning(f"Соединение с MCP-сервером {self.url} потеряно: {error}")
+            await self._discard(index)
+            if attempt < self.retries:
+                self.counters["reconnects"] += 1
+                await asyncio.sleep(retry_delay(attempt))
+        raise MCPUnavailableError(f"MCP server {self.url} is unavailable: {error}")
+
+    async def _client(self, index: int) -> "Client":
+        """Открытая сессия из пула, при необходимости подключается заново"""
+        client = self.clients[index]
+        if client is not None and client.is_connected():
+            return client
+        async with self._locks[index]:
+            client = self.clients[index]
+            if client is None or not client.is_connected():
+                await self._discard(index)
+                # fastmcp загружается при первом подключении, а не при импорте бота
+                from fastmcp import Client
+                client = Client(self.url, timeout=self.timeout)
+                await asyncio.wait_for(client.__aenter__(), self.timeout)
+                self.clients[index] = client
+                self.counters["connects"] += 1
+            return client
+
+    async def _discard(self, index: int):
+        client, self.clients[index] = self.clients[index], None
+        if client is None:
+            return
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception:
+            # Сервер уже недоступен - закрываем то, что осталось на нашей стороне
+            pass
@@ -1,19 +1,78 @@
 #telegram_bot.py
 
+import html
 import logging
 from aiogram import Bot, Dispatcher, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.filters import Command
+from aiogram.utils.chat_action import ChatActionSender
 from config import Config
+from bot.delivery import DeliveryQueue, text_length
+from bot.mcp_client import MCPClientPool, MCPUnavailableError
 import asyncio
-import aiohttp
-import json
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def escape_truncated(text: str, limit: int) -> str:
+    """Экранированный text не длиннее limit; обрезанный текст заканчивается многоточием"""
+    escaped = html.escape(text)
+    if text_length(escaped) <= limit:
+        return escaped
+    pieces, length = [], text_length("…")
+    for char in text:
+        piece = html.escape(char)
+        length += text_length(piece)
+        if length > limit:
+            break
+        pieces.append(piece)
+    return "".join(pieces) + "…"
+
+def format_vacancy(vacancy: dict, limit: int = Config.TG_MESSAGE_LIMIT) -> str:
+    """Карточка вакансии в HTML-разметке Telegram
+
+    Текст из HH.ru экранируется: в сниппетах встречаются теги вроде <highlighttext>.
+    Описание обрезается так, чтобы карточка поместилась в одно сообщение (limit):
+    разрезать разметку при отправке нельзя.
+    """
+    head = (
+        f"🏢 <b>{html.escape(vacancy['title'])}</b>\n"
+        f"👨‍💼 Компания: {html.escape(vacancy['company'])}\n"
+        f"💰 Зарплата: {html.escape(vacancy.get('salary') or 'Не указана')}\n"
+        f"📝 "
+    )
+    tail = f"\n🔗 <a href='{html.escape(vacancy['url'])}'>Подробнее</a>"
+    budget = max(0, limit - text_length(head) - text_length(tail))
+    return head + escape_truncated(vacancy.get('description') or '', budget) + tail
+
+def format_status(status: dict) -> str:
+    """Статус MCP-сервера для /status"""
+    lines = [
+        "🟢 Система работает\n",
+        f"Время работы: {status['uptime'] // 3600} ч {status['uptime'] % 3600 // 60} мин",
+        f"Обработано запросов: {status['processed_requests']}",
+        f"Кэш HH.ru: {status['cache']['hit_ratio']:.0%} попаданий",
+        f"HH.ru: предохранитель {status['upstream']['breaker']['state']}, "
+        f"{status['upstream']['limiter']['rate']} запросов/с",
+    ]
+    stages = status.get("stages") or {}
+    if stages:
+        lines.append("\nЗадержки (p50 / p99, мс):")
+        for stage, values in stages.items():
+            lines.append(f"  {stage}: {values['p50_ms']} / {values['p99_ms']} ({values['count']})")
+    return "\n".join(lines)
+
 class TelegramBot:
-    def __init__(self):
-        self.bot = Bot(token=Config.BOT_TOKEN)
+    def __init__(self, global_rate: float = Config.TG_GLOBAL_RATE):
+        session = None
+        if Config.TELEGRAM_API_URL:
+            session = AiohttpSession(api=TelegramAPIServer.from_base(Config.TELEGRAM_API_URL))
+        self.bot = Bot(token=Config.BOT_TOKEN, session=session)
+        # Все ответы идут через очередь с лимитами Bot API и склейкой сообщений
+        self.delivery = DeliveryQueue(self.bot, global_rate=global_rate)
+        # Одни и те же сессии с MCP-сервером для всех команд
+        self.mcp = MCPClientPool()
         self.dp = Dispatcher()
         
         self.dp.message(Command("start"))(self.start_handler)
@@ -21,8 +80,12 @@ class TelegramBot:
         self.dp.message(Command("status"))(self.status_handler)
         self.dp.message(Command("help"))(self.help_handler)
 
+    async def reply(self, message: types.Message, text: str, parse_mode: str = None):
+        """Ответ в чат через очередь доставки"""
+        await self.delivery.send(message.chat.id, text, parse_mode)
+
     async def start_handler(self, message: types.Message):
-        await message.answer(
+        await self.reply(message,
             "👋 Привет! Я бот для поиска вакансий с HH.ru\n\n"
             "🔍 Используй команды:\n"
             "/search <запрос> - поиск вакансий\n"
@@ -31,7 +94,7 @@ class TelegramBot:
         )
 
     async def help_handler(self, message: types.Message):
-        await message.answer(
+        await self.reply(message,
             "📖 Доступные команды:\n\n"
             "/search <запрос> - поиск вакансий\n"
             "Пример: /search python разработчик\n\n"
@@ -42,56 +105,61 @@ class TelegramBot:
     async def search_handler(self, message: types.Message):
         query = message.text.split(maxsplit=1)
         if len(query) < 2:
-            await message.answer("❌ Укажите поисковый запрос после команды\n"
-                                "Пример: /search python разработчик")
+            await self.reply(message, "❌ Укажите поисковый запрос после команды\n"
+                             "Пример: /search python разработчик")
             return
         
-        await message.answer(f"🔍 Ищем вакансии по запросу: {query[1]}...")
+        await self.reply(message, f"🔍 Ищем вакансии по запросу: {query[1]}...")
         
         try:
-            # Имитация поиска без MCP
-            vacancies = [
-                {
-                    "title": "Python Developer",
-                    "company": "ТехноЛогика",
-                    "salary": "150 000 - 200 000 руб.",
-                    "url": "https://hh.ru/vacancy/12345",
-                    "description": "Разработка backend на Python"
-                },
-                {
-                    "title": "Data Scientist",
-                    "company": "АналитикаПро",
-                    "salary": "180 000 - 250 000 руб.",
-                    "url": "https://hh.ru/vacancy/67890",
-                    "description": "Анализ данных и машинное обучение"
-                }
-            ]
-            
-            for vacancy in vacancies:
-                await message.answer(
-                    f"🏢 <b>{vacancy['title']}</b>\n"
-                    f"👨‍💼 Компания: {vacancy['company']}\n"
-                    f"💰 Зарплата: {vacancy['salary']}\n"
-                    f"📝 {vacancy['description']}\n"
-                    f"🔗 <a href='{vacancy['url']}'>Подробнее</a>",
-                    parse_mode="HTML"
+            # Пока идёт поиск, в чате виден индикатор «печатает...»
+            async with ChatActionSender.typing(bot=self.bot, chat_id=message.chat.id):
+                result = await self.mcp.call_tool(
+                    "handle_request", {"query": query[1], "user_id": message.from_user.id},
+                    timeout=Config.MCP_SEARCH_TIMEOUT
+                )
+                if result.get("status") != "success":
+                    raise RuntimeError(result.get("message", "search failed"))
+                page = await self.mcp.read_resource(
+                    f"results://{result['request_id']}?limit={Config.MAX_VACANCIES}"
                 )
-                
+        except asyncio.TimeoutError:
+            await self.reply(message, "⏳ Поиск занял слишком много времени, попробуйте позже")
+            return
+        except MCPUnavailableError as e:
+            logger.error(f"Ошибка поиска: {e}")
+            await self.reply(message, "⚠️ Сервер поиска недоступен, попробуйте позже")
+            return
         except Exception as e:
             logger.error(f"Ошибка поиска: {e}", exc_info=True)
-            await message.answer("⚠️ Произошла ошибка при поиске вакансий")
+            await self.reply(message, "⚠️ Произошла ошибка при поиске вакансий")
+            return
 
-    async def status_handler(self, message: types.Message):
-        """Статус системы"""
-        await message.answer(
-            "🟠 Система работает в автономном режиме\n\n"
-            "MCP сервер: не подключен\n"
-            "Агенты: не активны\n"
-            "Режим: тестовый\n\n"
-            "Используйте /search для тестового поиска"
+        vacancies = page.get("vacancies", [])
+        if not vacancies:
+            await self.reply(message, "😕 По запросу ничего не найдено")
+            return
+        await self.reply(message, f"✅ Найдено вакансий: {page.get('total', len(vacancies))}, показываю {len(vacancies)}")
+        # Карточки склеиваются в сообщения до лимита длины Telegram
+        await self.delivery.send_many(
+            message.chat.id, [format_vacancy(vacancy) for vacancy in vacancies], parse_mode="HTML"
         )
 
+    async def status_handler(self, message: types.Message):
+        """Статус системы: живые данные ресурса status://system"""
+        try:
+            status = await self.mcp.read_resource("status://system")
+        except (asyncio.TimeoutError, MCPUnavailableError) as e:
+            logger.error(f"Статус MCP-сервера недоступен: {e}")
+            await self.reply(message, "🔴 MCP сервер: не отвечает")
+            return
+        await self.reply(message, format_status(status))
+
     async def run(self):
-        """Запуск бота"""
-        logger.info("Запуск Telegram бота в автономном режиме")
-        await self.dp.start_polling(self.bot)
\ No newline at end of file
+        """Запуск бота в режиме long polling (режим webhook - bot/webhook.py)"""
+        logger.info(f"Запуск Telegram бота, MCP-сервер: {Config.MCP_URL}")
+        try:
+            await self.dp.start_polling(self.bot, tasks_concurrency_limit=Config.BOT_CONCURRENCY)
+        finally:
+            await self.delivery.close()
+            await self.mcp.close()
\ No newline at end of file
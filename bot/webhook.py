@@ -0,0 +1,150 @@
+#webhook.py
+# Режим webhook: Telegram сам присылает обновления в ASGI-приложение бота.
+# Приложение можно запустить в нескольких процессах (WEBHOOK_WORKERS), но очередь
+# исходящих сообщений и её лимиты у каждого процесса свои:
+# - общий лимит бота TG_GLOBAL_RATE делится между процессами поровну;
+# - лимиты на чат и на группу (TG_CHAT_RATE, TG_GROUP_RATE) действуют в пределах
+#   процесса, а обновления одного чата могут попасть в разные процессы, поэтому
+#   при N процессах чат может получить до N раз больше сообщений, и порядок
+#   ответов на разные обновления не гарантирован.
+# Если это важно, запускайте один процесс. При нескольких машинах за
+# балансировщиком уменьшите TG_GLOBAL_RATE на каждой из них вручную.
+
+import hmac
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+from aiogram.types import Update
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse
+from bot.telegram_bot import TelegramBot
+from metrics import REGISTRY
+from config import Config
+from codec import loads
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+updates_total = REGISTRY.counter(
+    "telegram_updates_total", "Обновления Telegram, принятые через webhook, по результату", ("result",)
+)
+
+
+class WebhookDispatcher:
+    """Обработка обновлений из webhook с ограничением параллелизма
+
+    Обновление подтверждается Telegram сразу после постановки в обработку, а сама
+    обработка идёт в отдельной задаче. Одновременно обрабатывается не больше
+    concurrency обновлений: когда все слоты заняты, запрос webhook ждёт свободного,
+    и Telegram сам притормаживает отправку.
+    """
+
+    def __init__(self, telegram_bot: TelegramBot, concurrency: int = Config.BOT_CONCURRENCY):
+        self.telegram_bot = telegram_bot
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.tasks: set = set()
+
+    async def feed(self, update: Update):
+        """Постановка обновления в обработку"""
+        await self.semaphore.acquire()
+        task = asyncio.create_task(self._process(update))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _process(self, update: Update):
+        try:
+            await self.telegram_bot.dp.feed_update(self.telegram_bot.bot, update)
+            updates_total.inc("processed")
+        except Exception as e:
+            updates_total.inc("failed")
+            logger.error(f"Ошибка обработки обновления {update.update_id}: {e}", exc_info=True)
+        finally:
+            self.semaphore.release()
+
+    async def close(self):
+        """Дожидается обработки принятых обновлений"""
+        if self.tasks:
+            await asyncio.gather(*list(self.tasks), return_exceptions=True)
+
+
+async def setup_webhook(telegram_bot: TelegramBot):
+    """Регистрация webhook в Telegram, если он ещё не указывает на WEBHOOK_URL
+
+    Каждый процесс приложения вызывает её при старте; повторная регистрация
+    тем же адресом не нужна, поэтому сначала сверяемся с getWebhookInfo.
+    """
+    if not Config.WEBHOOK_URL:
+        logger.warning("WEBHOOK_URL не задан, webhook в Telegram не регистрируется")
+        return
+    url = Config.WEBHOOK_URL.rstrip("/") + Config.WEBHOOK_PATH
+    info = await telegram_bot.bot.get_webhook_info()
+    if info.url == url:
+        return
+    await telegram_bot.bot.set_webhook(
+        url,
+        secret_token=Config.WEBHOOK_SECRET or None,
+        max_connections=Config.WEBHOOK_MAX_CONNECTIONS,
+        allowed_updates=telegram_bot.dp.resolve_used_update_types()
+    )
+    logger.info(f"Webhook зарегистрирован: {url}")
+
+
+def valid_secret(token: Optional[str]) -> bool:
+    """Проверка заголовка X-Telegram-Bot-Api-Secret-Token за постоянное время"""
+    if token is None:
+        return False
+    return hmac.compare_digest(token.encode(), Config.WEBHOOK_SECRET.encode())
+
+
+def create_app(telegram_bot: Optional[TelegramBot] = None) -> FastAPI:
+    """ASGI-приложение бота: приём обновлений по WEBHOOK_PATH и метрики процесса"""
+    # Процессы не делят ограничитель, поэтому каждому достаётся своя доля общего лимита бота
+    telegram_bot = telegram_bot or TelegramBot(global_rate=Config.TG_GLOBAL_RATE / max(1, Config.WEBHOOK_WORKERS))
+    dispatcher = WebhookDispatcher(telegram_bot)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await setup_webhook(telegram_bot)
+        try:
+            yield
+        finally:
+            # Webhook не удаляем: обновления продолжат принимать другие процессы
+            await dispatcher.close()
+            await telegram_bot.delivery.close()
+            await telegram_bot.mcp.close()
+            await telegram_bot.bot.session.close()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.dispatcher = dispatcher
+
+    @app.post(Config.WEBHOOK_PATH)
+    async def webhook(request: Request):
+        if Config.WEBHOOK_SECRET and not valid_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token")):
+            updates_total.inc("rejected")
+            raise HTTPException(status_code=401, detail="Invalid secret token")
+        try:
+            update = Update.model_validate(loads(await request.body()), context={"bot": telegram_bot.bot})
+        except ValueError:
+            updates_total.inc("invalid")
+            raise HTTPException(status_code=400, detail="Invalid update")
+        await dispatcher.feed(update)
+        return Response(status_code=200)
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+    return app
+
+
+def run_webhook():
+    """Запуск приложения webhook в WEBHOOK_WORKERS процессах (лимиты отправки - см. начало модуля)"""
+    uvicorn.run(
+        "bot.webhook:create_app",
+        factory=True,
+        host=Config.WEBHOOK_HOST,
+        port=Config.WEBHOOK_PORT,
+        workers=Config.WEBHOOK_WORKERS,
+        log_level="warning"
+    )
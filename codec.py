@@ -0,0 +1,38 @@
+#codec.py
+# JSON для всего проекта: orjson, если установлен, иначе стандартный json
+
+import json
+from typing import Any, Union
+from config import Config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Выбранная реализация: JSON_CODEC=json принудительно включает стандартную библиотеку
+BACKEND = "orjson" if orjson is not None and Config.JSON_CODEC != "json" else "json"
+
+if BACKEND == "orjson":
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """Разбор JSON прямо из байтов ответа, без промежуточной строки"""
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        """JSON в UTF-8 байтах, готовых для тела HTTP-ответа"""
+        return orjson.dumps(obj)
+else:
+    def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """Разбор JSON прямо из байтов ответа, без промежуточной строки"""
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    def dumps(obj: Any) -> bytes:
+        """JSON в UTF-8 байтах, готовых для тела HTTP-ответа"""
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_str(obj: Any) -> str:
+    """JSON строкой - для API, которые принимают только str"""
+    return dumps(obj).decode("utf-8")
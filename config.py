@@ -9,20 +9,135 @@ class Config:
     # MCP Server
     MCP_HOST = os.getenv("MCP_HOST", "0.0.0.0")
     MCP_PORT = int(os.getenv("MCP_PORT", 8000))
+    # Транспорт при запуске mcp_server.py: stdio или http (нужен боту)
+    MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
+    # Подключение бота к MCP-серверу: адрес, число сессий, таймауты вызовов и повторы при обрыве
+    MCP_URL = os.getenv("MCP_URL", f"http://127.0.0.1:{MCP_PORT}/mcp")
+    MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", 2))
+    MCP_CALL_TIMEOUT = float(os.getenv("MCP_CALL_TIMEOUT", 10))
+    MCP_SEARCH_TIMEOUT = float(os.getenv("MCP_SEARCH_TIMEOUT", 60))
+    MCP_RECONNECT_RETRIES = int(os.getenv("MCP_RECONNECT_RETRIES", 2))
+
+    # API менеджера агентов
+    API_HOST = os.getenv("API_HOST", "127.0.0.1")
+    API_PORT = int(os.getenv("API_PORT", 8000))
     
     # Telegram
     BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+    # Адрес Bot API: пусто - api.telegram.org, иначе свой Bot API сервер
+    TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+    # Режим получения обновлений: polling или webhook
+    BOT_MODE = os.getenv("BOT_MODE", "polling")
+    # Сколько обновлений обрабатывается одновременно в одном процессе бота
+    BOT_CONCURRENCY = int(os.getenv("BOT_CONCURRENCY", 100))
+    # Webhook: публичный URL, путь, секрет, адрес ASGI-приложения и число его процессов
+    WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+    WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+    WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+    WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8080))
+    # При WEBHOOK_WORKERS > 1 TG_GLOBAL_RATE делится между процессами, а лимиты на чат действуют в каждом процессе отдельно
+    WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", 1))
+    # Сколько одновременных соединений Telegram открывает к webhook (1-100)
+    WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", 40))
     
     # GigaChat
     GIGACHAT_CREDENTIALS = os.getenv("GIGACHAT_CREDENTIALS")
     GIGACHAT_SCOPE = os.getenv("GIGACHAT_SCOPE", "GIGACHAT_API_PERS")
+    # Кэш ответов LLM на диске: путь к файлу SQLite, по умолчанию отключён ("").
+    # Ключ - точное совпадение промпта и параметров модели
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+    # Кэш результатов инструмента headhunter_job_search по нормализованным аргументам
+    TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", 600))
+    TOOL_CACHE_MAXSIZE = int(os.getenv("TOOL_CACHE_MAXSIZE", 128))
     
     # HH.ru
-    HH_API_URL = "https://api.hh.ru/vacancies"
+    HH_API_URL = os.getenv("HH_API_URL", "https://api.hh.ru/vacancies")
     HH_USER_AGENT = "MyApp/1.0 (my-app@example.com)"
     
     # Settings
-    MAX_VACANCIES = 5
-    AGENT_POOL_SIZE = 3
+    MAX_VACANCIES = int(os.getenv("MAX_VACANCIES", 5))
+    # Страниц выдачи на один запрос; HH.ru в любом случае отдаёт не глубже HH_MAX_DEPTH вакансий
+    MAX_PAGES = int(os.getenv("MAX_PAGES", 20))
+    HH_MAX_DEPTH = 2000
+    # Число процессов агентов (по умолчанию по числу ядер) и задач на процесс
+    AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", os.cpu_count() or 1))
+    AGENT_CONCURRENCY = int(os.getenv("AGENT_CONCURRENCY", 4))
     REQUEST_TIMEOUT = 30
-    DEBUG = bool(os.getenv("DEBUG", False))
\ No newline at end of file
+    # Сколько запросов handle_request обрабатывается одновременно
+    MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", 100))
+    MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", 20))
+    DEBUG = bool(os.getenv("DEBUG", False))
+    # Сколько последних трасс запросов хранить для /traces и MCP-ресурса traces://
+    TRACE_BUFFER = int(os.getenv("TRACE_BUFFER", 1000))
+
+    # Очередь задач агентов
+    TASK_POLL_TIMEOUT = float(os.getenv("TASK_POLL_TIMEOUT", 20))
+    TASK_DEADLINE = float(os.getenv("TASK_DEADLINE", 60))
+    AGENT_HEARTBEAT_INTERVAL = float(os.getenv("AGENT_HEARTBEAT_INTERVAL", 5))
+    AGENT_HEARTBEAT_TIMEOUT = float(os.getenv("AGENT_HEARTBEAT_TIMEOUT", 15))
+
+    # Исходящие сообщения Telegram: лимиты Bot API (сообщений в секунду) и длина сообщения
+    TG_GLOBAL_RATE = float(os.getenv("TG_GLOBAL_RATE", 30))
+    TG_CHAT_RATE = float(os.getenv("TG_CHAT_RATE", 1))
+    TG_CHAT_BURST = float(os.getenv("TG_CHAT_BURST", 3))
+    TG_GROUP_RATE = float(os.getenv("TG_GROUP_RATE", 20 / 60))
+    TG_MESSAGE_LIMIT = int(os.getenv("TG_MESSAGE_LIMIT", 4096))
+    TG_SEND_RETRIES = int(os.getenv("TG_SEND_RETRIES", 5))
+
+    # Реализация JSON: auto - orjson при наличии, json - стандартная библиотека
+    JSON_CODEC = os.getenv("JSON_CODEC", "auto")
+
+    # Пул HTTP-соединений
+    HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", 100))
+    HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 20))
+    HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 30))
+    HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", 300))
+
+    # Кэш ответов HH.ru
+    HH_CACHE_TTL = float(os.getenv("HH_CACHE_TTL", 300))
+    HH_CACHE_MAXSIZE = int(os.getenv("HH_CACHE_MAXSIZE", 1024))
+    # Сколько ещё секунд после TTL запись можно отдавать, пока HH.ru недоступен
+    HH_CACHE_MAX_STALE = float(os.getenv("HH_CACHE_MAX_STALE", 3600))
+
+    # Параллельная загрузка в agentparser
+    HH_MAX_IN_FLIGHT = int(os.getenv("HH_MAX_IN_FLIGHT", 8))
+    HH_MAX_RETRIES = int(os.getenv("HH_MAX_RETRIES", 3))
+    HH_RETRY_BACKOFF = float(os.getenv("HH_RETRY_BACKOFF", 0.5))
+
+    # Общий для процесса ограничитель запросов к HH.ru и предохранитель
+    HH_RATE_LIMIT = float(os.getenv("HH_RATE_LIMIT", 10))  # запросов в секунду, 0 - без ограничения
+    HH_RATE_BURST = float(os.getenv("HH_RATE_BURST", 5))
+    HH_MIN_RATE = float(os.getenv("HH_MIN_RATE", 1))
+    HH_BREAKER_FAILURES = int(os.getenv("HH_BREAKER_FAILURES", 5))
+    HH_BREAKER_RESET = float(os.getenv("HH_BREAKER_RESET", 30))
+
+    # Сжатие сохраняемых наборов вакансий в Parquet/Feather
+    DATASET_COMPRESSION = os.getenv("DATASET_COMPRESSION", "zstd")
+
+    # Аналитика зарплат: строк в куске при чтении набора и шаг гистограммы в рублях
+    # Каталог наборов вакансий, доступных MCP-инструменту salary_statistics: пути клиентов
+    # считаются от него и не могут выходить за его пределы
+    DATASET_DIR = os.getenv("DATASET_DIR", "data")
+    ANALYTICS_CHUNK_ROWS = int(os.getenv("ANALYTICS_CHUNK_ROWS", 200_000))
+    SALARY_BIN_WIDTH = float(os.getenv("SALARY_BIN_WIDTH", 1000))
+
+    # Индекс инкрементальной синхронизации вакансий
+    SYNC_INDEX_PATH = os.getenv("SYNC_INDEX_PATH", "vacancy_index.sqlite3")
+
+    # Локальное хранилище загруженных вакансий с полнотекстовым поиском: путь к файлу SQLite,
+    # по умолчанию отключено (""). Нужно для SEARCH_MODE local_first и local
+    VACANCY_STORE_PATH = os.getenv("VACANCY_STORE_PATH", "")
+    # Режим поиска по умолчанию: live - HH.ru, local_first - сначала хранилище, local - только хранилище
+    SEARCH_MODE = os.getenv("SEARCH_MODE", "live")
+    # Записи старше этого срока (секунды) в режиме local_first считаются устаревшими
+    VACANCY_STORE_MAX_AGE = float(os.getenv("VACANCY_STORE_MAX_AGE", 86400))
+
+    # Хранилище результатов поиска: memory или sqlite
+    RESULT_STORE_BACKEND = os.getenv("RESULT_STORE_BACKEND", "memory")
+    RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", "results.sqlite3")
+    RESULT_TTL = float(os.getenv("RESULT_TTL", 3600))
+    RESULT_MAX_ENTRIES = int(os.getenv("RESULT_MAX_ENTRIES", 10000))
+    RESULT_MAX_BYTES = int(os.getenv("RESULT_MAX_BYTES", 256 * 1024 * 1024))
+    RESULTS_PAGE_SIZE = int(os.getenv("RESULTS_PAGE_SIZE", 20))
+    RESULTS_MAX_PAGE_SIZE = int(os.getenv("RESULTS_MAX_PAGE_SIZE", 100))
\ No newline at end of file
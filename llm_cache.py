@@ -0,0 +1,68 @@
+#llm_cache.py
+# Кэш ответов LLM на диске. Ключ - промпт целиком (вся переписка, включая ответы
+# инструментов) и строка параметров модели (llm_string: модель, top_p, температура...),
+# поэтому повтор того же вопроса к той же модели в GigaChat не отправляется,
+# а смена модели или параметров даёт новый ключ.
+# Модуль тянет langchain, поэтому импортируется только при сборке агента.
+
+import json
+import logging
+from typing import Optional
+from langchain_core.globals import set_llm_cache
+from langchain_community.cache import SQLiteCache
+from config import Config
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+llm_cache_lookups = REGISTRY.counter(
+    "llm_cache_lookups_total", "Обращения к кэшу ответов LLM по результату", ("result",)
+)
+
+# Служебные поля сообщений, которых модель не видит: id запуска, расход токенов и метаданные
+# ответа. langchain дописывает их по-разному для свежего и взятого из кэша ответа, и без
+# очистки следующий шаг агента после попадания в кэш получал бы новый ключ.
+IGNORED_MESSAGE_FIELDS = ("id", "usage_metadata", "response_metadata")
+
+
+def prompt_key(prompt: str) -> str:
+    """Промпт без служебных полей сообщений; не JSON (текстовые модели) - как есть"""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+    for message in messages:
+        kwargs = message.get("kwargs") if isinstance(message, dict) else None
+        if isinstance(kwargs, dict):
+            for field in IGNORED_MESSAGE_FIELDS:
+                kwargs.pop(field, None)
+    return json.dumps(messages, ensure_ascii=False, sort_keys=True)
+
+
+class CountingSQLiteCache(SQLiteCache):
+    """SQLiteCache из langchain с нормализованным ключом и счётчиком попаданий для /metrics"""
+
+    def lookup(self, prompt: str, llm_string: str):
+        generations = super().lookup(prompt_key(prompt), llm_string)
+        llm_cache_lookups.inc("hit" if generations is not None else "miss")
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        super().update(prompt_key(prompt), llm_string, return_val)
+
+
+def enable_llm_cache(path: Optional[str] = None) -> Optional[CountingSQLiteCache]:
+    """Включение глобального кэша langchain для всех моделей процесса
+
+    path по умолчанию - LLM_CACHE_PATH; пустая строка отключает кэш.
+    """
+    path = Config.LLM_CACHE_PATH if path is None else path
+    if not path:
+        set_llm_cache(None)
+        return None
+    cache = CountingSQLiteCache(database_path=path)
+    set_llm_cache(cache)
+    logger.info(f"Кэш ответов LLM: {path}")
+    return cache
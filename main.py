@@ -54,6 +54,7 @@ if __name__ == "__main__":
 
 import asyncio
 from bot.telegram_bot import TelegramBot
+from config import Config
 
 async def main():
     """Основная функция запуска"""
@@ -61,4 +62,9 @@ async def main():
     await bot.run()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if Config.BOT_MODE == "webhook":
+        # Обновления принимает ASGI-приложение, uvicorn сам управляет циклом событий
+        from bot.webhook import run_webhook
+        run_webhook()
+    else:
+        asyncio.run(main())
\ No newline at end of file
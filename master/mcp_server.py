@@ -6,64 +6,139 @@ import uuid
 import asyncio
 import time
 import logging
-from fastmcp import FastMCP
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastmcp import FastMCP, Context
 
-# Добавляем корневую директорию в путь поиска модулей
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(current_dir)
-sys.path.append(project_root)
+# При запуске скриптом (python master/mcp_server.py) корня проекта нет в пути поиска модулей;
+# при импорте как master.mcp_server sys.path не трогаем
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if not __package__:
+    sys.path.append(project_root)
 
-# Теперь можем импортировать наши модули
 from agents.hh_parser import HHParser
-from models.schemas import VacancyBase, VacancyRequest, VacancyResponse
+from agents.http_pool import close_session
+from agents.resilience import hh_breaker, hh_limiter
+from master.result_store import create_result_store
+from models.schemas import VacancyRequest, BatchItem
+from models.records import VACANCY_FIELDS, SearchResult, VacancyRecord
 from config import Config
+from codec import dumps_str
+from metrics import REGISTRY, get_trace, slowest_traces, timed, trace
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("mcp_server")
 
-# Создание MCP-сервера
-mcp = FastMCP("HH.ru Vacancy Parser Service")
+@asynccontextmanager
+async def lifespan(server):
+    """Закрытие пула HTTP-соединений при остановке сервера"""
+    try:
+        yield
+    finally:
+        await close_session()
 
-# Инициализация парсера
-parser = HHParser()
+# Создание MCP-сервера
+mcp = FastMCP("HH.ru Vacancy Parser Service", lifespan=lifespan)
 
-# Глобальные переменные для хранения состояния
-results = {}
+# Парсер и хранилище результатов создаются при первом обращении: импорт модуля
+# не открывает файлы SQLite и не создаёт кэши
+_parser: Optional[HHParser] = None
+_results = None
 processed_requests = 0
 start_time = time.time()
 
-def handle_vacancy_request(params: dict) -> dict:
+# Ограничение числа одновременных обращений к HH.ru из инструментов
+request_semaphore = asyncio.Semaphore(Config.MAX_CONCURRENT_REQUESTS)
+
+def get_parser() -> HHParser:
+    global _parser
+    if _parser is None:
+        _parser = HHParser()
+    return _parser
+
+def get_result_store():
+    global _results
+    if _results is None:
+        _results = create_result_store()
+    return _results
+
+# Значения, снимаемые при экспорте метрик (пока парсер не создан, пропускаются)
+REGISTRY.gauge("mcp_processed_requests_total", "Обработано поисковых запросов",
+               lambda: processed_requests, kind="counter")
+REGISTRY.gauge("hh_cache_hits_total", "Попадания в кэш ответов HH.ru", lambda: _parser.cache.hits, kind="counter")
+REGISTRY.gauge("hh_cache_misses_total", "Промахи кэша ответов HH.ru", lambda: _parser.cache.misses, kind="counter")
+REGISTRY.gauge("hh_cache_hit_ratio", "Доля попаданий в кэш ответов HH.ru",
+               lambda: _parser.cache.stats()["hit_ratio"])
+REGISTRY.gauge("vacancy_store_hit_ratio", "Доля попаданий в локальное хранилище вакансий",
+               lambda: _parser.store.stats()["hit_ratio"])
+REGISTRY.gauge("result_store_entries", "Результатов в хранилище", lambda: len(_results))
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Список полей вакансии из строки вида "title,url,salary" """
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in VACANCY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+def project_vacancies(vacancies: List[VacancyRecord], fields: Optional[List[str]]) -> List[dict]:
+    """Сериализация вакансий только с запрошенными полями"""
+    if fields is None:
+        return [vacancy.to_dict() for vacancy in vacancies]
+    return [{name: getattr(vacancy, name) for name in fields} for vacancy in vacancies]
+
+async def handle_vacancy_request(params: dict, ctx: Context = None, stream: bool = False,
+                                 fields: Optional[str] = None, pages: int = 1,
+                                 mode: str = Config.SEARCH_MODE) -> dict:
     """Обработка запроса на поиск вакансий на HH.ru
     
     Args:
         params: Словарь с параметрами запроса
+        ctx: Контекст MCP для потоковой отправки вакансий
+        stream: Отправлять вакансии уведомлениями о прогрессе по мере разбора страниц
+        fields: Поля вакансий в потоке через запятую (по умолчанию все)
+        pages: Количество страниц выдачи, от 1 до MAX_PAGES
+        mode: Режим поиска: live, local_first или local
         
     Returns:
         Словарь с результатами обработки
     """
     global processed_requests
+    # Те же границы, что у BatchItem; HHParser дополнительно ограничивает глубину выдачи
+    if not 1 <= pages <= Config.MAX_PAGES:
+        return {"status": "error", "message": f"pages must be between 1 and {Config.MAX_PAGES}"}
+    request_id = str(uuid.uuid4())
+    parser, results = get_parser(), get_result_store()
     try:
-        # Создаем объект запроса из параметров
-        request = VacancyRequest(**params)
-        request_id = str(uuid.uuid4())
-        
-        # Логируем запрос
-        logger.info(f"Получен запрос {request_id} от пользователя {request.user_id}: {request.query}")
-        
-        # Получаем вакансии
-        vacancies = asyncio.run(parser.fetch_vacancies(request.query))
-        
-        # Формируем ответ
-        response = VacancyResponse(
-            vacancies=vacancies,
-            user_id=request.user_id,
-            request_id=request_id
-        )
-        
-        # Сохраняем результат
-        results[request_id] = response
-        processed_requests += 1
+        with trace(request_id, "handle_request"):
+            # Создаем объект запроса из параметров
+            with timed("validation"):
+                request = VacancyRequest(**params)
+                projection = parse_fields(fields)
+            
+            # Логируем запрос
+            logger.info(f"Получен запрос {request_id} от пользователя {request.user_id}: {request.query}")
+            
+            # Получаем вакансии в цикле событий сервера
+            async with request_semaphore:
+                if stream and ctx is not None:
+                    vacancies = []
+                    async for page in parser.iter_vacancies(request.query, pages=pages, mode=mode):
+                        vacancies.extend(page)
+                        await ctx.report_progress(len(vacancies), None, dumps_str({
+                            "request_id": request_id,
+                            "vacancies": project_vacancies(page, projection)
+                        }))
+                else:
+                    vacancies = await parser.fetch_vacancies(request.query, pages=pages, mode=mode)
+            
+            # Формируем ответ
+            response = SearchResult(request_id, request.user_id, vacancies)
+            
+            # Сохраняем результат
+            results[request_id] = response
+            processed_requests += 1
         
         return {
             "status": "success",
@@ -77,59 +152,244 @@ def handle_vacancy_request(params: dict) -> dict:
             "message": str(e)
         }
 
+async def handle_batch(items: List[BatchItem], user_id: int, ctx: Context = None,
+                       mode: str = Config.SEARCH_MODE) -> dict:
+    """Параллельная обработка нескольких поисковых запросов
+
+    Все запросы делят общий лимит одновременных обращений к HH.ru. По мере
+    завершения каждого запроса клиенту отправляется прогресс с его статусом.
+
+    Returns:
+        request_id пакета (по нему доступны все вакансии) и статусы запросов
+        с собственными request_id
+    """
+    global processed_requests
+    if not items:
+        return {"status": "error", "message": "Empty batch"}
+    if len(items) > Config.MAX_BATCH_ITEMS:
+        return {"status": "error", "message": f"Too many items, maximum is {Config.MAX_BATCH_ITEMS}"}
+
+    batch_id = str(uuid.uuid4())
+    parser, results = get_parser(), get_result_store()
+    logger.info(f"Получен пакет {batch_id} из {len(items)} запросов от пользователя {user_id}")
+    statuses = [None] * len(items)
+    found = [[] for _ in items]
+    done = 0
+
+    async def run_item(index: int, item: BatchItem):
+        nonlocal done
+        item_id = f"{batch_id}-{index}"
+        try:
+            async with request_semaphore:
+                vacancies = await parser.fetch_vacancies(item.query, area=item.area, pages=item.pages, mode=mode)
+            results[item_id] = SearchResult(item_id, user_id, vacancies)
+            found[index] = vacancies
+            statuses[index] = {
+                "index": index,
+                "query": item.query,
+                "status": "success",
+                "request_id": item_id,
+                "vacancies_count": len(vacancies)
+            }
+        except Exception as e:
+            logger.error(f"Ошибка обработки запроса {item_id}: {str(e)}")
+            statuses[index] = {"index": index, "query": item.query, "status": "error", "message": str(e)}
+        done += 1
+        if ctx is not None:
+            # Частичный результат: статус только что завершённого запроса в JSON
+            await ctx.report_progress(done, len(items), dumps_str(statuses[index]))
+
+    with trace(batch_id, "handle_batch"):
+        await asyncio.gather(*(run_item(index, item) for index, item in enumerate(items)))
+
+    results[batch_id] = SearchResult(batch_id, user_id, [vacancy for vacancies in found for vacancy in vacancies])
+    processed_requests += len(items)
+    failed = sum(1 for status in statuses if status["status"] != "success")
+    return {
+        "status": "success" if not failed else ("partial" if failed < len(items) else "error"),
+        "request_id": batch_id,
+        "items": statuses
+    }
+
+def resolve_dataset_path(file_path: str) -> Optional[str]:
+    """Путь к набору внутри DATASET_DIR или None, если file_path выходит за его пределы
+
+    Путь клиента считается от DATASET_DIR; «..» и символические ссылки раскрываются
+    до проверки, поэтому и агрегаты salary_analytics пишутся только внутри каталога.
+    """
+    base = os.path.realpath(Config.DATASET_DIR)
+    path = os.path.realpath(os.path.join(base, file_path))
+    if path == base or os.path.commonpath([base, path]) != base:
+        return None
+    return path
+
+async def get_salary_stats(file_path: str, group_by: Optional[str] = None, limit: int = 20) -> dict:
+    """Статистика зарплат по сохранённому набору вакансий из DATASET_DIR
+
+    Расчёт идёт кусками в отдельном потоке, чтобы не блокировать цикл событий.
+    """
+    path = resolve_dataset_path(file_path)
+    if path is None:
+        return {"status": "error", "message": f"File is outside the dataset directory: {file_path}"}
+    # pandas нужен только здесь, поэтому не загружается при старте сервера
+    from salary_analytics import salary_stats
+    try:
+        stats = await asyncio.to_thread(salary_stats, path, group_by, limit)
+    except FileNotFoundError:
+        return {"status": "error", "message": f"File not found: {file_path}"}
+    except Exception as e:
+        logger.error(f"Ошибка расчёта статистики зарплат: {str(e)}")
+        return {"status": "error", "message": str(e)}
+    return {"status": "success", "dataset": file_path, **stats}
+
 def get_system_status() -> dict:
     """Получение статуса системы"""
+    parser, results = get_parser(), get_result_store()
     return {
         "status": "running",
         "uptime": int(time.time() - start_time),
         "processed_requests": processed_requests,
+        "cache": parser.cache.stats(),
+        "upstream": {"limiter": hh_limiter.stats(), "breaker": hh_breaker.stats()},
+        "results": results.stats(),
+        "store": parser.store.stats() if parser.store is not None else None,
+        "stages": REGISTRY.metrics["stage_latency_seconds"].snapshot(),
         "version": "1.0"
     }
 
-def get_results(request_id: str) -> dict:
+def get_metrics(limit: int = 10) -> dict:
+    """Метрики процесса и самые долгие из последних запросов"""
+    return {"metrics": REGISTRY.snapshot(), "slowest": slowest_traces(limit)}
+
+def get_request_trace(request_id: str) -> dict:
+    """Этапы обработки запроса с длительностями"""
+    found = get_trace(request_id)
+    if found is None:
+        return {"status": "error", "message": "Trace not found"}
+    return found
+
+def get_results(request_id: str, cursor: Optional[str] = None, limit: Optional[int] = None,
+                fields: Optional[str] = None) -> dict:
     """Получение результатов по ID запроса
     
+    Без cursor, limit и fields возвращается весь ответ. Иначе возвращается одна
+    страница вакансий с запрошенными полями и next_cursor для следующей страницы.
+    
     Args:
         request_id: ID запроса
+        cursor: Курсор страницы из next_cursor предыдущего ответа
+        limit: Размер страницы
+        fields: Поля вакансий через запятую, например "title,url,salary"
         
     Returns:
         Результаты обработки или сообщение об ошибке
     """
-    if request_id in results:
-        return results[request_id].dict()
+    response = get_result_store().get(request_id)
+    if response is None:
+        return {
+            "status": "error",
+            "message": "Request ID not found"
+        }
+    if cursor is None and limit is None and fields is None:
+        return response.to_dict()
+
+    try:
+        projection = parse_fields(fields)
+        offset = int(cursor) if cursor else 0
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    # Отрицательный курсор дал бы срез с конца и next_cursor "0" - клиент ходил бы по кругу
+    if offset < 0:
+        return {"status": "error", "message": "cursor must be a non-negative integer"}
+    if limit is not None and limit < 1:
+        return {"status": "error", "message": "limit must be a positive integer"}
+    size = min(limit or Config.RESULTS_PAGE_SIZE, Config.RESULTS_MAX_PAGE_SIZE)
+    page = response.vacancies[offset:offset + size]
+    next_offset = offset + len(page)
     return {
-        "status": "error",
-        "message": "Request ID not found"
+        "request_id": response.request_id,
+        "user_id": response.user_id,
+        "total": len(response.vacancies),
+        "vacancies": project_vacancies(page, projection),
+        "next_cursor": str(next_offset) if next_offset < len(response.vacancies) else None
     }
 
 # Регистрация инструментов и ресурсов
 @mcp.tool
-def handle_request(query: str, user_id: int) -> dict:
+async def handle_request(query: str, user_id: int, ctx: Context, pages: int = 1, stream: bool = False,
+                         fields: Optional[str] = None, mode: str = Config.SEARCH_MODE) -> dict:
     """Обработка запроса на поиск вакансий
     
     Args:
         query: Поисковый запрос
         user_id: ID пользователя Telegram
+        pages: Количество страниц выдачи, от 1 до MAX_PAGES
+        stream: Присылать вакансии уведомлениями о прогрессе по мере разбора
+        fields: Поля вакансий в потоке через запятую, например "title,url,salary"
+        mode: live - поиск на HH.ru, local_first - из локального хранилища, а на HH.ru
+            только при промахе или устаревших данных, local - только локальное хранилище
     """
-    return handle_vacancy_request({"query": query, "user_id": user_id})
+    return await handle_vacancy_request({"query": query, "user_id": user_id}, ctx, stream, fields, pages, mode)
 
-@mcp.resource
+@mcp.tool
+async def handle_batch_request(items: List[BatchItem], user_id: int, ctx: Context,
+                               mode: str = Config.SEARCH_MODE) -> dict:
+    """Пакетный поиск вакансий: несколько запросов за один вызов
+
+    Args:
+        items: Список запросов (query, area, pages)
+        user_id: ID пользователя Telegram
+        mode: Режим поиска: live, local_first или local
+    """
+    return await handle_batch(items, user_id, ctx, mode)
+
+@mcp.tool
+async def salary_statistics(file_path: str, group_by: Optional[str] = None, limit: int = 20) -> dict:
+    """Статистика зарплат в рублях по набору вакансий (.csv, .parquet, .feather)
+
+    Args:
+        file_path: Путь к набору вакансий относительно каталога наборов сервера
+        group_by: Группировка: city, experience, employer или schedule
+        limit: Сколько самых крупных групп вернуть
+    """
+    return await get_salary_stats(file_path, group_by, limit)
+
+@mcp.resource("status://system")
 def system_status() -> dict:
     """Получение статуса системы"""
     return get_system_status()
 
-@mcp.resource
-def get_results_resource(request_id: str) -> dict:
-    """Получение результатов по ID запроса
+@mcp.resource("metrics://server")
+def metrics_resource() -> dict:
+    """Метрики сервера: задержки этапов, обращения к HH.ru, кэши, самые долгие запросы"""
+    return get_metrics()
+
+@mcp.resource("traces://{request_id}")
+def trace_resource(request_id: str) -> dict:
+    """Трасса запроса по этапам: валидация, ожидание лимита, HH.ru, разбор"""
+    return get_request_trace(request_id)
+
+@mcp.resource("results://{request_id}{?cursor,limit,fields}")
+def get_results_resource(request_id: str, cursor: Optional[str] = None, limit: Optional[int] = None,
+                         fields: Optional[str] = None) -> dict:
+    """Получение результатов по ID запроса, постранично и с выбором полей
     
     Args:
         request_id: ID запроса
+        cursor: Курсор следующей страницы (next_cursor)
+        limit: Размер страницы
+        fields: Поля вакансий через запятую
     """
-    return get_results(request_id)
+    return get_results(request_id, cursor, limit, fields)
 
 # Запуск сервера
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     logger.info("Запуск MCP-сервера...")
     logger.info(f"Рабочая директория: {os.getcwd()}")
     logger.info(f"Путь проекта: {project_root}")
-    mcp.run()
\ No newline at end of file
+    if Config.MCP_TRANSPORT == "stdio":
+        mcp.run()
+    else:
+        # По сети к серверу подключаются бот и другие долгоживущие клиенты
+        mcp.run(transport=Config.MCP_TRANSPORT, host=Config.MCP_HOST, port=Config.MCP_PORT)
\ No newline at end of file
@@ -0,0 +1,190 @@
+# result_store.py
+
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+from models.records import SearchResult
+from config import Config
+
+
+class ResultStore(ABC):
+    """Хранилище результатов поиска с TTL, лимитом записей и объёма (LRU)"""
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, request_id: str) -> Optional[SearchResult]:
+        """Результат или None, если его нет или срок хранения истёк"""
+
+    @abstractmethod
+    def put(self, request_id: str, response: SearchResult):
+        """Сохранение результата с вытеснением по лимитам"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Число хранимых результатов"""
+
+    def __contains__(self, request_id: str) -> bool:
+        return self.get(request_id) is not None
+
+    def __getitem__(self, request_id: str) -> SearchResult:
+        response = self.get(request_id)
+        if response is None:
+            raise KeyError(request_id)
+        return response
+
+    def __setitem__(self, request_id: str, response: SearchResult):
+        self.put(request_id, response)
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        }
+
+
+class MemoryResultStore(ResultStore):
+    """Хранение результатов в памяти процесса"""
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        super().__init__(ttl, max_entries, max_bytes)
+        self._data: "OrderedDict[str, tuple[float, int, SearchResult]]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, request_id: str) -> Optional[SearchResult]:
+        entry = self._data.get(request_id)
+        if entry is None:
+            return None
+        expires_at, _, response = entry
+        if expires_at < time.monotonic():
+            self._remove(request_id)
+            return None
+        self._data.move_to_end(request_id)
+        return response
+
+    def put(self, request_id: str, response: SearchResult):
+        if request_id in self._data:
+            self._remove(request_id)
+        # Объём оцениваем по размеру сериализованного ответа
+        size = len(response.to_json())
+        self._data[request_id] = (time.monotonic() + self.ttl, size, response)
+        self._bytes += size
+        self._evict()
+
+    def _remove(self, request_id: str):
+        _, size, _ = self._data.pop(request_id)
+        self._bytes -= size
+
+    def _evict(self):
+        now = time.monotonic()
+        for request_id in [key for key, (expires_at, _, _) in self._data.items() if expires_at < now]:
+            self._remove(request_id)
+            self.evictions += 1
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["bytes"] = self._bytes
+        return stats
+
+
+class SQLiteResultStore(ResultStore):
+    """Хранение результатов на диске в SQLite, переживает перезапуск сервера"""
+
+    def __init__(self, path: str, ttl: float, max_entries: int, max_bytes: int):
+        super().__init__(ttl, max_entries, max_bytes)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "request_id TEXT PRIMARY KEY, payload TEXT NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed_at)")
+        self._conn.commit()
+
+    def get(self, request_id: str) -> Optional[SearchResult]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM results WHERE request_id = ?", (request_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            payload, expires_at = row
+            if expires_at < now:
+                self._conn.execute("DELETE FROM results WHERE request_id = ?", (request_id,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE results SET accessed_at = ? WHERE request_id = ?", (now, request_id))
+            self._conn.commit()
+        return SearchResult.from_json(payload)
+
+    def put(self, request_id: str, response: SearchResult):
+        payload = response.to_json()
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (request_id, payload, len(payload), now + self.ttl, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        cursor = self._conn.execute("DELETE FROM results WHERE expires_at < ?", (now,))
+        self.evictions += max(cursor.rowcount, 0)
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Удаляем давно не читавшиеся записи, пока не уложимся в лимиты
+        for request_id, size in self._conn.execute(
+            "SELECT request_id, size FROM results ORDER BY accessed_at"
+        ).fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM results WHERE request_id = ?", (request_id,))
+            count -= 1
+            total -= size
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_result_store() -> ResultStore:
+    """Хранилище результатов по настройкам Config"""
+    if Config.RESULT_STORE_BACKEND == "sqlite":
+        return SQLiteResultStore(
+            Config.RESULT_STORE_PATH,
+            ttl=Config.RESULT_TTL,
+            max_entries=Config.RESULT_MAX_ENTRIES,
+            max_bytes=Config.RESULT_MAX_BYTES
+        )
+    return MemoryResultStore(
+        ttl=Config.RESULT_TTL,
+        max_entries=Config.RESULT_MAX_ENTRIES,
+        max_bytes=Config.RESULT_MAX_BYTES
+    )
@@ -0,0 +1,275 @@
+#metrics.py
+# Встроенные метрики процесса (формат Prometheus) и трассировка запросов по этапам
+
+import time
+import uuid
+import bisect
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+from config import Config
+
+# Границы корзин гистограмм задержки, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# ID текущего запроса и этапы его трассы: задаются в handle_request и на агенте,
+# наследуются всеми задачами asyncio, созданными внутри
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_spans_var: ContextVar[Optional[list]] = ContextVar("spans", default=None)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """Монотонный счётчик с метками"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, value: float = 1.0):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self.values.items())
+        lines += [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in items]
+        return lines
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {",".join(key) or "total": value for key, value in self.values.items()}
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами и метками"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # метки -> [счётчики корзин (последняя - +Inf), сумма, число]
+        self.values: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def quantile(self, q: float, *labels) -> Optional[float]:
+        """Оценка квантиля по корзинам: верхняя граница корзины, в которую он попал"""
+        with self._lock:
+            entry = self.values.get(labels)
+            if entry is None or not entry[2]:
+                return None
+            counts, _, total = entry[0][:], entry[1], entry[2]
+        target = q * total
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, (counts[:], total_sum, total)) for key, (counts, total_sum, total) in self.values.items()]
+        for key, (counts, total_sum, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total_sum}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {total}")
+        return lines
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            keys = [(key, entry[1], entry[2]) for key, entry in self.values.items()]
+        return {
+            ",".join(key) or "total": {
+                "count": total,
+                "avg_ms": round(total_sum / total * 1000, 2) if total else 0.0,
+                "p50_ms": _ms(self.quantile(0.5, *key)),
+                "p99_ms": _ms(self.quantile(0.99, *key))
+            }
+            for key, total_sum, total in keys
+        }
+
+
+def _ms(seconds: Optional[float]):
+    if seconds is None:
+        return None
+    return "inf" if seconds == float("inf") else round(seconds * 1000, 2)
+
+
+class Registry:
+    """Метрики процесса и значения, снимаемые в момент экспорта (глубина очереди, кэши)"""
+
+    def __init__(self):
+        self.metrics: "OrderedDict[str, object]" = OrderedDict()
+        self.collectors: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, collect: Callable[[], float], kind: str = "gauge"):
+        """Значение, вычисляемое при экспорте; kind - тип Prometheus (gauge или counter)"""
+        self.collectors[name] = (help, collect, kind)
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus 0.0.4"""
+        lines = []
+        for metric in self.metrics.values():
+            lines += metric.render()
+        for name, (help, collect, kind) in self.collectors.items():
+            try:
+                value = collect()
+            except Exception:
+                continue
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}", f"{name} {float(value)}"]
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Метрики словарём: для MCP-ресурса и статуса"""
+        result = {name: metric.snapshot() for name, metric in self.metrics.items()}
+        for name, (_, collect, _) in self.collectors.items():
+            try:
+                result[name] = collect()
+            except Exception:
+                result[name] = None
+        return result
+
+
+REGISTRY = Registry()
+
+stage_latency = REGISTRY.histogram(
+    "stage_latency_seconds", "Длительность этапов обработки запроса", ("stage",)
+)
+upstream_requests = REGISTRY.counter(
+    "upstream_requests_total", "Обращения к внешним API по результату", ("service", "result")
+)
+
+
+def upstream_result(status: Optional[int]) -> str:
+    """Метка результата обращения по HTTP-статусу (None - сетевая ошибка)"""
+    if status is None:
+        return "network_error"
+    if status == 429:
+        return "throttled"
+    if status >= 500:
+        return "server_error"
+    if status >= 400:
+        return "client_error"
+    return "ok"
+
+
+class _Timer:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_span(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+def timed(stage: str) -> _Timer:
+    """Замер этапа: в гистограмму stage_latency_seconds и в трассу текущего запроса
+
+    Работает и в синхронном коде, и в корутинах:
+        with timed("hh_api"):
+            ...
+    """
+    return _Timer(stage)
+
+
+def record_span(stage: str, seconds: float):
+    stage_latency.observe(seconds, stage)
+    spans = _spans_var.get()
+    if spans is not None:
+        spans.append((stage, round(seconds, 6)))
+
+
+def new_request_id() -> str:
+    return str(uuid.uuid4())
+
+
+# Последние трассы: request_id -> {"request_id", "total_ms", "spans"}
+_traces: "OrderedDict[str, dict]" = OrderedDict()
+_traces_lock = threading.Lock()
+
+
+@contextmanager
+def trace(request_id: Optional[str] = None, stage: str = "request"):
+    """Трасса запроса: задаёт request_id и собирает этапы, выполненные внутри
+
+    Возвращает список этапов [(stage, seconds)], в который можно добавить этапы,
+    выполненные в других процессах (например, присланные агентом).
+    """
+    request_id = request_id or new_request_id()
+    spans: list = []
+    id_token = request_id_var.set(request_id)
+    spans_token = _spans_var.set(spans)
+    started = time.perf_counter()
+    try:
+        yield spans
+    finally:
+        elapsed = time.perf_counter() - started
+        _spans_var.reset(spans_token)
+        request_id_var.reset(id_token)
+        record_span(stage, elapsed)
+        with _traces_lock:
+            _traces[request_id] = {
+                "request_id": request_id,
+                "total_ms": round(elapsed * 1000, 2),
+                "spans": [{"stage": name, "ms": round(seconds * 1000, 2)} for name, seconds in spans]
+            }
+            _traces.move_to_end(request_id)
+            while len(_traces) > Config.TRACE_BUFFER:
+                _traces.popitem(last=False)
+
+
+def get_trace(request_id: str) -> Optional[dict]:
+    with _traces_lock:
+        return _traces.get(request_id)
+
+
+def slowest_traces(limit: int = 10) -> List[dict]:
+    """Самые долгие из последних трасс"""
+    with _traces_lock:
+        traces = list(_traces.values())
+    return sorted(traces, key=lambda item: item["total_ms"], reverse=True)[:limit]
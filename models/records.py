@@ -0,0 +1,60 @@
+# records.py
+# Внутреннее представление вакансий на горячем пути разбор -> хранение -> сериализация.
+# Pydantic-модели из schemas.py проверяют данные только на границе API.
+
+from dataclasses import dataclass, fields
+from typing import List, Optional
+from codec import dumps, loads
+
+
+@dataclass(slots=True)
+class VacancyRecord:
+    """Вакансия без валидации: поля как у VacancyBase"""
+    title: str
+    company: str
+    salary: Optional[str]
+    url: str
+    description: Optional[str]
+
+    def to_dict(self) -> dict:
+        return {
+            "title": self.title,
+            "company": self.company,
+            "salary": self.salary,
+            "url": self.url,
+            "description": self.description
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VacancyRecord":
+        return cls(data["title"], data["company"], data.get("salary"), data["url"], data.get("description"))
+
+
+VACANCY_FIELDS = tuple(field.name for field in fields(VacancyRecord))
+
+
+@dataclass(slots=True)
+class SearchResult:
+    """Результат поиска в хранилище результатов: поля как у VacancyResponse"""
+    request_id: str
+    user_id: int
+    vacancies: List[VacancyRecord]
+
+    def to_dict(self) -> dict:
+        return {
+            "vacancies": [vacancy.to_dict() for vacancy in self.vacancies],
+            "user_id": self.user_id,
+            "request_id": self.request_id
+        }
+
+    def to_json(self) -> bytes:
+        return dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, payload) -> "SearchResult":
+        data = loads(payload)
+        return cls(
+            data["request_id"],
+            data["user_id"],
+            [VacancyRecord.from_dict(vacancy) for vacancy in data["vacancies"]]
+        )
@@ -1,7 +1,8 @@
 # schemas.py
 
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional, Tuple
+from config import Config
 
 class VacancyBase(BaseModel):
     title: str
@@ -14,7 +15,22 @@ class VacancyRequest(BaseModel):
     query: str
     user_id: int
 
+class BatchItem(BaseModel):
+    query: str
+    # ID региона HH.ru - положительное число
+    area: int = Field(1, ge=1)
+    pages: int = Field(1, ge=1, le=Config.MAX_PAGES)
+
 class VacancyResponse(BaseModel):
     vacancies: List[VacancyBase]
     user_id: int
-    request_id: str
\ No newline at end of file
+    request_id: str
+
+class AgentRegister(BaseModel):
+    agent_id: str
+
+class TaskResult(BaseModel):
+    request_id: str
+    vacancies: List[VacancyBase]
+    # Этапы обработки на агенте: (этап, секунды)
+    spans: List[Tuple[str, float]] = []
\ No newline at end of file
@@ -0,0 +1,265 @@
+#salary_analytics
+
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import Iterator, Optional
+from config import Config
+from agentparser import dataset_format
+
+# Курсы валют как в справочнике HH.ru (/dictionaries, поле rate): единиц валюты за один рубль
+CURRENCY_RATES = {
+    "RUR": 1.0,
+    "USD": 0.0125,
+    "EUR": 0.0107,
+    "KZT": 6.2,
+    "BYR": 0.037,
+    "UZS": 160.0,
+    "AZN": 0.021,
+    "GEL": 0.034,
+    "KGS": 1.08,
+}
+GROUP_COLUMNS = ('city', 'experience', 'employer', 'schedule')
+SALARY_COLUMNS = ['salary_from', 'salary_to', 'currency']
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_BUCKETS = 10
+TOTAL = "Все вакансии"
+UNKNOWN = "Не указано"
+
+
+def salary_estimate(df, rates=CURRENCY_RATES):
+    """Зарплата в рублях: середина вилки, а если указана одна граница - она сама.
+
+    Вакансии в валюте без курса и без обеих границ получают NaN.
+    """
+    rate = df['currency'].astype('string').map(rates).astype('float64')
+    low = pd.to_numeric(df['salary_from'], errors='coerce') / rate
+    high = pd.to_numeric(df['salary_to'], errors='coerce') / rate
+    return ((low + high) / 2).fillna(low).fillna(high)
+
+
+class SalaryAggregate:
+    """Сливаемые агрегаты зарплат по группам: число, сумма, минимум, максимум и гистограмма.
+
+    Набор обрабатывается кусками, в памяти держатся только агрегаты. Гистограмма
+    с шагом bin_width рублей хранится разреженно (группа, корзина) -> число,
+    медиана и перцентили восстанавливаются по ней с точностью до шага.
+    """
+
+    def __init__(self, group_by: Optional[str] = None, rates=CURRENCY_RATES, bin_width: float = 1000):
+        self.group_by = group_by
+        self.rates = rates
+        self.bin_width = bin_width
+        self.vacancies = pd.Series(dtype='int64')
+        self.totals: Optional[pd.DataFrame] = None
+        self.histogram: Optional[pd.Series] = None
+
+    def update(self, df):
+        """Добавление куска набора"""
+        if self.group_by:
+            keys = df[self.group_by].astype('string').fillna(UNKNOWN)
+        else:
+            keys = pd.Series(TOTAL, index=df.index, dtype='string')
+        self.vacancies = self.vacancies.add(keys.value_counts(), fill_value=0)
+
+        salary = salary_estimate(df, self.rates)
+        mask = salary > 0
+        salary, keys = salary[mask], keys[mask]
+        if salary.empty:
+            return
+
+        totals = salary.groupby(keys).agg(['count', 'sum', 'min', 'max'])
+        if self.totals is None:
+            self.totals = totals
+        else:
+            merged = self.totals.reindex(self.totals.index.union(totals.index))
+            other = totals.reindex(merged.index)
+            merged['count'] = merged['count'].fillna(0) + other['count'].fillna(0)
+            merged['sum'] = merged['sum'].fillna(0) + other['sum'].fillna(0)
+            merged['min'] = np.fmin(merged['min'], other['min'])
+            merged['max'] = np.fmax(merged['max'], other['max'])
+            self.totals = merged
+
+        bins = (salary // self.bin_width).astype('int64')
+        counts = pd.DataFrame({'group': keys.to_numpy(), 'bin': bins.to_numpy()}).value_counts()
+        self.histogram = counts if self.histogram is None else self.histogram.add(counts, fill_value=0)
+
+    def _group_stats(self, group: str) -> dict:
+        totals = self.totals.loc[group]
+        counts = self.histogram.xs(group, level='group').sort_index()
+        bins = counts.index.to_numpy(dtype='float64')
+        weights = counts.to_numpy(dtype='float64')
+        cumulative = np.cumsum(weights)
+
+        # Перцентиль - линейная интерполяция внутри корзины гистограммы
+        targets = np.array(PERCENTILES) / 100 * cumulative[-1]
+        index = np.searchsorted(cumulative, targets, side='left')
+        before = np.where(index > 0, cumulative[np.maximum(index - 1, 0)], 0.0)
+        values = (bins[index] + (targets - before) / weights[index]) * self.bin_width
+        values = np.clip(values, totals['min'], totals['max'])
+
+        # Гистограмма для вывода: равные интервалы до 99-го перцентиля, остальное - в последнем
+        upper = bins[min(np.searchsorted(cumulative, 0.99 * cumulative[-1]), len(bins) - 1)] + 1
+        edges = np.linspace(bins[0], max(upper, bins[0] + 1), HISTOGRAM_BUCKETS + 1)
+        bucket = np.clip(np.searchsorted(edges, bins, side='right') - 1, 0, HISTOGRAM_BUCKETS - 1)
+        bucket_counts = np.bincount(bucket, weights=weights, minlength=HISTOGRAM_BUCKETS)
+        histogram = [
+            {
+                "from": round(edges[i] * self.bin_width),
+                "to": round(edges[i + 1] * self.bin_width) if i < HISTOGRAM_BUCKETS - 1 else None,
+                "count": int(bucket_counts[i])
+            }
+            for i in range(HISTOGRAM_BUCKETS)
+        ]
+
+        stats = {
+            "group": group,
+            "vacancies": int(self.vacancies.get(group, 0)),
+            "with_salary": int(totals['count']),
+            "mean": round(totals['sum'] / totals['count']),
+            "min": round(totals['min']),
+            "max": round(totals['max']),
+        }
+        stats.update({f"p{q}": round(value) for q, value in zip(PERCENTILES, values)})
+        stats["median"] = stats["p50"]
+        stats["histogram"] = histogram
+        return stats
+
+    def result(self, limit: int = 20) -> dict:
+        """Статистика по limit самым крупным группам (по числу вакансий с зарплатой)"""
+        if self.totals is None:
+            groups = []
+        else:
+            groups = self.totals['count'].sort_values(ascending=False, kind='stable').index[:limit]
+        return {
+            "group_by": self.group_by,
+            "currency": "RUR",
+            "vacancies": int(self.vacancies.sum()),
+            "with_salary": int(self.totals['count'].sum()) if self.totals is not None else 0,
+            "groups": [self._group_stats(group) for group in groups]
+        }
+
+
+def iter_chunks(file_path, columns, chunk_rows) -> Iterator[pd.DataFrame]:
+    """Набор вакансий кусками по chunk_rows строк, читаются только нужные столбцы.
+
+    Parquet читается по пакетам, Feather - через отображение файла в память,
+    поэтому файл может быть больше оперативной памяти.
+
+    Raises:
+        ValueError: в наборе нет нужного столбца
+    """
+    fmt = dataset_format(file_path)
+    if fmt == 'csv':
+        available = pd.read_csv(file_path, nrows=0).columns
+        _check_columns(columns, available)
+        yield from pd.read_csv(file_path, usecols=columns, chunksize=chunk_rows)
+        return
+
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+    if fmt == 'parquet':
+        parquet_file = pyarrow.parquet.ParquetFile(file_path)
+        _check_columns(columns, parquet_file.schema_arrow.names)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    with pyarrow.memory_map(file_path) as source:
+        reader = pyarrow.ipc.open_file(source)
+        _check_columns(columns, reader.schema.names)
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i).select(columns)
+            for offset in range(0, batch.num_rows, chunk_rows):
+                yield batch.slice(offset, chunk_rows).to_pandas()
+
+
+def _check_columns(columns, available):
+    missing = [col for col in columns if col not in available]
+    if missing:
+        raise ValueError(f"В наборе нет столбцов: {', '.join(missing)}")
+
+
+def _cache_path(file_path):
+    """Файл с готовыми агрегатами рядом с набором"""
+    return f"{file_path}.salary.json"
+
+
+def _load_cache(file_path, signature) -> dict:
+    """Сохранённые агрегаты, если набор не менялся с момента их расчёта"""
+    try:
+        with open(_cache_path(file_path), encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache.get("entries", {}) if cache.get("signature") == signature else {}
+
+
+def _save_cache(file_path, signature, entries):
+    path = _cache_path(file_path)
+    try:
+        with open(path + ".tmp", "w", encoding='utf-8') as f:
+            json.dump({"signature": signature, "entries": entries}, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        print(f"Не удалось сохранить агрегаты зарплат в {path}: {e}")
+
+
+def salary_stats(file_path, group_by=None, limit=20, rates=None, use_cache=True) -> dict:
+    """Статистика зарплат в рублях по набору вакансий (.csv, .parquet, .feather).
+
+    Args:
+        file_path: Путь к набору
+        group_by: Группировка: city, experience, employer или schedule (None - без группировки)
+        limit: Сколько самых крупных групп вернуть
+        rates: Курсы валют (по умолчанию CURRENCY_RATES)
+        use_cache: Брать и сохранять готовые агрегаты в файле рядом с набором
+
+    Returns:
+        Число вакансий, из них с зарплатой, и по группам: среднее, медиана, перцентили,
+        минимум, максимум и гистограмма
+
+    Raises:
+        ValueError: неизвестная группировка или в наборе нет нужных столбцов
+        FileNotFoundError: набор не найден
+    """
+    if group_by is not None and group_by not in GROUP_COLUMNS:
+        raise ValueError(f"Группировка возможна по: {', '.join(GROUP_COLUMNS)}")
+    rates = rates or CURRENCY_RATES
+    stat = os.stat(file_path)
+    signature = [stat.st_size, stat.st_mtime_ns]
+    key = json.dumps([group_by, limit, Config.SALARY_BIN_WIDTH, sorted(rates.items())])
+
+    entries = _load_cache(file_path, signature) if use_cache else {}
+    if key in entries:
+        return entries[key]
+
+    aggregate = SalaryAggregate(group_by, rates, Config.SALARY_BIN_WIDTH)
+    columns = SALARY_COLUMNS + ([group_by] if group_by else [])
+    for chunk in iter_chunks(file_path, columns, Config.ANALYTICS_CHUNK_ROWS):
+        aggregate.update(chunk)
+    result = aggregate.result(limit)
+
+    if use_cache:
+        entries[key] = result
+        _save_cache(file_path, signature, entries)
+    return result
+
+
+def format_salary_stats(stats, file_path) -> str:
+    """Текстовый отчёт для агента"""
+    if not stats["with_salary"]:
+        return f"В файле '{file_path}' нет вакансий с указанной зарплатой."
+    lines = [
+        f"Прочитано {stats['vacancies']} вакансий из файла '{file_path}', "
+        f"с зарплатой {stats['with_salary']}. Суммы в рублях (середина вилки или указанная граница)."
+    ]
+    for group in stats["groups"]:
+        lines.append(
+            f"{group['group']}: {group['with_salary']} вакансий, средняя {group['mean']}, "
+            f"медиана {group['median']}, 10-90% {group['p10']}-{group['p90']}, "
+            f"мин {group['min']}, макс {group['max']}"
+        )
+    return "\n".join(lines)
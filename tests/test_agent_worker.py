@@ -0,0 +1,67 @@
+#test_agent_worker.py
+# Цикл агента не должен падать, если отправить результат не удалось (API перезапускается)
+# Запуск: python -m pytest -q tests
+
+import os
+import sys
+import asyncio
+import aiohttp
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+os.environ["VACANCY_STORE_PATH"] = ""
+
+from agents.manager import AgentWorker
+
+
+class FlakyWorker(AgentWorker):
+    """Агент с одной задачей, отправка результата которой сначала не удаётся"""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+        self.tasks = [{"request_id": "r1", "query": "python"}]
+        self.submitted = []
+
+    async def fetch_task(self):
+        if self.tasks:
+            return self.tasks.pop()
+        raise asyncio.CancelledError
+
+    async def submit_result(self, request_id, vacancies, spans=()):
+        if self.failures:
+            self.failures -= 1
+            raise aiohttp.ClientConnectionError("API is restarting")
+        self.submitted.append(request_id)
+        return True
+
+
+async def _no_sleep():
+    return None
+
+
+async def run_loop(worker: AgentWorker):
+    async def no_vacancies(query):
+        return []
+
+    worker.parser.fetch_vacancies = no_vacancies
+    try:
+        await worker.work_loop()
+    except asyncio.CancelledError:
+        pass
+
+
+def test_submit_error_is_retried(monkeypatch):
+    monkeypatch.setattr(asyncio, "sleep", lambda delay: _no_sleep())
+    worker = FlakyWorker(failures=1)
+    asyncio.run(run_loop(worker))
+    assert worker.submitted == ["r1"]
+
+
+def test_submit_error_does_not_stop_loop(monkeypatch):
+    monkeypatch.setattr(asyncio, "sleep", lambda delay: _no_sleep())
+    worker = FlakyWorker(failures=10)
+    # Исключение отправки не выходит из work_loop: цикл доходит до следующего fetch_task
+    asyncio.run(run_loop(worker))
+    assert worker.submitted == []
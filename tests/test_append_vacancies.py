@@ -0,0 +1,30 @@
+#test_append_vacancies.py
+# Дописывание в CSV не должно терять столбцы, которых нет в его заголовке
+# Запуск: python -m pytest -q tests
+
+import os
+import sys
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+os.environ["VACANCY_STORE_PATH"] = ""
+
+from agentparser import append_vacancies
+
+
+def test_new_columns_are_kept(tmp_path):
+    path = str(tmp_path / "vacancies.csv")
+    append_vacancies(pd.DataFrame({"id": ["1"], "name": ["a"]}), path)
+    append_vacancies(pd.DataFrame({"id": ["2"], "name": ["b"], "status": ["new"]}), path)
+    df = pd.read_csv(path, dtype=str)
+    assert list(df["id"]) == ["1", "2"]
+    assert df["status"].tolist()[1] == "new"
+
+
+def test_subset_of_columns_is_appended(tmp_path):
+    path = str(tmp_path / "vacancies.csv")
+    append_vacancies(pd.DataFrame({"id": ["1"], "name": ["a"]}), path)
+    assert "дописаны" in append_vacancies(pd.DataFrame({"id": ["2"]}), path)
+    assert list(pd.read_csv(path, dtype=str)["id"]) == ["1", "2"]
@@ -0,0 +1,58 @@
+#test_cache.py
+# TTLCache: объединение одновременных загрузок (в цикле событий и в потоках) и keep
+# Запуск: python -m pytest -q tests
+
+import os
+import sys
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from agents.cache import TTLCache
+
+
+def test_get_or_fetch_coalesces_and_respects_keep():
+    cache = TTLCache(maxsize=10, ttl=60)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return []
+
+    async def run():
+        results = await asyncio.gather(*(cache.get_or_fetch("key", fetch, keep=bool) for _ in range(5)))
+        assert results == [[]] * 5
+        # Пустой результат не сохранён, следующий вызов загружает заново
+        await cache.get_or_fetch("key", fetch, keep=bool)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert cache.get("key") is None
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_get_or_compute_from_threads_computes_once():
+    cache = TTLCache(maxsize=10, ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: cache.get_or_compute("key", compute), range(8)))
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["hits"] + stats["coalesced"] == 7
+
+
+def test_get_or_compute_keep_false_is_not_cached():
+    cache = TTLCache(maxsize=10, ttl=60)
+    assert cache.get_or_compute("key", lambda: "", keep=bool) == ""
+    assert cache.get("key") is None
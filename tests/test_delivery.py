@@ -0,0 +1,130 @@
+#test_delivery.py
+# Очередь исходящих сообщений Telegram: разбиение длинных текстов (HTML не режется
+# внутри тегов), склейка очереди чата в одно сообщение и корзины чатов
+# Запуск: python -m pytest -q tests
+
+import os
+import re
+import sys
+import asyncio
+import pytest
+from collections import deque
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+os.environ["VACANCY_STORE_PATH"] = ""
+
+from bot.delivery import DeliveryQueue, OutboundMessage, SEPARATOR, split_html, split_text, text_length
+from bot.telegram_bot import format_vacancy
+
+VACANCY = {"title": "Python <dev>", "company": "ООО «Рога & копыта»", "salary": "от 100000 RUR",
+           "url": "https://hh.ru/vacancy/1?a=1&b=2", "description": "Пишем сервисы"}
+
+
+def balanced(text: str) -> bool:
+    """Каждый открытый тег закрыт, закрывающих без открывающих нет"""
+    depth = 0
+    for match in re.finditer(r"<(/?)[a-zA-Z][^>]*>", text):
+        depth += -1 if match.group(1) else 1
+        if depth < 0:
+            return False
+    return depth == 0
+
+
+def test_split_text_short_text_is_one_part():
+    assert split_text("привет", 10) == ["привет"]
+
+
+def test_split_text_prefers_line_boundaries():
+    assert split_text("aaa\nbbb\nccc", 8) == ["aaa\nbbb", "ccc"]
+
+
+def test_split_text_cuts_long_line_by_characters():
+    assert split_text("x" * 10, 4) == ["xxxx", "xxxx", "xx"]
+
+
+def test_split_text_counts_utf16_units():
+    # Эмодзи - две кодовые единицы UTF-16, как их считает Telegram
+    parts = split_text("😀" * 5, 4)
+    assert parts == ["😀😀", "😀😀", "😀"]
+    assert all(text_length(part) <= 4 for part in parts)
+
+
+def test_split_html_does_not_cut_tags():
+    parts = split_html("<b>" + "x" * 10 + "</b>", 6)
+    # Блок длиннее лимита уходит обычным текстом без разметки
+    assert parts == [("xxxxxx", None), ("xxxx", None)]
+
+
+def test_split_html_keeps_cards_whole():
+    cards = [format_vacancy({**VACANCY, "description": f"описание {i}"}) for i in range(20)]
+    text = SEPARATOR.join(cards)
+    limit = text_length(cards[0]) * 3
+    parts = split_html(text, limit)
+    assert len(parts) > 1
+    for part, parse_mode in parts:
+        assert parse_mode == "HTML"
+        assert text_length(part) <= limit
+        assert balanced(part)
+    assert "".join(part for part, _ in parts).replace("\n", "") == text.replace("\n", "")
+
+
+def test_split_html_multiline_tag_stays_in_one_part():
+    text = "<b>первая\nвторая</b>\nтретья"
+    parts = split_html(text, text_length("<b>первая\nвторая</b>"))
+    assert parts == [("<b>первая\nвторая</b>", "HTML"), ("третья", "HTML")]
+
+
+@pytest.mark.parametrize("description", ["", "Коротко", "<&>" * 3000, "😀" * 5000])
+def test_format_vacancy_fits_one_message(description):
+    card = format_vacancy({**VACANCY, "description": description}, limit=1000)
+    assert text_length(card) <= 1000
+    assert balanced(card)
+    assert split_html(card, 1000) == [(card, "HTML")]
+
+
+def test_format_vacancy_escapes_and_truncates():
+    card = format_vacancy({**VACANCY, "description": "<&>" * 3000}, limit=1000)
+    assert "<&>" not in card
+    assert "&lt;&amp;&gt;" in card
+    assert "…" in card
+    assert card.endswith("<a href='https://hh.ru/vacancy/1?a=1&amp;b=2'>Подробнее</a>")
+
+
+def take(queue: DeliveryQueue, messages) -> list:
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        pending = deque(OutboundMessage(text, mode, loop.create_future()) for text, mode in messages)
+        batches = []
+        while pending:
+            batches.append([(message.text, message.parse_mode) for message in queue._take_batch(pending)])
+        return batches
+
+    return asyncio.run(scenario())
+
+
+def test_take_batch_joins_up_to_limit():
+    queue = DeliveryQueue(bot=None, max_length=10)
+    batches = take(queue, [("aaa", None), ("bbb", None), ("ccc", None)])
+    # "aaa\n\nbbb" - 8 символов, с третьим было бы 13
+    assert batches == [[("aaa", None), ("bbb", None)], [("ccc", None)]]
+
+
+def test_take_batch_does_not_mix_parse_modes():
+    queue = DeliveryQueue(bot=None, max_length=100)
+    batches = take(queue, [("<b>a</b>", "HTML"), ("b", None), ("<i>c</i>", "HTML"), ("<i>d</i>", "HTML")])
+    assert batches == [[("<b>a</b>", "HTML")], [("b", None)], [("<i>c</i>", "HTML"), ("<i>d</i>", "HTML")]]
+
+
+def test_take_batch_single_message_over_limit_goes_alone():
+    queue = DeliveryQueue(bot=None, max_length=5)
+    assert take(queue, [("x" * 8, None), ("y", None)]) == [[("x" * 8, None)], [("y", None)]]
+
+
+def test_chat_bucket_allows_configured_burst():
+    # Запас корзины не режется до 1: несколько ответов подряд в чат уходят без ожидания
+    queue = DeliveryQueue(bot=None, chat_rate=1.0, chat_burst=3.0, group_rate=20 / 60)
+    assert queue._bucket(42).burst == 3.0
+    assert queue._bucket(42).tokens == 3.0
+    assert queue._bucket(-42).burst == 3.0
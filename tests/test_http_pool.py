@@ -0,0 +1,23 @@
+#test_http_pool.py
+# Общая сессия при смене цикла событий: прежняя закрывается, а не бросается открытой
+# Запуск: python -m pytest -q tests
+
+import os
+import sys
+import asyncio
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from agents.http_pool import close_session, get_session
+
+
+def test_session_from_previous_loop_is_closed():
+    first = asyncio.run(get_session())
+    second = asyncio.run(get_session())
+    try:
+        assert second is not first
+        assert first.closed
+        assert not second.closed
+    finally:
+        asyncio.run(close_session())
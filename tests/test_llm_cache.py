@@ -0,0 +1,98 @@
+#test_llm_cache.py
+# Кэш ответов LLM: повтор промпта не доходит до модели, а служебные поля сообщений
+# (id, расход токенов, метаданные ответа) не меняют ключ. Вместо GigaChat - локальная
+# модель-заглушка; без langchain тесты пропускаются.
+# Запуск: python -m pytest -q tests
+
+import os
+import sys
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_community")
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+os.environ["VACANCY_STORE_PATH"] = ""
+
+from typing import Any, List, Optional
+from langchain_core.globals import set_llm_cache
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from llm_cache import enable_llm_cache, llm_cache_lookups, prompt_key
+
+
+class FakeChatModel(BaseChatModel):
+    """Модель-заглушка: отвечает номером вызова и сообщает расход токенов"""
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs) -> ChatResult:
+        self.calls += 1
+        message = AIMessage(content=f"ответ {self.calls}", id=f"run-{self.calls}",
+                            usage_metadata={"input_tokens": self.calls, "output_tokens": 1, "total_tokens": self.calls + 1},
+                            response_metadata={"finish_reason": "stop"})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    yield enable_llm_cache(str(tmp_path / "llm_cache.sqlite3"))
+    set_llm_cache(None)
+
+
+def lookups() -> dict:
+    return llm_cache_lookups.snapshot()
+
+
+def test_repeated_prompt_skips_model(cache):
+    llm = FakeChatModel()
+    before = lookups()
+    first = llm.invoke("Найди вакансии Python")
+    second = llm.invoke("Найди вакансии Python")
+    assert llm.calls == 1
+    assert second.content == first.content
+    after = lookups()
+    assert after.get("hit", 0) - before.get("hit", 0) == 1
+    assert after.get("miss", 0) - before.get("miss", 0) == 1
+
+
+def test_new_prompt_reaches_model(cache):
+    llm = FakeChatModel()
+    llm.invoke("Найди вакансии Python")
+    llm.invoke("Найди вакансии Java")
+    assert llm.calls == 2
+
+
+def test_service_fields_do_not_change_key():
+    question = HumanMessage(content="Найди вакансии Python")
+    fresh = AIMessage(content="ответ", id="run-1",
+                      usage_metadata={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12},
+                      response_metadata={"finish_reason": "stop"})
+    cached = AIMessage(content="ответ", id="run-2",
+                       usage_metadata={"input_tokens": 0, "output_tokens": 0, "total_tokens": 0})
+    assert prompt_key(dumps([question, fresh])) == prompt_key(dumps([question, cached]))
+    assert prompt_key(dumps([question, fresh])) != prompt_key(dumps([question, AIMessage(content="другой ответ")]))
+
+
+def test_next_agent_step_hits_cache_after_cached_answer(cache):
+    """Переписка с ответом из кэша даёт тот же ключ, что и со свежим ответом"""
+    llm = FakeChatModel()
+    question = HumanMessage(content="Найди вакансии Python")
+    answer = llm.invoke([question])
+    llm.invoke([question, answer, HumanMessage(content="А в Москве?")])
+    cached_answer = llm.invoke([question])
+    llm.invoke([question, cached_answer, HumanMessage(content="А в Москве?")])
+    assert llm.calls == 2
+
+
+def test_text_prompt_key_is_unchanged():
+    assert prompt_key("просто текст") == "просто текст"
+    assert prompt_key('{"kwargs": {"id": 1}}') == '{"kwargs": {"id": 1}}'
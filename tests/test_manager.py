@@ -0,0 +1,46 @@
+#test_manager.py
+# Long-poll менеджера: задача, выданная агенту в момент истечения таймаута опроса,
+# не должна теряться (wait_for в Python 3.12+ отдаёт в этом случае TimeoutError)
+# Запуск: python -m pytest -q tests
+
+import os
+import sys
+import time
+import asyncio
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+os.environ["VACANCY_STORE_PATH"] = ""
+
+from agents.manager import AgentManager, Task
+
+
+def test_poll_timeout_without_task_returns_none():
+    async def scenario():
+        manager = AgentManager()
+        assert await manager.get_task("a1", timeout=0.01) is None
+        assert manager.waiters == []
+
+    asyncio.run(scenario())
+
+
+def test_task_handed_over_at_poll_timeout_is_dispatched(monkeypatch):
+    async def scenario():
+        manager = AgentManager()
+        task = Task(request_id="r1", query="python", user_id=1, deadline=time.monotonic() + 60)
+        manager.tasks[task.request_id] = task
+
+        async def wait_for_timed_out(waiter, timeout):
+            # Задача выдана ожидающему агенту, но таймаут опроса сработал в том же витке цикла
+            manager._enqueue(task)
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(asyncio, "wait_for", wait_for_timed_out)
+        payload = await manager.get_task("a1", timeout=0.01)
+        assert payload == task.payload()
+        assert task.agent_id == "a1"
+        assert "r1" in manager.agents["a1"].tasks
+        assert not manager.pending
+
+    asyncio.run(scenario())
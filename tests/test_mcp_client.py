@@ -0,0 +1,42 @@
+#test_mcp_client.py
+# Таймауты MCPClientPool: таймаут вызова действует поверх таймаута сессии fastmcp.Client.
+# Сервер - FastMCP в том же процессе (fastmcp.Client принимает его вместо URL).
+# Запуск: python -m pytest -q tests
+
+import os
+import sys
+import asyncio
+import pytest
+from fastmcp import FastMCP
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from bot.mcp_client import MCPClientPool
+
+mcp = FastMCP("test")
+
+
+@mcp.tool
+async def slow(seconds: float) -> dict:
+    await asyncio.sleep(seconds)
+    return {"slept": seconds}
+
+
+async def call(seconds: float, pool_timeout: float, timeout=None):
+    pool = MCPClientPool(mcp, size=1, timeout=pool_timeout)
+    try:
+        return await pool.call_tool("slow", {"seconds": seconds}, timeout=timeout), pool.stats()
+    finally:
+        await pool.close()
+
+
+def test_call_timeout_longer_than_session_timeout():
+    result, stats = asyncio.run(call(0.5, pool_timeout=0.2, timeout=3))
+    assert result == {"slept": 0.5}
+    assert stats["timeouts"] == 0
+
+
+def test_timeout_raises_asyncio_timeout():
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(call(1, pool_timeout=0.2))
@@ -0,0 +1,58 @@
+#test_page_limits.py
+# Глубина выдачи: число страниц ограничено MAX_PAGES в схеме пакета и в самом HHParser,
+# чтобы один запрос не ставил в очередь ограничителя тысячи обращений к HH.ru
+# Запуск: python -m pytest -q tests
+
+import os
+import sys
+import asyncio
+import pytest
+from pydantic import ValidationError
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+os.environ["VACANCY_STORE_PATH"] = ""
+
+from config import Config
+from models.schemas import BatchItem
+from agents.hh_parser import HHParser, clamp_pages
+
+
+@pytest.mark.parametrize("fields", [{"pages": 0}, {"pages": Config.MAX_PAGES + 1}, {"pages": 100000}, {"area": 0}])
+def test_batch_item_bounds(fields):
+    with pytest.raises(ValidationError):
+        BatchItem(query="python", **fields)
+
+
+def test_batch_item_defaults():
+    item = BatchItem(query="python", pages=Config.MAX_PAGES)
+    assert (item.area, item.pages) == (1, Config.MAX_PAGES)
+
+
+@pytest.mark.parametrize("pages, expected", [(-5, 1), (0, 1), (3, 3), (100000, Config.MAX_PAGES)])
+def test_clamp_pages(pages, expected):
+    assert clamp_pages(pages) == expected
+
+
+def test_clamp_pages_respects_hh_depth(monkeypatch):
+    monkeypatch.setattr(Config, "MAX_PAGES", 1000)
+    monkeypatch.setattr(Config, "MAX_VACANCIES", 100)
+    assert clamp_pages(1000) == Config.HH_MAX_DEPTH // 100
+
+
+def test_parser_requests_at_most_max_pages():
+    requests = HHParser(store=None)._page_requests(None, "python", 1, 100000)
+    try:
+        assert len(requests) == Config.MAX_PAGES
+    finally:
+        for request in requests:
+            request.close()
+
+
+@pytest.mark.parametrize("pages", [0, -1, Config.MAX_PAGES + 1, 100000])
+def test_handle_request_rejects_pages_out_of_range(pages):
+    from master.mcp_server import handle_vacancy_request
+    result = asyncio.run(handle_vacancy_request({"query": "python", "user_id": 1}, pages=pages))
+    assert result["status"] == "error"
+    assert "pages" in result["message"]
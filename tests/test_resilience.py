@@ -0,0 +1,140 @@
+#test_resilience.py
+# Предохранитель HH.ru: проба half-open не должна зависать, если HH.ru ответил 4xx/429
+# или исход пробы не записан (отмена запроса). Запросы идут в локальный HTTP-сервер.
+# Запуск: python -m pytest -q tests
+
+import os
+import sys
+import time
+import asyncio
+import aiohttp
+import pytest
+from aiohttp import web
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+# Тесты не должны создавать хранилище вакансий в рабочем каталоге
+os.environ["VACANCY_STORE_PATH"] = ""
+
+import agentparser
+from config import Config
+from agents.hh_parser import HHParser
+from agents.resilience import CircuitBreaker, CircuitOpenError, hh_breaker
+
+STATUSES = [400, 404, 429]
+
+
+@pytest.fixture
+def half_open(monkeypatch):
+    """Общий предохранитель в состоянии «пауза истекла, следующий запрос - проба»"""
+    monkeypatch.setattr(Config, "HH_MAX_RETRIES", 0)
+    hh_breaker.state = CircuitBreaker.OPEN
+    hh_breaker.opened_at = time.monotonic() - hh_breaker.reset_timeout
+    hh_breaker._probe_in_flight = False
+    yield hh_breaker
+    hh_breaker.record_success()
+
+
+async def serve(call, status: int = 200, hang: bool = False):
+    """call(URL) при локальном сервере, который отвечает status или не отвечает вовсе"""
+    released = asyncio.Event()
+
+    async def handler(request):
+        if hang:
+            await released.wait()
+        return web.json_response({"errors": []}, status=status, headers={"Retry-After": "0"})
+
+    app = web.Application()
+    app.router.add_get("/vacancies", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        return await call(f"http://127.0.0.1:{port}/vacancies")
+    finally:
+        released.set()
+        await runner.cleanup()
+
+
+def test_release_probe_allows_next_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.check() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.release_probe()
+    assert breaker.check() is True
+
+
+def test_failed_probe_reopens_breaker(half_open):
+    assert half_open.check() is True
+    half_open.record_failure()
+    assert half_open.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        half_open.check()
+
+
+@pytest.mark.parametrize("status", STATUSES)
+def test_hh_parser_probe_with_client_error_closes_breaker(half_open, monkeypatch, status):
+    async def call(url):
+        monkeypatch.setattr(Config, "HH_API_URL", url)
+        async with aiohttp.ClientSession() as session:
+            return await HHParser(session=session).fetch_vacancies(f"probe {status}", mode="live")
+
+    assert asyncio.run(serve(call, status)) == []
+    assert half_open.state == CircuitBreaker.CLOSED
+    assert half_open.check() is False
+
+
+@pytest.mark.parametrize("status", STATUSES)
+def test_get_json_probe_with_client_error_closes_breaker(half_open, status):
+    async def call(url):
+        with pytest.raises(Exception):
+            await asyncio.to_thread(agentparser.get_json, url)
+
+    asyncio.run(serve(call, status))
+    assert half_open.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.parametrize("status", STATUSES)
+def test_get_json_async_probe_with_client_error_closes_breaker(half_open, status):
+    async def call(url):
+        async with aiohttp.ClientSession() as session:
+            with pytest.raises(aiohttp.ClientResponseError):
+                await agentparser.get_json_async(session, url)
+
+    asyncio.run(serve(call, status))
+    assert half_open.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_get_json_async_probe_is_released(half_open):
+    async def call(url):
+        async with aiohttp.ClientSession() as session:
+            task = asyncio.create_task(agentparser.get_json_async(session, url))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(serve(call, hang=True))
+    assert half_open.state == CircuitBreaker.HALF_OPEN
+    assert half_open.check() is True
+
+
+def test_cancelled_hh_parser_probe_is_released(half_open, monkeypatch):
+    async def call(url):
+        monkeypatch.setattr(Config, "HH_API_URL", url)
+        async with aiohttp.ClientSession() as session:
+            task = asyncio.create_task(HHParser(session=session)._request_hh_api(session, {"text": "probe"}))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(serve(call, hang=True))
+    # Отменённая проба ничего не сообщила предохранителю, но следующую он пропускает
+    assert half_open.state == CircuitBreaker.HALF_OPEN
+    assert half_open.check() is True
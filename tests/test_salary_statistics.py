@@ -0,0 +1,50 @@
+#test_salary_statistics.py
+# MCP-инструмент salary_statistics читает наборы только из DATASET_DIR и пишет
+# агрегаты только туда же; пути клиента за пределы каталога отклоняются
+# Запуск: python -m pytest -q tests
+
+import os
+import sys
+import asyncio
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+os.environ["VACANCY_STORE_PATH"] = ""
+
+from config import Config
+from master.mcp_server import get_salary_stats, resolve_dataset_path
+
+CSV = "salary_from,salary_to,currency\n100000,150000,RUR\n200000,,RUR\n"
+
+
+@pytest.fixture
+def dataset_dir(tmp_path, monkeypatch):
+    base = tmp_path / "data"
+    base.mkdir()
+    (base / "vacancies.csv").write_text(CSV, encoding="utf-8")
+    (tmp_path / "secret.csv").write_text(CSV, encoding="utf-8")
+    monkeypatch.setattr(Config, "DATASET_DIR", str(base))
+    return base
+
+
+def test_dataset_inside_directory(dataset_dir):
+    result = asyncio.run(get_salary_stats("vacancies.csv"))
+    assert result["status"] == "success"
+    assert result["with_salary"] == 2
+    assert (dataset_dir / "vacancies.csv.salary.json").exists()
+
+
+@pytest.mark.parametrize("file_path", ["../secret.csv", "{tmp}/secret.csv", "", "."])
+def test_paths_outside_directory_are_rejected(dataset_dir, file_path):
+    file_path = file_path.format(tmp=dataset_dir.parent)
+    result = asyncio.run(get_salary_stats(file_path))
+    assert result["status"] == "error"
+    assert "outside the dataset directory" in result["message"]
+    assert sorted(os.listdir(dataset_dir.parent)) == ["data", "secret.csv"]
+
+
+def test_symlink_out_of_directory_is_rejected(dataset_dir):
+    (dataset_dir / "link.csv").symlink_to(dataset_dir.parent / "secret.csv")
+    assert resolve_dataset_path("link.csv") is None
@@ -0,0 +1,28 @@
+#test_webhook.py
+# Проверка секрета webhook: заголовок сравнивается за постоянное время
+# Запуск: python -m pytest -q tests
+
+import os
+import sys
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+os.environ["VACANCY_STORE_PATH"] = ""
+
+from config import Config
+from bot.webhook import valid_secret
+
+
+@pytest.mark.parametrize("token, expected", [
+    ("s3cret-token", True),
+    ("s3cret-tokeN", False),
+    ("s3cret", False),
+    ("", False),
+    (None, False),
+    ("секрет", False),
+])
+def test_valid_secret(monkeypatch, token, expected):
+    monkeypatch.setattr(Config, "WEBHOOK_SECRET", "s3cret-token")
+    assert valid_secret(token) is expected
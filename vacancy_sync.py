@@ -0,0 +1,141 @@
+#vacancy_sync
+
+import time
+import sqlite3
+import argparse
+import requests
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from agents.resilience import CircuitOpenError
+from agentparser import find_items, fetch_details, get_json, vacancies_to_dataframe, append_vacancies
+
+STATUS_OPEN = 'open'
+STATUS_CLOSED = 'closed'
+
+
+class VacancyIndex:
+    """Локальный индекс известных вакансий: id, published_at и статус в разрезе поискового запроса"""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS vacancies ("
+            "scope TEXT NOT NULL, id TEXT NOT NULL, published_at TEXT, status TEXT NOT NULL, "
+            "synced_at REAL NOT NULL, PRIMARY KEY (scope, id))"
+        )
+        self.conn.commit()
+
+    def open_vacancies(self, scope):
+        """id -> published_at для открытых вакансий запроса"""
+        rows = self.conn.execute(
+            "SELECT id, published_at FROM vacancies WHERE scope = ? AND status = ?", (scope, STATUS_OPEN)
+        )
+        return dict(rows.fetchall())
+
+    def known_ids(self, scope):
+        rows = self.conn.execute("SELECT id FROM vacancies WHERE scope = ?", (scope,))
+        return {row[0] for row in rows.fetchall()}
+
+    def upsert(self, scope, vacancies, status, synced_at):
+        """vacancies: пары (id, published_at)"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO vacancies VALUES (?, ?, ?, ?, ?)",
+            [(scope, vacancy_id, published_at, status, synced_at) for vacancy_id, published_at in vacancies]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def sync_scope(job_titles, area):
+    """Ключ области синхронизации: одни и те же запрос и регион"""
+    titles = sorted(" ".join(title.lower().split()) for title in job_titles)
+    return f"{area}|{'|'.join(titles)}"
+
+
+def _check_closed(ids, url_base):
+    """Из пропавших из выдачи вакансий отбирает закрытые (404 или archived), с данными если есть"""
+    def check(vacancy_id):
+        try:
+            vacancy = get_json(url_base + vacancy_id)
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return {'id': vacancy_id}
+            return None
+        except (requests.exceptions.RequestException, CircuitOpenError):
+            return None
+        return vacancy if vacancy.get('archived') else None
+
+    with ThreadPoolExecutor(max_workers=Config.HH_MAX_IN_FLIGHT) as executor:
+        return [vacancy for vacancy in executor.map(check, ids) if vacancy is not None]
+
+
+def sync_vacancies(job_titles, pages_number, area, dataset_path, index_path=None):
+    """Инкрементальная синхронизация набора вакансий.
+
+    Детали загружаются только для новых вакансий и вакансий с изменившимся published_at.
+    Вакансии, пропавшие из выдачи и закрытые на HH.ru, помечаются статусом closed.
+    Изменения дописываются в набор dataset_path: актуальное состояние вакансии - её последняя строка.
+
+    Returns:
+        Словарь с количеством новых, изменённых, закрытых и неизменных вакансий
+    """
+    url_base = Config.HH_API_URL.rstrip('/') + '/'
+    scope = sync_scope(job_titles, area)
+    index = VacancyIndex(index_path or Config.SYNC_INDEX_PATH)
+    try:
+        known_open = index.open_vacancies(scope)
+        known = index.known_ids(scope)
+
+        # Выдача поиска без дублей, порядок сохраняется
+        seen = {}
+        for item in find_items(job_titles, pages_number, area, url_base):
+            seen.setdefault(item['id'], item.get('published_at'))
+
+        new_ids = [vacancy_id for vacancy_id in seen if vacancy_id not in known]
+        changed_ids = [
+            vacancy_id for vacancy_id, published_at in seen.items()
+            if vacancy_id in known and known_open.get(vacancy_id) != published_at
+        ]
+        missing_ids = [vacancy_id for vacancy_id in known_open if vacancy_id not in seen]
+
+        fetched = list(fetch_details(new_ids + changed_ids, url_base))
+        closed = _check_closed(missing_ids, url_base)
+
+        synced_at = time.time()
+        frames = []
+        for vacancies, status in ((fetched, STATUS_OPEN), (closed, STATUS_CLOSED)):
+            if vacancies:
+                df = vacancies_to_dataframe(vacancies)
+                df['status'] = status
+                df['synced_at'] = pd.Timestamp.fromtimestamp(synced_at)
+                frames.append(df)
+        if frames:
+            delta = pd.concat(frames, ignore_index=True)
+            print(append_vacancies(delta, dataset_path))
+
+        index.upsert(scope, [(vacancy['id'], seen[vacancy['id']]) for vacancy in fetched], STATUS_OPEN, synced_at)
+        index.upsert(scope, [(vacancy['id'], known_open[vacancy['id']]) for vacancy in closed], STATUS_CLOSED, synced_at)
+
+        fetched_ids = {vacancy['id'] for vacancy in fetched}
+        return {
+            'new': sum(1 for vacancy_id in new_ids if vacancy_id in fetched_ids),
+            'changed': sum(1 for vacancy_id in changed_ids if vacancy_id in fetched_ids),
+            'closed': len(closed),
+            'unchanged': len(seen) - len(new_ids) - len(changed_ids)
+        }
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    cli = argparse.ArgumentParser(description="Инкрементальная синхронизация вакансий HH.ru")
+    cli.add_argument("query", nargs="+", help="Поисковые запросы")
+    cli.add_argument("--area", type=int, default=113, help="ID региона (113 - вся Россия)")
+    cli.add_argument("--pages", type=int, default=20, help="Количество страниц выдачи")
+    cli.add_argument("--dataset", default="vacancies.parquet", help="Файл набора (.csv, .parquet, .feather)")
+    cli.add_argument("--index", default=None, help="Файл индекса SQLite")
+    args = cli.parse_args()
+    print(sync_vacancies(args.query, args.pages, args.area, args.dataset, args.index))